@@ -1,13 +1,74 @@
-from flask import Flask, render_template, request, jsonify, url_for, session
+from flask import Flask, render_template, request, jsonify, url_for, session, send_from_directory, g, has_request_context
+from flask.json.provider import DefaultJSONProvider
+from flask.logging import default_handler
+from markupsafe import Markup
+from jinja2.utils import htmlsafe_json_dumps
 from flask_sqlalchemy import SQLAlchemy
-from flask_mail import Mail, Message
+from flask_sqlalchemy.session import Session as FlaskSQLAlchemySession
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.engine import Engine
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+from flask_mail import Mail, Message, Connection as MailConnection
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from itsdangerous import URLSafeTimedSerializer
+import click
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from functools import wraps
+from contextlib import contextmanager
+from bisect import bisect_left
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from collections import OrderedDict
+from itertools import accumulate
+import atexit
+import cProfile
+import csv
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
 import os
+import pstats
+import queue
+import random
+import re
+import smtplib
+import sqlite3
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: ohne Dateisperre läuft der Scheduler in jedem Prozess
+    fcntl = None
+
+try:
+    import brotli
+except ImportError:  # Brotli ist optional, ohne wird nur gzip vorkomprimiert
+    brotli = None
+
+try:
+    import orjson
+except ImportError:  # orjson ist optional, sonst wird das json-Modul der Standardbibliothek genutzt
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:  # numpy ist optional, die Auslastungsstatistik rechnet sonst in reinem Python
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # Nur unter Unix; ohne Dateisperre rotiert jeder Prozess seine Log-Datei selbst
+    fcntl = None
 
 # Lade Umgebungsvariablen aus .env Datei
 load_dotenv()
@@ -22,6 +83,12 @@ app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
 if not app.config['SECRET_KEY']:
     raise ValueError("SECRET_KEY muss in der .env Datei gesetzt sein!")
 
+# Optionale Lese-Replik: lesende Routen werden dorthin geleitet, Schreibzugriffe gehen immer an die Primär-DB
+DATABASE_REPLICA_URI = os.getenv('DATABASE_REPLICA_URI')
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 10))  # Nach eigenem Schreibzugriff an Primär-DB bleiben
+if DATABASE_REPLICA_URI:
+    app.config['SQLALCHEMY_BINDS'] = {'replica': DATABASE_REPLICA_URI}
+
 # E-Mail-Konfiguration aus Umgebungsvariablen
 app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER')
 app.config['MAIL_PORT'] = int(os.getenv('MAIL_PORT', 25))
@@ -39,11 +106,455 @@ app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=2)  # Session läuft nach 2h ab
 
-db = SQLAlchemy(app)
-mail = Mail(app)
+# Logging: JSON-Zeilen über eine Queue, geschrieben von einem Listener-Thread pro Prozess, damit Request-Threads
+# nie auf Datei oder stdout warten. Jede Zeile aus einem Request trägt dessen Request-ID.
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_DIR = os.getenv('LOG_DIR', 'logs')  # Leer = nur stdout
+LOG_FILE_MAX_MB = float(os.getenv('LOG_FILE_MAX_MB', 10))
+LOG_FILE_BACKUPS = int(os.getenv('LOG_FILE_BACKUPS', 5))
+LOG_STDOUT = os.getenv('LOG_STDOUT', 'True').lower() == 'true'
+LOG_REQUESTS = os.getenv('LOG_REQUESTS', 'True').lower() == 'true'
+REQUEST_ID_HEADER = 'X-Request-ID'
+_REQUEST_ID_MUSTER = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+class JsonFormatter(logging.Formatter):
+    """Eine JSON-Zeile pro Eintrag; Felder aus extra={'felder': {...}} werden übernommen"""
+
+    def format(self, record):
+        eintrag = {
+            'zeit': datetime.utcfromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'pid': record.process,
+            'nachricht': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            eintrag['request_id'] = record.request_id
+        eintrag.update(getattr(record, 'felder', {}))
+        if getattr(record, 'ausnahme', None):
+            eintrag['ausnahme'] = record.ausnahme
+        return json.dumps(eintrag, ensure_ascii=False, default=str)
+
+class _RequestKontextFilter(logging.Filter):
+    """Läuft im aufrufenden Thread: Request-ID und Traceback werden festgehalten, bevor der Eintrag in die Queue geht"""
+
+    def filter(self, record):
+        if has_request_context() and 'request_id' in g:
+            record.request_id = g.request_id
+        if record.exc_info and not getattr(record, 'ausnahme', None):
+            record.ausnahme = logging.Formatter().formatException(record.exc_info)
+        return True
+
+class _NachrichtFormatter(logging.Formatter):
+    """Für den QueueHandler: nur die Nachricht, der Traceback steht schon im Feld 'ausnahme'"""
+
+    def format(self, record):
+        return record.getMessage()
+
+class ProzessRotierendeDatei(RotatingFileHandler):
+    """
+    RotatingFileHandler für mehrere Worker-Prozesse auf derselben Datei: rotiert wird unter einer Dateisperre,
+    und ein Prozess, dessen Datei ein anderer rotiert hat, öffnet die neue Datei.
+    """
+
+    def _neu_oeffnen_falls_rotiert(self):
+        try:
+            aktuell = os.stat(self.baseFilename).st_ino
+        except FileNotFoundError:
+            aktuell = None
+        if self.stream is None or aktuell != os.fstat(self.stream.fileno()).st_ino:
+            if self.stream is not None:
+                self.stream.close()
+            self.stream = self._open()
+
+    def shouldRollover(self, record):
+        self._neu_oeffnen_falls_rotiert()
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        if fcntl is None:
+            return super().doRollover()
+        with open(self.baseFilename + '.lock', 'a') as sperre:
+            fcntl.flock(sperre, fcntl.LOCK_EX)
+            # Ein anderer Prozess kann gerade rotiert haben, während wir auf die Sperre gewartet haben
+            self._neu_oeffnen_falls_rotiert()
+            if self.stream.seek(0, 2) >= self.maxBytes:
+                super().doRollover()
+
+def _log_handler_erstellen():
+    handler = []
+    if LOG_STDOUT:
+        handler.append(logging.StreamHandler(sys.stdout))
+    if LOG_DIR:
+        try:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            handler.append(ProzessRotierendeDatei(os.path.join(LOG_DIR, 'app.log'),
+                                                  maxBytes=int(LOG_FILE_MAX_MB * 1024 * 1024),
+                                                  backupCount=LOG_FILE_BACKUPS, encoding='utf-8'))
+        except OSError as e:
+            sys.stderr.write(f"Log-Verzeichnis {LOG_DIR} nicht beschreibbar, nur stdout: {str(e)}\n")
+    formatter = JsonFormatter()
+    for h in handler:
+        h.setFormatter(formatter)
+    return handler
+
+_log_handler = _log_handler_erstellen()
+_log_queue_handler = QueueHandler(queue.SimpleQueue())
+_log_queue_handler.setFormatter(_NachrichtFormatter())
+_log_queue_handler.addFilter(_RequestKontextFilter())
+_log_listener = None
+
+def _log_listener_starten():
+    """Startet den Schreib-Thread; nach einem Fork (Gunicorn-Worker) mit neuer Queue, der Thread lebt nur im Elternprozess"""
+    global _log_listener
+    _log_queue_handler.queue = queue.SimpleQueue()
+    _log_listener = QueueListener(_log_queue_handler.queue, *_log_handler, respect_handler_level=True)
+    _log_listener.start()
+
+@atexit.register
+def _log_listener_stoppen():
+    # Noch wartende Einträge schreiben
+    if _log_listener is not None and _log_listener._thread is not None:
+        _log_listener.stop()
+
+app.logger.removeHandler(default_handler)
+app.logger.addHandler(_log_queue_handler)
+app.logger.setLevel(LOG_LEVEL)
+app.logger.propagate = False
+logger = app.logger
+_log_listener_starten()
+os.register_at_fork(after_in_child=_log_listener_starten)
+
+@app.before_request
+def _request_beginnen():
+    kennung = request.headers.get(REQUEST_ID_HEADER, '')
+    g.request_id = kennung if _REQUEST_ID_MUSTER.match(kennung) else uuid.uuid4().hex
+    g.request_beginn = time.perf_counter()
+    g.db_ms = 0.0
+    g.db_abfragen = 0
+    g.smtp_ms = 0.0
+
+@app.after_request
+def _request_protokollieren(response):
+    """Läuft als letzter after_request-Hook: Request-ID-Header und eine Log-Zeile pro Request"""
+    if 'request_id' not in g:
+        return response
+    response.headers[REQUEST_ID_HEADER] = g.request_id
+    if LOG_REQUESTS:
+        # Health-Probes nur auf DEBUG, sonst überdecken sie alles andere
+        level = logging.DEBUG if request.path.startswith('/health') else logging.INFO
+        logger.log(level, f'{request.method} {request.path} {response.status_code}', extra={'felder': {
+            'methode': request.method,
+            'route': request.url_rule.rule if request.url_rule else None,
+            'pfad': request.full_path.rstrip('?'),
+            'status': response.status_code,
+            'dauer_ms': round((time.perf_counter() - g.request_beginn) * 1000, 1),
+            'db_ms': round(g.db_ms, 1),
+            'db_abfragen': g.db_abfragen,
+            'smtp_ms': round(g.smtp_ms, 1),
+        }})
+    return response
+
+class RoutingSession(FlaskSQLAlchemySession):
+    """Session, die Lesezugriffe von als read-only markierten Routen an die Replik leitet"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and replica_aktiv():
+            return self._db.engines['replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+
+# Datenbankzeit pro Request (für die Log-Zeile)
+@db.event.listens_for(Engine, 'before_cursor_execute')
+def _abfrage_beginn(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info['abfrage_beginn'] = time.perf_counter()
+
+@db.event.listens_for(Engine, 'after_cursor_execute')
+def _abfrage_ende(conn, cursor, statement, parameters, context, executemany):
+    beginn = conn.info.pop('abfrage_beginn', None)
+    if beginn is not None and has_request_context() and 'db_ms' in g:
+        g.db_ms += (time.perf_counter() - beginn) * 1000
+        g.db_abfragen += 1
+
+# Hintergrund-Jobs: jeder Worker-Prozess startet beim ersten Request einen Scheduler-Thread, die Jobs führt aber
+# nur der Prozess aus, der die Sperrdatei hält. Die übrigen warten darauf und übernehmen, wenn dieser Worker endet
+# (z.B. Neustart nach max_requests); das Betriebssystem gibt die Sperre mit dem Prozess frei.
+BACKGROUND_JOBS_ENABLED = os.getenv('BACKGROUND_JOBS_ENABLED', 'True').lower() == 'true'
+BACKGROUND_JOBS_LOCK_FILE = os.getenv('BACKGROUND_JOBS_LOCK_FILE', os.path.join(app.instance_path, 'hintergrund_jobs.lock'))
+BACKGROUND_JOBS_LOCK_RETRY = int(os.getenv('BACKGROUND_JOBS_LOCK_RETRY', 30))  # Sekunden
+_hintergrund_jobs = []
+_scheduler_status = {'pid': None, 'aktiv': False, 'sperre': None}
+_scheduler_lock = threading.Lock()
+
+def hintergrund_job(name, intervall):
+    """
+    Registriert eine Funktion als periodischen Hintergrund-Job.
+    intervall: Sekunden oder eine Funktion, die die Sekunden liefert (z.B. aus den Einstellungen).
+    """
+    def decorator(f):
+        _hintergrund_jobs.append({'name': name, 'intervall': intervall, 'funktion': f, 'naechster_lauf': None})
+        return f
+    return decorator
+
+def _job_intervall(job):
+    intervall = job['intervall']
+    return intervall() if callable(intervall) else intervall
+
+def _scheduler_sperre_nehmen():
+    """Wartet, bis dieser Prozess die Sperrdatei exklusiv hält; die Datei bleibt bis zum Prozessende offen"""
+    if fcntl is None:
+        return None
+    os.makedirs(os.path.dirname(os.path.abspath(BACKGROUND_JOBS_LOCK_FILE)), exist_ok=True)
+    datei = open(BACKGROUND_JOBS_LOCK_FILE, 'a')
+    while True:
+        try:
+            fcntl.flock(datei, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return datei
+        except OSError:
+            time.sleep(BACKGROUND_JOBS_LOCK_RETRY)
+
+def _scheduler_loop():
+    _scheduler_status['sperre'] = _scheduler_sperre_nehmen()
+    _scheduler_status['aktiv'] = True
+    logger.info(f"Hintergrund-Jobs laufen in Prozess {os.getpid()}")
+    while True:
+        jetzt = time.monotonic()
+        for job in _hintergrund_jobs:
+            if job['naechster_lauf'] is None:
+                job['naechster_lauf'] = jetzt + _job_intervall(job)
+            if jetzt < job['naechster_lauf']:
+                continue
+            try:
+                with app.app_context():
+                    job['funktion']()
+            except Exception:
+                logger.exception(f"Fehler im Hintergrund-Job {job['name']}")
+            finally:
+                try:
+                    job['naechster_lauf'] = time.monotonic() + _job_intervall(job)
+                except Exception:
+                    job['naechster_lauf'] = time.monotonic() + 60
+        time.sleep(1)
+
+def start_hintergrund_jobs():
+    """Startet den Scheduler-Thread (einmal pro Prozess, auch nach einem Fork)"""
+    if not BACKGROUND_JOBS_ENABLED or not _hintergrund_jobs:
+        return
+    with _scheduler_lock:
+        if _scheduler_status['pid'] == os.getpid():
+            return
+        _scheduler_status.update({'pid': os.getpid(), 'aktiv': False, 'sperre': None})
+        for job in _hintergrund_jobs:
+            job['naechster_lauf'] = None
+        threading.Thread(target=_scheduler_loop, name='hintergrund-jobs', daemon=True).start()
+
+@app.before_request
+def _hintergrund_jobs_starten():
+    if _scheduler_status['pid'] != os.getpid():
+        start_hintergrund_jobs()
+
+# SQLite-Produktionsprofil (WAL, Busy-Timeout usw.), wird für jede neue Verbindung gesetzt
+SQLITE_PRODUCTION_PROFILE = os.getenv('SQLITE_PRODUCTION_PROFILE', 'True').lower() == 'true'
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 15000))
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 128 * 1024 * 1024))
+SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 20000))
+SQLITE_CHECKPOINT_INTERVAL = int(os.getenv('SQLITE_CHECKPOINT_INTERVAL', 300))  # Sekunden
+
+def ist_sqlite(engine=None):
+    engine = engine or db.engine
+    return engine.dialect.name == 'sqlite'
+
+@db.event.listens_for(Engine, 'connect')
+def _sqlite_profil_anwenden(dbapi_connection, connection_record):
+    if not SQLITE_PRODUCTION_PROFILE or not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+        cursor.execute(f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+    finally:
+        cursor.close()
+
+@hintergrund_job('sqlite-checkpoint', SQLITE_CHECKPOINT_INTERVAL)
+def sqlite_wal_checkpoint():
+    """Überträgt das WAL regelmäßig in die Datenbankdatei, damit es nicht unbegrenzt wächst"""
+    if SQLITE_PRODUCTION_PROFILE and ist_sqlite():
+        with db.engine.connect() as conn:
+            conn.exec_driver_sql('PRAGMA wal_checkpoint(PASSIVE)')
+
+# SMTP-Schutz: harte Timeouts und Circuit Breaker, damit ein hängender Mailserver keine Worker blockiert
+SMTP_CONNECT_TIMEOUT = float(os.getenv('SMTP_CONNECT_TIMEOUT', 5))  # Sekunden
+SMTP_SEND_TIMEOUT = float(os.getenv('SMTP_SEND_TIMEOUT', 10))  # Sekunden pro SMTP-Befehl
+SMTP_BREAKER_THRESHOLD = int(os.getenv('SMTP_BREAKER_THRESHOLD', 3))  # Fehler in Folge bis zum Öffnen
+SMTP_BREAKER_RESET_SECONDS = int(os.getenv('SMTP_BREAKER_RESET_SECONDS', 60))
+SMTP_OUTBOX_RETRY_INTERVAL = int(os.getenv('SMTP_OUTBOX_RETRY_INTERVAL', 60))
+SMTP_OUTBOX_LEASE_SECONDS = int(os.getenv('SMTP_OUTBOX_LEASE_SECONDS', 300))  # Danach gilt ein Versand als abgebrochen
+SMTP_OUTBOX_MAX_VERSUCHE = int(os.getenv('SMTP_OUTBOX_MAX_VERSUCHE', 10))  # Danach wird eine E-Mail aufgegeben
+
+class SMTPNichtVerfuegbar(Exception):
+    """Der Circuit Breaker ist offen, der Versand wurde für später vorgemerkt"""
+
+class CircuitBreaker:
+    """Einfacher Circuit Breaker (geschlossen -> offen -> halboffen) pro Worker-Prozess"""
+
+    def __init__(self, schwelle, reset_sekunden):
+        self.schwelle = schwelle
+        self.reset_sekunden = reset_sekunden
+        self.fehler_in_folge = 0
+        self.offen_seit = None
+        self.letzter_fehler = None
+        self._probe_laeuft = False
+        self._lock = threading.Lock()
+
+    def zustand(self):
+        if self.offen_seit is None:
+            return 'geschlossen'
+        if time.monotonic() - self.offen_seit >= self.reset_sekunden:
+            return 'halboffen'
+        return 'offen'
+
+    def erlaubt(self):
+        """True, wenn ein Versuch erlaubt ist (im halboffenen Zustand genau ein Probeversuch)"""
+        with self._lock:
+            zustand = self.zustand()
+            if zustand == 'geschlossen':
+                return True
+            if zustand == 'halboffen' and not self._probe_laeuft:
+                self._probe_laeuft = True
+                return True
+            return False
+
+    def erfolg(self):
+        with self._lock:
+            self.fehler_in_folge = 0
+            self.offen_seit = None
+            self._probe_laeuft = False
+
+    def fehler(self, fehler):
+        with self._lock:
+            self.fehler_in_folge += 1
+            self.letzter_fehler = str(fehler)
+            if self._probe_laeuft or self.fehler_in_folge >= self.schwelle:
+                self.offen_seit = time.monotonic()
+            self._probe_laeuft = False
+
+    def status(self):
+        zustand = self.zustand()
+        return {
+            'zustand': zustand,
+            'fehler_in_folge': self.fehler_in_folge,
+            'letzter_fehler': self.letzter_fehler,
+            'wieder_versuch_in': (max(0, round(self.reset_sekunden - (time.monotonic() - self.offen_seit)))
+                                  if zustand == 'offen' else None)
+        }
+
+smtp_breaker = CircuitBreaker(SMTP_BREAKER_THRESHOLD, SMTP_BREAKER_RESET_SECONDS)
+
+class TimeoutMailConnection(MailConnection):
+    """Flask-Mail-Verbindung mit Connect- und Sende-Timeout"""
+
+    def configure_host(self):
+        if self.mail.use_ssl:
+            host = smtplib.SMTP_SSL(self.mail.server, self.mail.port, timeout=SMTP_CONNECT_TIMEOUT)
+        else:
+            host = smtplib.SMTP(self.mail.server, self.mail.port, timeout=SMTP_CONNECT_TIMEOUT)
+
+        # Nach dem Verbindungsaufbau gilt der Sende-Timeout für jeden weiteren SMTP-Befehl
+        host.sock.settimeout(SMTP_SEND_TIMEOUT)
+        host.set_debuglevel(int(self.mail.debug))
+
+        if self.mail.use_tls:
+            host.starttls()
+        if self.mail.username and self.mail.password:
+            host.login(self.mail.username, self.mail.password)
+
+        return host
+
+class GeschuetzteMail(Mail):
+    """Mail mit Timeouts und Circuit Breaker; nicht zustellbare E-Mails landen im Postausgang"""
+
+    _lokal = threading.local()
+
+    def connect(self):
+        return TimeoutMailConnection(app.extensions['mail'])
+
+    @contextmanager
+    def sammelversand(self):
+        """Alle E-Mails innerhalb des Blocks über eine gemeinsame SMTP-Verbindung senden"""
+        if getattr(self._lokal, 'sammeln', False):
+            yield
+            return
+        self._lokal.sammeln = True
+        self._lokal.verbindung = None
+        try:
+            yield
+        finally:
+            verbindung = self._lokal.verbindung
+            self._lokal.sammeln = False
+            self._lokal.verbindung = None
+            if verbindung is not None:
+                try:
+                    verbindung.__exit__(None, None, None)
+                except OSError:
+                    pass
+
+    def _sammelverbindung(self):
+        # Verbindung wird erst beim ersten Versand im Block geöffnet
+        if self._lokal.verbindung is None:
+            self._lokal.verbindung = self.connect().__enter__()
+        return self._lokal.verbindung
+
+    def send(self, message, vormerken=True):
+        beginn = time.perf_counter()
+        try:
+            self._senden(message, vormerken)
+        finally:
+            if has_request_context() and 'smtp_ms' in g:
+                g.smtp_ms += (time.perf_counter() - beginn) * 1000
+
+    def _senden(self, message, vormerken):
+        if not app.extensions['mail'].suppress and not app.config['MAIL_SERVER']:
+            raise RuntimeError('MAIL_SERVER ist nicht konfiguriert')
+
+        if not smtp_breaker.erlaubt():
+            if vormerken:
+                postausgang_vormerken(message, 'SMTP Circuit Breaker offen')
+            raise SMTPNichtVerfuegbar('Mailserver nicht erreichbar, E-Mail wurde für später vorgemerkt')
+
+        try:
+            if getattr(self._lokal, 'sammeln', False):
+                try:
+                    message.send(self._sammelverbindung())
+                except smtplib.SMTPRecipientsRefused:
+                    raise
+                except OSError:
+                    # Defekte Verbindung verwerfen, nächste E-Mail baut neu auf
+                    self._lokal.verbindung = None
+                    raise
+            else:
+                super().send(message)
+        except smtplib.SMTPRecipientsRefused:
+            # Fehler beim Empfänger, nicht beim Server
+            smtp_breaker.erfolg()
+            raise
+        except OSError as e:  # umfasst socket.timeout und alle SMTP-Fehler
+            smtp_breaker.fehler(e)
+            if vormerken:
+                postausgang_vormerken(message, str(e))
+            raise
+        smtp_breaker.erfolg()
+
+mail = GeschuetzteMail(app)
 serializer = URLSafeTimedSerializer(app.config['SECRET_KEY'])
 
-# Rate Limiting Konfiguration
+# Rate Limiting Konfiguration (abschaltbar für Lasttests)
+app.config['RATELIMIT_ENABLED'] = os.getenv('RATELIMIT_ENABLED', 'True').lower() == 'true'
 limiter = Limiter(
     app=app,
     key_func=get_remote_address,
@@ -51,6 +562,68 @@ limiter = Limiter(
     storage_uri="memory://"
 )
 
+# JSON-Serialisierung: orjson wenn installiert, sonst Standardbibliothek
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON-Provider, der orjson nutzt und sonst auf den Flask-Standard zurückfällt"""
+
+    # Argumente, die jsonify/response() übergeben; orjson gibt ohnehin kompakt und als UTF-8 aus
+    ORJSON_ARGUMENTE = {'indent', 'separators', 'sort_keys', 'default', 'ensure_ascii'}
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or not kwargs.keys() <= self.ORJSON_ARGUMENTE:
+            return super().dumps(obj, **kwargs)
+        # Datumswerte gehen durch den Flask-Default, damit die Ausgabe identisch bleibt
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+app.json_provider_class = FastJSONProvider
+app.json = FastJSONProvider(app)
+
+# Kompression von JSON-Antworten ab einer Mindestgröße (Bytes)
+JSON_COMPRESS_MIN_SIZE = int(os.getenv('JSON_COMPRESS_MIN_SIZE', 1024))
+
+@app.after_request
+def compress_json_response(response):
+    """Komprimiert größere JSON-Antworten mit Brotli oder gzip"""
+    if (response.mimetype != 'application/json'
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.status_code < 200 or response.status_code >= 300):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    daten, kodierung = json_komprimieren(response.get_data(), json_kodierung())
+    if kodierung is not None:
+        response.set_data(daten)
+        response.headers['Content-Encoding'] = kodierung
+    return response
+
+def json_kodierung():
+    """Bevorzugte Content-Encoding des Clients ('br', 'gzip' oder None)"""
+    akzeptiert = request.accept_encodings
+    if akzeptiert['br'] and brotli is not None:
+        return 'br'
+    if akzeptiert['gzip']:
+        return 'gzip'
+    return None
+
+def json_komprimieren(daten, kodierung):
+    """Gibt (daten, kodierung) zurück; kleine Antworten bleiben unkomprimiert (kodierung None)"""
+    if kodierung is None or len(daten) < JSON_COMPRESS_MIN_SIZE:
+        return daten, None
+    if kodierung == 'br':
+        return brotli.compress(daten, quality=5), 'br'
+    return gzip.compress(daten, compresslevel=6), 'gzip'
+
 # Hilfsfunktion zum Generieren von Tokens
 def generate_token(buchung_id):
     return serializer.dumps(buchung_id, salt='buchung-confirm')
@@ -62,6 +635,36 @@ def verify_token(token, expiration=86400):  # 24 Stunden gültig
     except:
         return None
 
+# Read/Write-Split
+def replica_aktiv():
+    """True, wenn der aktuelle Request von der Lese-Replik lesen darf"""
+    return has_request_context() and g.get('db_replica', False)
+
+def replica_lesen(f):
+    """
+    Decorator für rein lesende Routen.
+    Leitet Abfragen an die Replik, außer der Benutzer hat gerade selbst geschrieben
+    (dann bleibt er für REPLICA_STICKY_SECONDS an der Primär-DB, um die eigene Änderung zu sehen).
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if DATABASE_REPLICA_URI and session.get('primary_bis', 0) < time.time():
+            g.db_replica = True
+        return f(*args, **kwargs)
+    return decorated_function
+
+@db.event.listens_for(RoutingSession, 'after_flush')
+def _schreibzugriff_merken(db_session, flush_context):
+    if has_request_context():
+        g.db_geschrieben = True
+
+@app.after_request
+def _primary_sticky_setzen(response):
+    """Merkt sich nach einem Schreibzugriff, dass der Benutzer kurz an der Primär-DB bleibt"""
+    if DATABASE_REPLICA_URI and g.get('db_geschrieben'):
+        session['primary_bis'] = time.time() + REPLICA_STICKY_SECONDS
+    return response
+
 # Admin-Authentifizierung Decorator
 def admin_required(f):
     """
@@ -213,7 +816,7 @@ def send_booking_request_email(buchung):
         mail.send(msg)
         return True
     except Exception as e:
-        print(f"Fehler beim E-Mail-Versand: {str(e)}")
+        logger.error(f"Fehler beim E-Mail-Versand: {str(e)}")
         return False
 
 # E-Mail an Benutzer - Buchungsanfrage bestätigen
@@ -309,7 +912,7 @@ def send_user_request_confirmation(buchung):
         mail.send(msg)
         return True
     except Exception as e:
-        print(f"Fehler beim E-Mail-Versand an Benutzer: {str(e)}")
+        logger.error(f"Fehler beim E-Mail-Versand an Benutzer: {str(e)}")
         return False
 
 # E-Mail an Benutzer - Buchung bestätigt
@@ -435,7 +1038,7 @@ def send_user_confirmation(buchung):
         mail.send(msg)
         return True
     except Exception as e:
-        print(f"Fehler beim E-Mail-Versand an Benutzer: {str(e)}")
+        logger.error(f"Fehler beim E-Mail-Versand an Benutzer: {str(e)}")
         return False
 
 # E-Mail an Benutzer - Buchung abgelehnt
@@ -554,7 +1157,96 @@ def send_user_rejection(buchung, rejection_message=None):
         mail.send(msg)
         return True
     except Exception as e:
-        print(f"Fehler beim E-Mail-Versand an Benutzer: {str(e)}")
+        logger.error(f"Fehler beim E-Mail-Versand an Benutzer: {str(e)}")
+        return False
+
+# E-Mail an Benutzer - Anfrage abgelaufen
+def send_user_expiry_notice(buchung):
+    try:
+        start_datum = buchung.start_datum.strftime('%d.%m.%Y um %H:%M')
+        end_datum = buchung.end_datum.strftime('%H:%M')
+
+        html_body = f'''
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <style>
+                body {{
+                    font-family: Arial, sans-serif;
+                    line-height: 1.6;
+                    color: #333;
+                }}
+                .container {{
+                    max-width: 600px;
+                    margin: 0 auto;
+                    padding: 0;
+                }}
+                .content {{
+                    background: #f9f9f9;
+                    padding: 30px;
+                    border: 1px solid #ddd;
+                }}
+                .info-box {{
+                    background: white;
+                    padding: 20px;
+                    margin: 20px 0;
+                    border-left: 4px solid #9e9e9e;
+                    border-radius: 5px;
+                }}
+                .info-box p {{
+                    margin: 10px 0;
+                }}
+                .footer {{
+                    text-align: center;
+                    margin-top: 20px;
+                    color: #777;
+                    font-size: 12px;
+                }}
+                .status {{
+                    background: #9e9e9e;
+                    color: white;
+                    padding: 10px 20px;
+                    border-radius: 5px;
+                    display: inline-block;
+                    margin: 20px 0;
+                    font-weight: bold;
+                }}
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="content">
+                    <p>Hallo {buchung.benutzer_name},</p>
+                    <p>Ihre Buchungsanfrage konnte nicht rechtzeitig bearbeitet werden und ist daher abgelaufen.</p>
+
+                    <div class="status">Status: Abgelaufen</div>
+
+                    <div class="info-box">
+                        <h3>Buchungsdetails:</h3>
+                        <p><strong>Datum:</strong> {start_datum} - {end_datum} Uhr</p>
+                        {f'<p><strong>Zweck:</strong> {buchung.zweck}</p>' if buchung.zweck else ''}
+                    </div>
+
+                    <p>Wenn Sie den Saal weiterhin nutzen möchten, stellen Sie bitte eine neue Anfrage.</p>
+                </div>
+                <div class="footer">
+                    <p>Dies ist eine automatisch generierte E-Mail. Bitte antworten Sie nicht auf diese Nachricht.</p>
+                </div>
+            </div>
+        </body>
+        </html>
+        '''
+
+        msg = Message(
+            subject='Buchungsanfrage abgelaufen - Saal Raiffeisenstraße 12',
+            recipients=[buchung.benutzer_email],
+            html=html_body
+        )
+
+        mail.send(msg)
+        return True
+    except Exception as e:
+        logger.error(f"Fehler beim E-Mail-Versand an Benutzer: {str(e)}")
         return False
 
 # E-Mail an Admin - Stornierungsanfrage
@@ -644,7 +1336,119 @@ def send_cancellation_notification(buchung):
         mail.send(msg)
         return True
     except Exception as e:
-        print(f"Fehler beim E-Mail-Versand: {str(e)}")
+        logger.error(f"Fehler beim E-Mail-Versand: {str(e)}")
+        return False
+
+# E-Mail an Admin - Sammelbenachrichtigung (Digest) über neue Buchungsanfragen
+def send_booking_digest_email(buchungen):
+    try:
+        eintraege = []
+        for buchung in buchungen:
+            token = generate_token(buchung.id)
+            confirm_url = url_for('confirm_buchung_email', token=token, _external=True)
+            reject_url = url_for('reject_buchung_email', token=token, _external=True)
+            start_datum = buchung.start_datum.strftime('%d.%m.%Y um %H:%M')
+            end_datum = buchung.end_datum.strftime('%H:%M')
+
+            eintraege.append(f'''
+                    <div class="info-box">
+                        <p><strong>Name:</strong> {buchung.benutzer_name}</p>
+                        <p><strong>E-Mail:</strong> {buchung.benutzer_email}</p>
+                        <p><strong>Datum:</strong> {start_datum} - {end_datum} Uhr</p>
+                        {f'<p><strong>Zweck:</strong> {buchung.zweck}</p>' if buchung.zweck else ''}
+                        <p>
+                            <a href="{confirm_url}" class="button button-accept">Annehmen</a>
+                            <a href="{reject_url}" class="button button-reject">Ablehnen</a>
+                        </p>
+                    </div>
+            ''')
+
+        html_body = f'''
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <style>
+                body {{
+                    font-family: Arial, sans-serif;
+                    line-height: 1.6;
+                    color: #333;
+                }}
+                .container {{
+                    max-width: 600px;
+                    margin: 0 auto;
+                    padding: 0;
+                }}
+                .content {{
+                    background: #f9f9f9;
+                    padding: 30px;
+                    border: 1px solid #ddd;
+                }}
+                .info-box {{
+                    background: white;
+                    padding: 20px;
+                    margin: 20px 0;
+                    border-left: 4px solid #667eea;
+                    border-radius: 5px;
+                }}
+                .info-box p {{
+                    margin: 10px 0;
+                }}
+                .button {{
+                    display: inline-block;
+                    padding: 10px 20px;
+                    margin: 5px 10px 0 0;
+                    text-decoration: none;
+                    border-radius: 5px;
+                    font-weight: bold;
+                }}
+                .button-accept {{
+                    background-color: #66bb6a;
+                    color: white;
+                }}
+                .button-reject {{
+                    background-color: #ef5350;
+                    color: white;
+                }}
+                .footer {{
+                    text-align: center;
+                    margin-top: 20px;
+                    color: #777;
+                    font-size: 12px;
+                }}
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="content">
+                    <p>Guten Tag,</p>
+                    <p>Es sind <strong>{len(buchungen)} neue Buchungsanfragen</strong> für den <strong>Saal Raiffeisenstraße 12</strong> eingegangen.</p>
+
+                    {''.join(eintraege)}
+
+                    <p style="font-size: 12px; color: #777; margin-top: 30px;">
+                        Hinweis: Die Links sind 24 Stunden gültig.
+                    </p>
+                </div>
+                <div class="footer">
+                    <p>Raumbuchungssystem - Saal Raiffeisenstraße 12</p>
+                </div>
+            </div>
+        </body>
+        </html>
+        '''
+
+        msg = Message(
+            subject=f'{len(buchungen)} neue Buchungsanfragen - Saal Raiffeisenstraße 12',
+            recipients=get_notification_emails(),
+            html=html_body
+        )
+
+        # Nicht im Postausgang vormerken: sende_admin_digest gibt die Anfragen bei einem Fehler wieder frei
+        # und versendet sie im nächsten Digest, sonst kämen sie doppelt an
+        mail.send(msg, vormerken=False)
+        return True
+    except Exception as e:
+        logger.error(f"Fehler beim E-Mail-Versand (Digest): {str(e)}")
         return False
 
 # Datenbank-Modelle
@@ -655,17 +1459,141 @@ class Raum(db.Model):
     buchungen = db.relationship('Buchung', backref='raum', lazy=True)
 
 class Buchung(db.Model):
+    # Statuszählungen und Ablauf-Job; Zeitraumabfragen laufen über end_datum (end_datum > Fensterbeginn)
+    __table_args__ = (db.Index('ix_buchung_aktiv_status', 'is_active', 'status'),)
     id = db.Column(db.Integer, primary_key=True)
     raum_id = db.Column(db.Integer, db.ForeignKey('raum.id'), nullable=False)
     start_datum = db.Column(db.DateTime, nullable=False)
-    end_datum = db.Column(db.DateTime, nullable=False)
+    end_datum = db.Column(db.DateTime, nullable=False, index=True)
     benutzer_name = db.Column(db.String(100), nullable=False)
     benutzer_email = db.Column(db.String(120), nullable=False)
     zweck = db.Column(db.String(500))
-    status = db.Column(db.String(20), default='ausstehend')  # ausstehend, bestätigt, abgelehnt
+    status = db.Column(db.String(20), default='ausstehend')  # ausstehend, bestätigt, abgelehnt, abgelaufen
     is_active = db.Column(db.Boolean, default=True)  # False = gelöscht/storniert
     geloescht_am = db.Column(db.DateTime)  # Zeitpunkt der Löschung/Stornierung
     erstellt_am = db.Column(db.DateTime, default=datetime.utcnow)
+    admin_benachrichtigt_am = db.Column(db.DateTime)  # Zeitpunkt der Admin-Benachrichtigung (sofort oder per Digest)
+    abgelaufen_am = db.Column(db.DateTime)  # Zeitpunkt, zu dem die unbearbeitete Anfrage abgelaufen ist
+    geaendert_am = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    aenderung_seq = db.Column(db.Integer, index=True)  # Stand des Änderungszählers bei der letzten Änderung (Delta-Sync)
+    # Optimistische Sperre: jedes ORM-UPDATE prüft die gelesene Version (StaleDataError, wenn jemand schneller war)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    __mapper_args__ = {'version_id_col': version}
+
+class BuchungEvent(db.Model):
+    """Append-only Verlauf aller Statusänderungen, wird in derselben Transaktion wie die Änderung geschrieben"""
+    __tablename__ = 'buchung_event'
+    __table_args__ = (db.Index('ix_buchung_event_zeitpunkt_id', 'zeitpunkt', 'id'),)
+    id = db.Column(db.Integer, primary_key=True)
+    buchung_id = db.Column(db.Integer, db.ForeignKey('buchung.id'), nullable=False, index=True)
+    zeitpunkt = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    typ = db.Column(db.String(20), nullable=False)  # erstellt, bestaetigt, abgelehnt, geloescht, storniert, abgelaufen
+    quelle = db.Column(db.String(20), nullable=False)  # benutzer, admin, email, system
+    details = db.Column(db.String(500))
+    buchung = db.relationship('Buchung')
+
+class BuchungEventMonat(db.Model):
+    """Monatliche Verdichtung alter Events (Anzahl pro Monat und Typ)"""
+    __tablename__ = 'buchung_event_monat'
+    __table_args__ = (db.UniqueConstraint('monat', 'typ'),)
+    id = db.Column(db.Integer, primary_key=True)
+    monat = db.Column(db.String(7), nullable=False)  # JJJJ-MM
+    typ = db.Column(db.String(20), nullable=False)
+    anzahl = db.Column(db.Integer, nullable=False, default=0)
+
+def protokolliere(buchung, typ, quelle, details=None):
+    """Hängt ein Event an die laufende Transaktion an (wird mit der Statusänderung committet)"""
+    db.session.add(BuchungEvent(buchung=buchung, typ=typ, quelle=quelle, details=details))
+
+def status_uebergang(buchung, neuer_status, typ, quelle, details=None):
+    """
+    Bearbeitet eine ausstehende Anfrage ohne Zeilensperre: das UPDATE greift nur, wenn Version und Status noch dem
+    gelesenen Stand entsprechen. Gibt False zurück (und rollt zurück), wenn Admin-Panel, E-Mail-Link oder
+    Ablauf-Job schneller waren.
+    """
+    seq = naechste_aenderung_seq()
+    if not bedingt_aendern(buchung, neuer_status, seq):
+        db.session.rollback()
+        return False
+    protokolliere(buchung, typ, quelle, details)
+    db.session.commit()
+    antwort_cache_invalidieren([buchung], seq)
+    return True
+
+def bedingt_aendern(buchung, neuer_status, seq):
+    """Das bedingte UPDATE von status_uebergang ohne Commit (für Sammelaktionen in einer Transaktion)"""
+    ergebnis = db.session.execute(
+        db.update(Buchung).where(
+            Buchung.id == buchung.id,
+            Buchung.version == buchung.version,
+            Buchung.status == 'ausstehend',
+            Buchung.is_active == True
+        ).values(
+            status=neuer_status,
+            version=Buchung.version + 1,
+            geaendert_am=datetime.utcnow(),
+            aenderung_seq=seq
+        ).execution_options(synchronize_session=False)
+    )
+    return ergebnis.rowcount == 1
+
+class AenderungsZaehler(db.Model):
+    """Globaler, monoton steigender Zähler für Änderungen an Buchungen (eine Zeile mit id=1)"""
+    id = db.Column(db.Integer, primary_key=True)
+    wert = db.Column(db.Integer, nullable=False, default=0)
+
+def naechste_aenderung_seq(db_session=None):
+    """
+    Reserviert eine Änderungsnummer für die laufende Transaktion.
+    Die Zeilensperre auf dem Zähler hält bis zum Commit, daher werden die Nummern in Commit-Reihenfolge sichtbar
+    und ein Client mit ?since=<seq> verpasst keine Änderung.
+    """
+    db_session = db_session or db.session
+    if 'aenderung_seq' not in db_session.info:
+        tabelle = AenderungsZaehler.__table__
+        db_session.execute(tabelle.update().where(tabelle.c.id == 1).values(wert=tabelle.c.wert + 1))
+        db_session.info['aenderung_seq'] = db_session.execute(
+            db.select(tabelle.c.wert).where(tabelle.c.id == 1)).scalar_one()
+    return db_session.info['aenderung_seq']
+
+def aktuelle_aenderung_seq():
+    return db.session.query(AenderungsZaehler.wert).filter_by(id=1).scalar() or 0
+
+@db.event.listens_for(RoutingSession, 'before_flush')
+def _buchung_aenderung_markieren(db_session, flush_context, instances):
+    for obj in list(db_session.new) + list(db_session.dirty):
+        if not isinstance(obj, Buchung):
+            continue
+        if obj in db_session.new or db_session.is_modified(obj, include_collections=False):
+            obj.aenderung_seq = naechste_aenderung_seq(db_session)
+            obj.geaendert_am = datetime.utcnow()
+
+@db.event.listens_for(RoutingSession, 'after_commit')
+@db.event.listens_for(RoutingSession, 'after_rollback')
+def _aenderung_seq_freigeben(db_session):
+    db_session.info.pop('aenderung_seq', None)
+
+class MailAusgang(db.Model):
+    """Postausgang für E-Mails, die wegen eines Mailserver-Problems nicht sofort zugestellt wurden"""
+    id = db.Column(db.Integer, primary_key=True)
+    betreff = db.Column(db.String(500), nullable=False)
+    empfaenger = db.Column(db.String(1000), nullable=False)  # Kommagetrennt
+    html = db.Column(db.Text)
+    erstellt_am = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    versuche = db.Column(db.Integer, default=0, nullable=False)
+    letzter_fehler = db.Column(db.String(500))
+    beansprucht_am = db.Column(db.DateTime)  # Ein Worker versendet gerade (Lease, verfällt nach SMTP_OUTBOX_LEASE_SECONDS)
+    gesendet_am = db.Column(db.DateTime, index=True)  # Erst nach erfolgreichem Versand gesetzt
+    aufgegeben_am = db.Column(db.DateTime)  # Nach SMTP_OUTBOX_MAX_VERSUCHE Fehlversuchen nicht mehr zugestellt
+
+class IdempotenzSchluessel(db.Model):
+    """Gespeicherte Antworten zu Idempotency-Keys, damit wiederholte Anfragen keine Duplikate erzeugen"""
+    id = db.Column(db.Integer, primary_key=True)
+    schluessel = db.Column(db.String(100), unique=True, nullable=False)
+    anfrage_hash = db.Column(db.String(64), nullable=False)  # SHA-256 des Request-Bodys
+    status_code = db.Column(db.Integer)  # None = Anfrage wird noch verarbeitet
+    antwort = db.Column(db.Text)
+    erstellt_am = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
 
 class Settings(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -702,59 +1630,935 @@ def get_notification_emails():
 
     return emails
 
-# Routen
-@app.route('/health')
-def health():
-    """Health Check Endpoint für Docker"""
+# Postausgang: vorgemerkte E-Mails später zustellen
+def postausgang_vormerken(message, fehler):
+    """Speichert eine nicht zustellbare E-Mail (eigene Session, unabhängig von der laufenden Transaktion)"""
     try:
-        # Prüfe Datenbank-Verbindung
-        db.session.execute(db.text('SELECT 1'))
-        return jsonify({
-            'status': 'healthy',
-            'database': 'connected',
-            'timestamp': datetime.utcnow().isoformat()
-        }), 200
+        with db.engine.begin() as conn:
+            conn.execute(db.insert(MailAusgang).values(
+                betreff=message.subject,
+                empfaenger=','.join(message.recipients),
+                html=message.html,
+                erstellt_am=datetime.utcnow(),
+                versuche=1,
+                letzter_fehler=fehler[:500]
+            ))
     except Exception as e:
-        return jsonify({
-            'status': 'unhealthy',
-            'database': 'disconnected',
-            'error': str(e),
-            'timestamp': datetime.utcnow().isoformat()
-        }), 503
+        logger.error(f"Fehler beim Vormerken der E-Mail: {str(e)}")
+
+def postausgang_offen():
+    """Anzahl noch nicht zugestellter (und nicht aufgegebener) E-Mails im Postausgang"""
+    return MailAusgang.query.filter(MailAusgang.gesendet_am.is_(None), MailAusgang.aufgegeben_am.is_(None)).count()
+
+@hintergrund_job('postausgang', SMTP_OUTBOX_RETRY_INTERVAL)
+def postausgang_zustellen(limit=50):
+    """Versucht vorgemerkte E-Mails zuzustellen, solange der Mailserver erreichbar ist"""
+    def frei():
+        # Nicht beansprucht oder Lease abgelaufen (Worker während des Versands abgestürzt)
+        grenze = datetime.utcnow() - timedelta(seconds=SMTP_OUTBOX_LEASE_SECONDS)
+        return db.and_(MailAusgang.gesendet_am.is_(None), MailAusgang.aufgegeben_am.is_(None),
+                       db.or_(MailAusgang.beansprucht_am.is_(None), MailAusgang.beansprucht_am < grenze))
+
+    eintraege = MailAusgang.query.filter(frei()).order_by(MailAusgang.id).limit(limit).all()
+
+    for eintrag in eintraege:
+        # Eintrag beanspruchen, damit andere Worker ihn nicht gleichzeitig versenden
+        beansprucht = MailAusgang.query.filter(MailAusgang.id == eintrag.id, frei()) \
+            .update({MailAusgang.beansprucht_am: datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+        if not beansprucht:
+            continue
+
+        msg = Message(subject=eintrag.betreff, recipients=eintrag.empfaenger.split(','), html=eintrag.html)
+        try:
+            mail.send(msg, vormerken=False)
+        except Exception as e:
+            aenderung = {MailAusgang.beansprucht_am: None}
+            if not isinstance(e, SMTPNichtVerfuegbar):
+                aenderung[MailAusgang.versuche] = MailAusgang.versuche + 1
+                aenderung[MailAusgang.letzter_fehler] = str(e)[:500]
+                # Eine dauerhaft unzustellbare E-Mail darf die folgenden nicht ewig blockieren
+                if eintrag.versuche + 1 >= SMTP_OUTBOX_MAX_VERSUCHE:
+                    aenderung[MailAusgang.aufgegeben_am] = datetime.utcnow()
+                    logger.error(f"E-Mail {eintrag.id} an {eintrag.empfaenger} nach {eintrag.versuche + 1} "
+                                 f"Versuchen aufgegeben: {str(e)}")
+            MailAusgang.query.filter_by(id=eintrag.id).update(aenderung, synchronize_session=False)
+            db.session.commit()
+            if isinstance(e, SMTPNichtVerfuegbar):
+                return  # Circuit Breaker offen: die übrigen Einträge später versuchen
+            continue
 
-@app.route('/')
-def index():
-    raeume = Raum.query.all()
-    return render_template('index.html', raeume=raeume)
+        MailAusgang.query.filter_by(id=eintrag.id) \
+            .update({MailAusgang.gesendet_am: datetime.utcnow(), MailAusgang.beansprucht_am: None},
+                    synchronize_session=False)
+        db.session.commit()
 
-@app.route('/api/buchungen')
-def get_buchungen():
-    jahr = request.args.get('jahr', datetime.now().year, type=int)
-    monat = request.args.get('monat', datetime.now().month, type=int)
-    raum_id = request.args.get('raum_id', type=int)
+# Idempotency-Keys für POST /api/buchung
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_KEY_TTL_HOURS', 24))
+IDEMPOTENCY_CLEANUP_BATCH = 500
+
+def idempotenz_antwort(eintrag, anfrage_hash):
+    """Antwort für einen bereits bekannten Idempotency-Key"""
+    if eintrag.anfrage_hash != anfrage_hash:
+        return jsonify({'error': 'Idempotency-Key wurde bereits für eine andere Anfrage verwendet'}), 422
+    if eintrag.status_code is None:
+        response = jsonify({'error': 'Diese Anfrage wird bereits verarbeitet'})
+        response.headers['Retry-After'] = '2'
+        return response, 409
+
+    response = app.response_class(eintrag.antwort, status=eintrag.status_code, mimetype='application/json')
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def get_idempotenz_eintrag(schluessel):
+    grenze = datetime.utcnow() - timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS)
+    return IdempotenzSchluessel.query.filter(
+        IdempotenzSchluessel.schluessel == schluessel,
+        IdempotenzSchluessel.erstellt_am >= grenze
+    ).first()
 
-    query = Buchung.query.filter_by(is_active=True)
-    if raum_id:
-        query = query.filter_by(raum_id=raum_id)
+@hintergrund_job('idempotenz-aufraeumen', 3600)
+def idempotenz_schluessel_aufraeumen():
+    """Löscht abgelaufene Idempotency-Keys in Batches (kurze Transaktionen, keine langen Sperren)"""
+    grenze = datetime.utcnow() - timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS)
+    geloescht = 0
+    while True:
+        ids = db.session.query(IdempotenzSchluessel.id).filter(
+            IdempotenzSchluessel.erstellt_am < grenze
+        ).order_by(IdempotenzSchluessel.erstellt_am).limit(IDEMPOTENCY_CLEANUP_BATCH).all()
+        if not ids:
+            break
+        IdempotenzSchluessel.query.filter(IdempotenzSchluessel.id.in_([i for (i,) in ids])) \
+            .delete(synchronize_session=False)
+        db.session.commit()
+        geloescht += len(ids)
+        if len(ids) < IDEMPOTENCY_CLEANUP_BATCH:
+            break
+    return geloescht
+
+# Verdichtung des Event-Logs: alte Events werden zu Monatssummen zusammengefasst
+EVENT_LOG_RETENTION_DAYS = int(os.getenv('EVENT_LOG_RETENTION_DAYS', 365))
+EVENT_COMPACTION_BATCH = 1000
+
+@hintergrund_job('event-log-verdichten', 86400)
+def event_log_verdichten():
+    """Fasst Events vor EVENT_LOG_RETENTION_DAYS je Monat und Typ zusammen und löscht sie (Batch für Batch)"""
+    grenze = datetime.utcnow() - timedelta(days=EVENT_LOG_RETENTION_DAYS)
+    verdichtet = 0
+    while True:
+        events = db.session.query(BuchungEvent.id, BuchungEvent.zeitpunkt, BuchungEvent.typ).filter(
+            BuchungEvent.zeitpunkt < grenze
+        ).order_by(BuchungEvent.zeitpunkt, BuchungEvent.id).limit(EVENT_COMPACTION_BATCH).all()
+        if not events:
+            break
+
+        summen = {}
+        for _, zeitpunkt, typ in events:
+            schluessel = (zeitpunkt.strftime('%Y-%m'), typ)
+            summen[schluessel] = summen.get(schluessel, 0) + 1
+
+        # Summen und Löschung in einer Transaktion, damit kein Event doppelt oder gar nicht gezählt wird
+        for (monat, typ), anzahl in summen.items():
+            eintrag = BuchungEventMonat.query.filter_by(monat=monat, typ=typ).first()
+            if eintrag:
+                eintrag.anzahl += anzahl
+            else:
+                db.session.add(BuchungEventMonat(monat=monat, typ=typ, anzahl=anzahl))
+        # Bereichslöschung über den (zeitpunkt, id)-Index statt einer langen ID-Liste
+        letzter = events[-1]
+        geloescht = BuchungEvent.query.filter(
+            BuchungEvent.zeitpunkt < grenze,
+            db.tuple_(BuchungEvent.zeitpunkt, BuchungEvent.id) <= db.tuple_(letzter.zeitpunkt, letzter.id)
+        ).delete(synchronize_session=False)
+        if geloescht != len(events):
+            # Ein anderer Worker hat denselben Batch bereits verdichtet
+            db.session.rollback()
+            break
+        db.session.commit()
+        verdichtet += len(events)
+        if len(events) < EVENT_COMPACTION_BATCH:
+            break
+    return verdichtet
+
+# Admin-Benachrichtigungen: sofort (eine E-Mail pro Anfrage) oder gesammelt als Digest
+BENACHRICHTIGUNG_MODI = ('sofort', 'digest')
+DIGEST_INTERVALL_STANDARD = 60  # Minuten
+APP_BASE_URL = os.getenv('APP_BASE_URL', 'http://localhost:8000')  # Für Links in E-Mails aus Hintergrund-Jobs
+
+def get_benachrichtigung_modus():
+    modus = get_setting('admin_benachrichtigung_modus', 'sofort')
+    return modus if modus in BENACHRICHTIGUNG_MODI else 'sofort'
+
+def get_digest_intervall_minuten():
+    try:
+        return max(1, int(get_setting('admin_digest_intervall_minuten', DIGEST_INTERVALL_STANDARD)))
+    except (TypeError, ValueError):
+        return DIGEST_INTERVALL_STANDARD
+
+def benachrichtige_admin_ueber_anfrage(buchung):
+    """Sendet die Admin-E-Mail sofort oder überlässt sie dem Digest-Job. Gibt zurück, ob gesendet wurde."""
+    if get_benachrichtigung_modus() == 'digest':
+        return False
+
+    email_sent = send_booking_request_email(buchung)
+    if email_sent:
+        buchung.admin_benachrichtigt_am = datetime.utcnow()
+        db.session.commit()
+    return email_sent
+
+@hintergrund_job('admin-digest', 60)
+def sende_admin_digest():
+    """Sammelt unbenachrichtigte, ausstehende Anfragen und sendet sie als eine E-Mail"""
+    if get_benachrichtigung_modus() != 'digest':
+        return
+
+    letzter_versand = get_setting('admin_digest_letzter_versand')
+    if letzter_versand:
+        faellig_ab = datetime.fromisoformat(letzter_versand) + timedelta(minutes=get_digest_intervall_minuten())
+        if datetime.utcnow() < faellig_ab:
+            return
+
+    # Anfragen atomar beanspruchen, damit bei mehreren Workern keine doppelt versendet wird
+    markierung = datetime.utcnow()
+    beansprucht = Buchung.query.filter(
+        Buchung.status == 'ausstehend',
+        Buchung.is_active == True,
+        Buchung.admin_benachrichtigt_am.is_(None)
+    ).update({Buchung.admin_benachrichtigt_am: markierung, Buchung.geaendert_am: markierung},
+             synchronize_session=False)
+    db.session.commit()
+    if not beansprucht:
+        return
+
+    buchungen = Buchung.query.filter_by(admin_benachrichtigt_am=markierung).order_by(Buchung.start_datum).all()
+    with app.test_request_context(base_url=APP_BASE_URL):
+        gesendet = send_booking_digest_email(buchungen)
+
+    if gesendet:
+        set_setting('admin_digest_letzter_versand', markierung.isoformat())
+    else:
+        # Beim nächsten Lauf erneut versuchen
+        Buchung.query.filter_by(admin_benachrichtigt_am=markierung).update(
+            {Buchung.admin_benachrichtigt_am: None, Buchung.geaendert_am: datetime.utcnow()},
+            synchronize_session=False)
+        db.session.commit()
 
-    buchungen = query.all()
+# Ablauf unbearbeiteter Anfragen (die Links in den Admin-E-Mails gelten nur 24 Stunden)
+PENDING_EXPIRY_HOURS = int(os.getenv('PENDING_EXPIRY_HOURS', 72))
+PENDING_EXPIRY_NOTIFY = os.getenv('PENDING_EXPIRY_NOTIFY', 'False').lower() == 'true'
+PENDING_EXPIRY_INTERVAL = int(os.getenv('PENDING_EXPIRY_INTERVAL', 900))  # Sekunden
+PENDING_EXPIRY_BATCH = 200
 
-    return jsonify([{
+def get_ablauf_metriken():
+    """Kennzahlen des letzten Ablauf-Laufs (für alle Worker gemeinsam in den Einstellungen gespeichert)"""
+    try:
+        return json.loads(get_setting('ablauf_metriken', '{}'))
+    except ValueError:
+        return {}
+
+@hintergrund_job('anfragen-ablauf', PENDING_EXPIRY_INTERVAL)
+def anfragen_ablaufen_lassen():
+    """Setzt ausstehende Anfragen nach PENDING_EXPIRY_HOURS (oder nach Beginn des Termins) auf 'abgelaufen'"""
+    beginn = time.monotonic()
+    # erstellt_am ist UTC, start_datum dagegen lokale Zeit wie im Kalender
+    jetzt = datetime.utcnow()
+    grenze = jetzt - timedelta(hours=PENDING_EXPIRY_HOURS)
+    jetzt_lokal = datetime.now()
+    abgelaufen = []
+
+    while True:
+        ids = [i for (i,) in db.session.query(Buchung.id).filter(
+            Buchung.status == 'ausstehend',
+            Buchung.is_active == True,
+            db.or_(Buchung.erstellt_am < grenze, Buchung.start_datum < jetzt_lokal)
+        ).order_by(Buchung.id).limit(PENDING_EXPIRY_BATCH).all()]
+        if not ids:
+            break
+
+        # Statusbedingung erneut prüfen, falls die Anfrage inzwischen bearbeitet wurde
+        markierung = datetime.utcnow()
+        seq = naechste_aenderung_seq()
+        Buchung.query.filter(
+            Buchung.id.in_(ids),
+            Buchung.status == 'ausstehend'
+        ).update({
+            Buchung.status: 'abgelaufen',
+            Buchung.abgelaufen_am: markierung,
+            Buchung.geaendert_am: markierung,
+            Buchung.aenderung_seq: seq,
+            Buchung.version: Buchung.version + 1
+        }, synchronize_session=False)
+        db.session.execute(db.insert(BuchungEvent).from_select(
+            ['buchung_id', 'zeitpunkt', 'typ', 'quelle'],
+            db.select(Buchung.id, db.literal(markierung), db.literal('abgelaufen'), db.literal('system'))
+            .where(Buchung.id.in_(ids), Buchung.abgelaufen_am == markierung)
+        ))
+        db.session.commit()
+        neu_abgelaufen = Buchung.query.filter(
+            Buchung.id.in_(ids),
+            Buchung.abgelaufen_am == markierung
+        ).all()
+        antwort_cache_invalidieren(neu_abgelaufen, seq)
+        abgelaufen.extend(neu_abgelaufen)
+        if len(ids) < PENDING_EXPIRY_BATCH:
+            break
+
+    benachrichtigt = 0
+    if abgelaufen and PENDING_EXPIRY_NOTIFY:
+        with app.test_request_context(base_url=APP_BASE_URL), mail.sammelversand():
+            for b in abgelaufen:
+                # Vergangene Termine brauchen keine Benachrichtigung mehr
+                if b.start_datum > jetzt_lokal and send_user_expiry_notice(b):
+                    benachrichtigt += 1
+
+    metriken = get_ablauf_metriken()
+    metriken.update({
+        'letzter_lauf': jetzt.isoformat(),
+        'dauer_ms': round((time.monotonic() - beginn) * 1000, 1),
+        'abgelaufen': len(abgelaufen),
+        'benachrichtigt': benachrichtigt,
+        'abgelaufen_gesamt': metriken.get('abgelaufen_gesamt', 0) + len(abgelaufen)
+    })
+    set_setting('ablauf_metriken', json.dumps(metriken))
+    if abgelaufen:
+        logger.info(f"{len(abgelaufen)} unbearbeitete Anfrage(n) abgelaufen ({metriken['dauer_ms']} ms)")
+    return len(abgelaufen)
+
+# Raum-Cache (Räume ändern sich praktisch nie, werden aber bei jedem Seitenaufruf gebraucht)
+RAUM_CACHE_TTL = int(os.getenv('RAUM_CACHE_TTL', 300))  # Sekunden, begrenzt Veraltung zwischen Workern
+_raum_cache = {'raeume': None, 'geladen_am': 0.0, 'index_shell': None}
+_raum_cache_lock = threading.Lock()
+
+def invalidate_raum_cache():
+    """Verwirft gecachte Räume und die gecachte Startseite"""
+    with _raum_cache_lock:
+        _raum_cache['raeume'] = None
+        _raum_cache['index_shell'] = None
+
+def get_raeume_cached():
+    """Gibt alle Räume als Liste von Dicts zurück (aus dem Cache, falls vorhanden)"""
+    with _raum_cache_lock:
+        raeume = _raum_cache['raeume']
+        if raeume is not None and time.monotonic() - _raum_cache['geladen_am'] < RAUM_CACHE_TTL:
+            return raeume
+
+    raeume = [{
+        'id': r.id,
+        'name': r.name,
+        'beschreibung': r.beschreibung
+    } for r in Raum.query.order_by(Raum.id).all()]
+
+    with _raum_cache_lock:
+        if _raum_cache['raeume'] != raeume:
+            _raum_cache['index_shell'] = None
+        _raum_cache['raeume'] = raeume
+        _raum_cache['geladen_am'] = time.monotonic()
+    return raeume
+
+def get_raum_namen():
+    """Mapping raum_id -> Name aus dem Raum-Cache"""
+    return {r['id']: r['name'] for r in get_raeume_cached()}
+
+@db.event.listens_for(Raum, 'after_insert')
+@db.event.listens_for(Raum, 'after_update')
+@db.event.listens_for(Raum, 'after_delete')
+def _raum_geaendert(mapper, connection, target):
+    invalidate_raum_cache()
+    if RESPONSE_CACHE_ENABLED:
+        antwort_cache.leeren()  # Raumnamen stecken in jeder gecachten Antwort
+
+def monatsbereich(jahr, monat):
+    """Gibt Beginn und Ende (exklusiv) eines Monats zurück"""
+    beginn = datetime(jahr, monat, 1)
+    ende = datetime(jahr + 1, 1, 1) if monat == 12 else datetime(jahr, monat + 1, 1)
+    return beginn, ende
+
+def buchung_to_dict(b, raum_namen):
+    return {
         'id': b.id,
         'raum_id': b.raum_id,
-        'raum_name': b.raum.name,
+        'raum_name': raum_namen.get(b.raum_id),
         'start_datum': b.start_datum.isoformat(),
         'end_datum': b.end_datum.isoformat(),
         'benutzer_name': b.benutzer_name,
         'benutzer_email': b.benutzer_email,
         'zweck': b.zweck,
         'status': b.status
-    } for b in buchungen])
+    }
+
+def buchungen_to_columns(buchungen, raum_namen, seq=None):
+    """Kompaktes Spaltenformat: ein Array pro Feld statt eines Objekts pro Buchung"""
+    raum_ids = sorted({b.raum_id for b in buchungen})
+    return {
+        'format': 'columns',
+        'seq': seq,
+        'raum_namen': {raum_id: raum_namen.get(raum_id) for raum_id in raum_ids},
+        'id': [b.id for b in buchungen],
+        'raum_id': [b.raum_id for b in buchungen],
+        'start_datum': [b.start_datum.isoformat() for b in buchungen],
+        'end_datum': [b.end_datum.isoformat() for b in buchungen],
+        'benutzer_name': [b.benutzer_name for b in buchungen],
+        'benutzer_email': [b.benutzer_email for b in buchungen],
+        'zweck': [b.zweck for b in buchungen],
+        'status': [b.status for b in buchungen]
+    }
+
+DELTA_MAX_ZEILEN = 1000
+
+def ist_sichtbar(b):
+    """Entspricht dem Filter von query_buchungen_monat"""
+    return b.is_active and b.status != 'abgelaufen'
+
+def query_buchungen_delta(since, raum_id=None):
+    """Seit der Änderungsnummer `since` geänderte Buchungen (einschließlich gelöschter/abgelaufener)"""
+    query = Buchung.query.filter(Buchung.aenderung_seq > since)
+    if raum_id:
+        query = query.filter(Buchung.raum_id == raum_id)
+    return query.order_by(Buchung.aenderung_seq).limit(DELTA_MAX_ZEILEN + 1).all()
+
+def query_buchungen_monat(jahr, monat, raum_id=None):
+    """Aktive (nicht abgelaufene) Buchungen, die den angegebenen Monat berühren"""
+    beginn, ende = monatsbereich(jahr, monat)
+    query = Buchung.query.filter(
+        Buchung.is_active == True,
+        Buchung.status != 'abgelaufen',
+        Buchung.start_datum < ende,
+        Buchung.end_datum > beginn
+    )
+    if raum_id:
+        query = query.filter(Buchung.raum_id == raum_id)
+    return query.order_by(Buchung.start_datum).all()
+
+# Antwort-Cache für Monatsansichten, über alle Worker-Prozesse eines Hosts geteilt
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'True').lower() == 'true'
+RESPONSE_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH', os.path.join(app.instance_path, 'antwort_cache.db'))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 500))
+RESPONSE_CACHE_MAX_MB = int(os.getenv('RESPONSE_CACHE_MAX_MB', 64))
+
+class AntwortCache:
+    """
+    LRU-Cache für fertige JSON-Antworten in einer SQLite-Datei.
+    Einträge gehören zu (Raum, Monat); raum_key 0 steht für die Ansicht über alle Räume.
+    Gespeichert wird der bereits komprimierte Body, je Content-Encoding ein eigener Eintrag.
+    Die Tabelle invalidierung merkt sich pro (Raum, Monat) die Änderungsnummer der letzten Invalidierung,
+    damit ein Request, der vor einer Änderung gelesen hat, danach keinen veralteten Eintrag mehr speichert.
+    """
+    LRU_AUFLOESUNG = 10  # Sekunden; Zugriffszeit nur so oft schreiben, damit Treffer selten Schreibsperren brauchen
+
+    def __init__(self, pfad, max_eintraege, max_bytes):
+        self.pfad = pfad
+        self.max_eintraege = max_eintraege
+        self.max_bytes = max_bytes
+        self._lokal = threading.local()
+
+    def _verbindung(self):
+        # Eine Verbindung pro Thread und Prozess (nach einem Fork nicht weiterverwenden)
+        if getattr(self._lokal, 'pid', None) != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.pfad)), exist_ok=True)
+            conn = sqlite3.connect(self.pfad, timeout=2, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')  # Ein Cache darf bei einem Absturz Einträge verlieren
+            spalten = {zeile[1] for zeile in conn.execute('PRAGMA table_info(eintrag)')}
+            if spalten and 'kodierung' not in spalten:
+                conn.execute('DROP TABLE eintrag')  # Cache-Datei einer älteren Version
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS eintrag (
+                    schluessel TEXT PRIMARY KEY, raum_key INTEGER NOT NULL, monat TEXT NOT NULL,
+                    seq INTEGER NOT NULL, inhalt BLOB NOT NULL, kodierung TEXT, groesse INTEGER NOT NULL,
+                    zuletzt_genutzt REAL NOT NULL);
+                CREATE INDEX IF NOT EXISTS ix_eintrag_monat ON eintrag (monat, raum_key);
+                CREATE INDEX IF NOT EXISTS ix_eintrag_lru ON eintrag (zuletzt_genutzt);
+                CREATE TABLE IF NOT EXISTS invalidierung (
+                    raum_key INTEGER NOT NULL, monat TEXT NOT NULL, seq INTEGER NOT NULL,
+                    PRIMARY KEY (raum_key, monat));
+            ''')
+            self._lokal.conn = conn
+            self._lokal.pid = os.getpid()
+        return self._lokal.conn
+
+    def holen(self, schluessel):
+        """Gibt (seq, inhalt, kodierung) zurück oder None"""
+        try:
+            conn = self._verbindung()
+            zeile = conn.execute('SELECT seq, inhalt, kodierung, zuletzt_genutzt FROM eintrag WHERE schluessel = ?',
+                                 (schluessel,)).fetchone()
+            if zeile is None:
+                return None
+            jetzt = time.time()
+            if jetzt - zeile[3] > self.LRU_AUFLOESUNG:
+                conn.execute('UPDATE eintrag SET zuletzt_genutzt = ? WHERE schluessel = ?', (jetzt, schluessel))
+            return zeile[0], zeile[1], zeile[2]
+        except sqlite3.Error as e:
+            logger.warning(f"Antwort-Cache nicht lesbar: {str(e)}")
+            return None
+
+    def speichern(self, schluessel, raum_key, monat, seq, inhalt, kodierung=None):
+        """Speichert eine Antwort, die auf Datenstand `seq` beruht (außer der Monat wurde seitdem geändert)"""
+        try:
+            conn = self._verbindung()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                veraltet = conn.execute(
+                    'SELECT 1 FROM invalidierung WHERE raum_key = ? AND monat = ? AND seq > ?',
+                    (raum_key, monat, seq)).fetchone()
+                if not veraltet:
+                    conn.execute('INSERT OR REPLACE INTO eintrag VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                 (schluessel, raum_key, monat, seq, inhalt, kodierung, len(inhalt), time.time()))
+                    self._verdraengen(conn)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            logger.warning(f"Antwort-Cache nicht beschreibbar: {str(e)}")
+
+    def _verdraengen(self, conn):
+        # Am längsten nicht genutzte Einträge entfernen, bis beide Grenzen eingehalten sind
+        anzahl, groesse = conn.execute('SELECT COUNT(*), COALESCE(SUM(groesse), 0) FROM eintrag').fetchone()
+        if anzahl <= self.max_eintraege and groesse <= self.max_bytes:
+            return
+        entfernt = 0
+        for schluessel, eintrag_groesse in conn.execute(
+                'SELECT schluessel, groesse FROM eintrag ORDER BY zuletzt_genutzt').fetchall():
+            if anzahl - entfernt <= self.max_eintraege and groesse <= self.max_bytes:
+                break
+            conn.execute('DELETE FROM eintrag WHERE schluessel = ?', (schluessel,))
+            entfernt += 1
+            groesse -= eintrag_groesse
+
+    def invalidieren(self, bereiche, seq):
+        """Verwirft die Einträge der betroffenen (raum_id, monat)-Paare und der Ansicht über alle Räume"""
+        if not bereiche:
+            return
+        paare = {(raum_key, monat) for raum_id, monat in bereiche for raum_key in (raum_id, 0)}
+        try:
+            conn = self._verbindung()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for raum_key, monat in paare:
+                    conn.execute('DELETE FROM eintrag WHERE monat = ? AND raum_key = ?', (monat, raum_key))
+                    conn.execute(
+                        'INSERT INTO invalidierung VALUES (?, ?, ?) '
+                        'ON CONFLICT (raum_key, monat) DO UPDATE SET seq = MAX(seq, excluded.seq)',
+                        (raum_key, monat, seq))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            logger.warning(f"Antwort-Cache konnte nicht invalidiert werden: {str(e)}")
+
+    def leeren(self, alles=False):
+        """alles=True vergisst auch die Invalidierungen (nach dem Austausch der Datenbank, Zähler beginnt neu)"""
+        try:
+            conn = self._verbindung()
+            conn.execute('DELETE FROM eintrag')
+            if alles:
+                conn.execute('DELETE FROM invalidierung')
+        except sqlite3.Error as e:
+            logger.warning(f"Antwort-Cache konnte nicht geleert werden: {str(e)}")
+
+    def statistik(self):
+        try:
+            anzahl, groesse = self._verbindung().execute(
+                'SELECT COUNT(*), COALESCE(SUM(groesse), 0) FROM eintrag').fetchone()
+            return {'eintraege': anzahl, 'bytes': groesse}
+        except sqlite3.Error:
+            return None
+
+antwort_cache = AntwortCache(RESPONSE_CACHE_PATH, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_MAX_MB * 1024 * 1024)
+
+def monate_im_zeitraum(start, ende):
+    """Alle Monate ('JJJJ-MM'), die der Zeitraum [start, ende) berührt (wie in query_buchungen_monat)"""
+    monate = []
+    jahr, monat = start.year, start.month
+    while True:
+        monate.append(f'{jahr:04d}-{monat:02d}')
+        if monatsbereich(jahr, monat)[1] >= ende:
+            return monate
+        jahr, monat = (jahr + 1, 1) if monat == 12 else (jahr, monat + 1)
+
+def cache_bereiche(raum_id, start, ende):
+    return {(raum_id, monat) for monat in monate_im_zeitraum(start, ende)}
+
+def antwort_cache_invalidieren(buchungen, seq):
+    """Für Änderungen am ORM vorbei (Massen-UPDATE): nach dem Commit aufrufen"""
+    if RESPONSE_CACHE_ENABLED and buchungen:
+        antwort_cache.invalidieren(set().union(*(cache_bereiche(b.raum_id, b.start_datum, b.end_datum)
+                                                 for b in buchungen)), seq)
+
+@db.event.listens_for(RoutingSession, 'before_flush')
+def _antwort_cache_bereiche_sammeln(db_session, flush_context, instances):
+    """Merkt sich die Monate geänderter Buchungen (alter und neuer Zeitraum); invalidiert wird nach dem Commit"""
+    bereiche = set()
+    for obj in list(db_session.new) + list(db_session.dirty) + list(db_session.deleted):
+        if not isinstance(obj, Buchung):
+            continue
+        if obj in db_session.dirty and not db_session.is_modified(obj, include_collections=False):
+            continue
+        zustand = db.inspect(obj)
+        werte = {}
+        for attr in ('raum_id', 'start_datum', 'end_datum'):
+            historie = zustand.attrs[attr].history
+            if historie.has_changes():
+                werte[attr] = list(historie.added) + list(historie.deleted)
+            else:
+                werte[attr] = [getattr(obj, attr)]  # Lädt nach einem Commit abgelaufene Attribute nach
+        for raum_id in werte['raum_id']:
+            for start in werte['start_datum']:
+                for ende in werte['end_datum']:
+                    if raum_id is not None and start is not None and ende is not None:
+                        bereiche |= cache_bereiche(raum_id, start, ende)
+    if bereiche:
+        # Änderungsnummer der Transaktion (nach dem Commit kann kein SQL mehr ausgeführt werden)
+        db_session.info['cache_seq'] = naechste_aenderung_seq(db_session)
+        db_session.info.setdefault('cache_bereiche', set()).update(bereiche)
+
+@db.event.listens_for(RoutingSession, 'after_commit')
+def _antwort_cache_invalidieren(db_session):
+    bereiche = db_session.info.pop('cache_bereiche', None)
+    seq = db_session.info.pop('cache_seq', None)
+    if bereiche and RESPONSE_CACHE_ENABLED:
+        antwort_cache.invalidieren(bereiche, seq)
+
+@db.event.listens_for(RoutingSession, 'after_rollback')
+def _antwort_cache_bereiche_verwerfen(db_session):
+    db_session.info.pop('cache_bereiche', None)
+    db_session.info.pop('cache_seq', None)
+
+# Platzhalter in der gecachten Startseite, wird pro Request durch die Monatsdaten ersetzt
+INITIAL_DATA_PLACEHOLDER = '<!--INITIAL_BUCHUNGEN-->'
+
+def get_index_shell():
+    """Rendert index.html einmalig; nur der Datenteil wird pro Request eingesetzt"""
+    raeume = get_raeume_cached()
+    # Neu gebaute Assets ändern die eingebetteten URLs, daher Manifest-Stand als Schlüssel
+    get_asset_manifest()
+    manifest_stand = _asset_manifest['mtime']
+    with _raum_cache_lock:
+        gecacht = _raum_cache['index_shell']
+    if gecacht is not None and gecacht[0] == manifest_stand:
+        return gecacht[1], raeume
+
+    shell = render_template('index.html', raeume=raeume,
+                            initial_data=Markup(INITIAL_DATA_PLACEHOLDER))
+    with _raum_cache_lock:
+        _raum_cache['index_shell'] = (manifest_stand, shell)
+    return shell, raeume
+
+# Health-Checks: /health/live ohne I/O, /health/ready mit gecachtem Datenbank-Ping
+HEALTH_CACHE_SECONDS = float(os.getenv('HEALTH_CACHE_SECONDS', 5))
+_health_cache = {'zeit': 0.0, 'ergebnis': None}
+_health_lock = threading.Lock()
+_health_engines = {}
+
+def _health_engine(bind=None):
+    """Eigene Engine ohne Pool: der Ping wartet nie auf eine Verbindung aus dem (evtl. ausgelasteten) App-Pool"""
+    engine = db.engines[bind]
+    if engine.url.database in (None, '', ':memory:'):
+        return engine
+    if bind not in _health_engines:
+        _health_engines[bind] = create_engine(engine.url, poolclass=NullPool)
+    return _health_engines[bind]
+
+def pool_status(engine):
+    """Belegung des Verbindungspools (nur für Pools mit fester Größe aussagekräftig)"""
+    pool = engine.pool
+    if not hasattr(pool, 'checkedout') or not hasattr(pool, 'size'):
+        return {'typ': type(pool).__name__}
+    kapazitaet = pool.size() + max(getattr(pool, '_max_overflow', 0), 0)
+    ausgeliehen = pool.checkedout()
+    return {
+        'typ': type(pool).__name__,
+        'groesse': pool.size(),
+        'ausgeliehen': ausgeliehen,
+        'ueberlauf': max(pool.overflow(), 0),
+        'auslastung_prozent': round(ausgeliehen * 100 / kapazitaet, 1) if kapazitaet else None
+    }
+
+def _bereitschaft_pruefen():
+    ergebnis = {'status': 'healthy', 'database': 'connected'}
+    try:
+        with _health_engine().connect() as conn:
+            conn.execute(db.text('SELECT 1'))
+            ergebnis['postausgang'] = conn.execute(
+                db.select(db.func.count()).select_from(MailAusgang.__table__)
+                .where(MailAusgang.gesendet_am.is_(None), MailAusgang.aufgegeben_am.is_(None))
+            ).scalar()
+    except Exception as e:
+        return {'status': 'unhealthy', 'database': 'disconnected', 'error': str(e)}
+
+    # Ohne Replik lesen die Routen von der primären Datenbank (replica_lesen), der Worker bleibt also bereit;
+    # 'degraded' statt 503, sonst würde der Docker-HEALTHCHECK gesunde Container als unhealthy markieren
+    if DATABASE_REPLICA_URI:
+        try:
+            with _health_engine('replica').connect() as conn:
+                conn.execute(db.text('SELECT 1'))
+            ergebnis['replica'] = 'connected'
+        except Exception as e:
+            ergebnis.update({'status': 'degraded', 'replica': 'disconnected', 'error': str(e)})
+    return ergebnis
+
+def get_bereitschaft():
+    """Ergebnis des letzten Pings, höchstens HEALTH_CACHE_SECONDS alt; parallele Probes teilen sich einen Ping"""
+    jetzt = time.monotonic()
+    ergebnis = _health_cache['ergebnis']
+    if ergebnis is not None and jetzt - _health_cache['zeit'] < HEALTH_CACHE_SECONDS:
+        return ergebnis, jetzt - _health_cache['zeit']
+
+    if not _health_lock.acquire(blocking=ergebnis is None):
+        return ergebnis, jetzt - _health_cache['zeit']  # Ein anderer Thread pingt gerade
+    try:
+        ergebnis = _bereitschaft_pruefen()
+        _health_cache.update({'zeit': time.monotonic(), 'ergebnis': ergebnis})
+        return ergebnis, 0.0
+    finally:
+        _health_lock.release()
+
+# Admission Control: begrenzt gleichzeitige Requests pro Worker-Prozess. Statt bei ausgelastetem DB-Pool oder
+# langsamem SMTP im Backlog zu warten, bekommen öffentliche Requests sofort 503 mit Retry-After; Anmeldung,
+# Health-Checks und Admin-Aktionen dürfen die reservierten Plätze nutzen.
+ADMISSION_CONTROL_ENABLED = os.getenv('ADMISSION_CONTROL_ENABLED', 'True').lower() == 'true'
+ADMISSION_MAX_INFLIGHT = int(os.getenv('ADMISSION_MAX_INFLIGHT', os.getenv('GUNICORN_THREADS', 8)))
+ADMISSION_PUBLIC_SHARE = float(os.getenv('ADMISSION_PUBLIC_SHARE', 0.75))  # Anteil für öffentliche Requests
+ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', 5))  # Sekunden
+ADMISSION_KLASSEN = ('kritisch', 'admin', 'oeffentlich')
+ADMISSION_FREI = ('/static/', '/assets/')  # Dateien ohne Datenbankzugriff zählen nicht mit
+
+def admission_klasse(pfad):
+    """Prioritätsklasse eines Requests (nach Pfad, damit keine Session gelesen werden muss)"""
+    if pfad.startswith('/health') or pfad == '/api/admin/verify-pin':
+        return 'kritisch'
+    if (pfad.startswith('/api/admin/') or pfad.startswith('/buchung/bestaetigen/')
+            or pfad.startswith('/buchung/ablehnen/')
+            or re.match(r'^/api/buchung/\d+/(bestaetigen|ablehnen|loeschen|stornieren)$', pfad)):
+        return 'admin'
+    return 'oeffentlich'
+
+class AdmissionControl:
+    """WSGI-Middleware um app.wsgi_app; zählt laufende Requests und weist über der Grenze der Klasse ab"""
+
+    def __init__(self, wsgi_app, max_inflight, public_share, retry_after):
+        self.wsgi_app = wsgi_app
+        self.retry_after = retry_after
+        self.grenzen = {
+            'kritisch': max_inflight + 2,  # Health-Checks und Anmeldung auch bei voller Auslastung
+            'admin': max_inflight,
+            'oeffentlich': max(1, int(max_inflight * public_share))
+        }
+        self.lock = threading.Lock()
+        self.in_bearbeitung = 0
+        self.spitze = 0
+        self.zugelassen = dict.fromkeys(ADMISSION_KLASSEN, 0)
+        self.abgewiesen = dict.fromkeys(ADMISSION_KLASSEN, 0)
+        self.pool_erschoepft = 0
+        self._engine = None
+
+    def _pool_voll(self):
+        """True, wenn der Primär-Pool keine freie Verbindung mehr hat (ein Request würde pool_timeout warten)"""
+        if self._engine is None:
+            with app.app_context():
+                self._engine = db.engine
+        pool = self._engine.pool
+        if not hasattr(pool, 'checkedout') or not hasattr(pool, 'size'):
+            return False
+        ueberlauf = getattr(pool, '_max_overflow', 0)
+        return ueberlauf >= 0 and pool.checkedout() >= pool.size() + ueberlauf
+
+    def __call__(self, environ, start_response):
+        pfad = environ.get('PATH_INFO', '')
+        if pfad.startswith(ADMISSION_FREI):
+            return self.wsgi_app(environ, start_response)
+
+        klasse = admission_klasse(pfad)
+        grund = None
+        with self.lock:
+            if self.in_bearbeitung >= self.grenzen[klasse]:
+                grund = 'ausgelastet'
+            elif klasse == 'oeffentlich' and self._pool_voll():
+                grund = 'pool'
+            if grund:
+                self.abgewiesen[klasse] += 1
+                self.pool_erschoepft += grund == 'pool'
+            else:
+                self.in_bearbeitung += 1
+                self.spitze = max(self.spitze, self.in_bearbeitung)
+                self.zugelassen[klasse] += 1
+        if grund:
+            return self._abweisen(pfad, start_response)
+        try:
+            return self.wsgi_app(environ, start_response)
+        finally:
+            with self.lock:
+                self.in_bearbeitung -= 1
+
+    def _abweisen(self, pfad, start_response):
+        text = f'Der Server ist ausgelastet, bitte in {self.retry_after} Sekunden erneut versuchen.'
+        if pfad.startswith('/api/') or pfad.startswith('/health'):
+            body, typ = json.dumps({'error': text}).encode(), 'application/json'
+        else:
+            body, typ = f'<!DOCTYPE html><meta charset="utf-8"><p>{text}</p>'.encode(), 'text/html; charset=utf-8'
+        start_response('503 SERVICE UNAVAILABLE', [
+            ('Content-Type', typ),
+            ('Content-Length', str(len(body))),
+            ('Retry-After', str(self.retry_after)),
+            ('Cache-Control', 'no-store'),
+        ])
+        return [body]
+
+    def status(self):
+        with self.lock:
+            return {
+                'pid': os.getpid(),
+                'in_bearbeitung': self.in_bearbeitung,
+                'spitze': self.spitze,
+                'grenzen': dict(self.grenzen),
+                'zugelassen': dict(self.zugelassen),
+                'abgewiesen': dict(self.abgewiesen),
+                'abgewiesen_gesamt': sum(self.abgewiesen.values()),
+                'davon_pool_erschoepft': self.pool_erschoepft
+            }
+
+admission = None
+if ADMISSION_CONTROL_ENABLED:
+    admission = AdmissionControl(app.wsgi_app, ADMISSION_MAX_INFLIGHT, ADMISSION_PUBLIC_SHARE, ADMISSION_RETRY_AFTER)
+    app.wsgi_app = admission
+
+# Routen
+@app.route('/health/live')
+@limiter.exempt
+def health_live():
+    """Liveness: der Prozess beantwortet Requests (ohne Datenbank oder andere I/O)"""
+    return jsonify({'status': 'alive', 'pid': os.getpid(), 'timestamp': datetime.utcnow().isoformat()}), 200
+
+@app.route('/health')
+@app.route('/health/ready')
+@limiter.exempt
+def health():
+    """Readiness (und Health Check für Docker): gecachter DB-Ping, Pool-Auslastung, Postausgang, SMTP"""
+    ergebnis, alter = get_bereitschaft()
+    ergebnis = dict(ergebnis)
+    ergebnis.update({
+        'smtp': smtp_breaker.status(),
+        'pool': pool_status(db.engine),
+        'admission': admission.status() if admission else None,
+        'cache_alter_sekunden': round(alter, 1),
+        'timestamp': datetime.utcnow().isoformat()
+    })
+    if ergebnis['status'] == 'healthy':
+        pool = ergebnis['pool']
+        if pool.get('auslastung_prozent') is not None and pool['auslastung_prozent'] >= 100:
+            ergebnis['hinweis'] = 'Verbindungspool ausgelastet'
+        if smtp_breaker.zustand() != 'geschlossen':
+            ergebnis['hinweis'] = 'Mailserver nicht erreichbar, E-Mails werden im Postausgang gesammelt'
+    return jsonify(ergebnis), 503 if ergebnis['status'] == 'unhealthy' else 200
+
+@app.route('/')
+@replica_lesen
+def index():
+    shell, raeume = get_index_shell()
+
+    # Aktueller Monat wird direkt eingebettet, damit der Kalender ohne zweiten Request erscheint
+    jetzt = datetime.now()
+    raum_id = raeume[0]['id'] if raeume else None
+    raum_namen = {r['id']: r['name'] for r in raeume}
+    seq = aktuelle_aenderung_seq()  # Vor den Buchungen lesen, damit kein Delta verloren geht
+    buchungen = query_buchungen_monat(jetzt.year, jetzt.month, raum_id) if raum_id else []
+    initial_data = htmlsafe_json_dumps({
+        'raum_id': raum_id,
+        'jahr': jetzt.year,
+        'monat': jetzt.month,
+        'seq': seq,
+        'buchungen': [buchung_to_dict(b, raum_namen) for b in buchungen]
+    })
+
+    return shell.replace(INITIAL_DATA_PLACEHOLDER, str(initial_data), 1)
+
+@app.route('/api/buchungen')
+@replica_lesen
+def get_buchungen():
+    jahr = request.args.get('jahr', datetime.now().year, type=int)
+    monat = request.args.get('monat', datetime.now().month, type=int)
+    raum_id = request.args.get('raum_id', type=int)
+    since = request.args.get('since', type=int)
+
+    if since is not None:
+        return get_buchungen_delta(since, raum_id)
+
+    if not 1 <= monat <= 12:
+        return jsonify({'error': 'Ungültiger Monat'}), 400
+
+    format_ = 'columns' if request.args.get('format') == 'columns' else 'liste'
+    raum_key = raum_id or 0
+    monat_key = f'{jahr:04d}-{monat:02d}'
+    ansicht = 'admin' if session.get('is_admin') else 'oeffentlich'
+    kodierung = json_kodierung()
+    cache_schluessel = f'{raum_key}:{monat_key}:{ansicht}:{format_}:{kodierung or "identity"}'
+
+    if RESPONSE_CACHE_ENABLED:
+        treffer = antwort_cache.holen(cache_schluessel)
+        if treffer is not None:
+            return antwort_mit_seq(treffer[1], treffer[0], format_, 'HIT', treffer[2])
+
+    seq = aktuelle_aenderung_seq()  # Vor den Buchungen lesen, damit kein Delta verloren geht
+    buchungen = query_buchungen_monat(jahr, monat, raum_id)
+    raum_namen = get_raum_namen()
+
+    if format_ == 'columns':
+        inhalt = app.json.dumps(buchungen_to_columns(buchungen, raum_namen, seq))
+    else:
+        inhalt = app.json.dumps([buchung_to_dict(b, raum_namen) for b in buchungen])
+    # Einmal komprimieren und so cachen, damit Treffer weder serialisieren noch komprimieren
+    inhalt, kodierung = json_komprimieren(inhalt.encode('utf-8'), kodierung)
+
+    if RESPONSE_CACHE_ENABLED:
+        antwort_cache.speichern(cache_schluessel, raum_key, monat_key, seq, inhalt, kodierung)
+    return antwort_mit_seq(inhalt, seq, format_, 'MISS', kodierung)
+
+def antwort_mit_seq(inhalt, seq, format_, cache_status, kodierung=None):
+    response = app.response_class(inhalt, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    if kodierung is not None:
+        response.headers['Content-Encoding'] = kodierung
+    if format_ == 'liste':
+        response.headers['X-Aenderung-Seq'] = str(seq)
+    response.headers['X-Cache'] = cache_status
+    return response
+
+def get_buchungen_delta(since, raum_id):
+    """Nur die seit `since` geänderten Buchungen; gelöschte/abgelaufene kommen als Tombstones (nur ID)"""
+    if since < 0:
+        return jsonify({'error': 'Ungültiger Wert für since'}), 400
+
+    seq = aktuelle_aenderung_seq()
+    if since > seq:
+        # Client kennt einen Stand, den diese Datenbank (z.B. eine nachlaufende Replik) noch nicht hat
+        since = seq
+    geaendert = query_buchungen_delta(since, raum_id)
+    if len(geaendert) > DELTA_MAX_ZEILEN:
+        return jsonify({'seq': seq, 'neu_laden': True})
+
+    raum_namen = get_raum_namen()
+    return jsonify({
+        'seq': max([seq] + [b.aenderung_seq for b in geaendert]),
+        'buchungen': [buchung_to_dict(b, raum_namen) for b in geaendert if ist_sichtbar(b)],
+        'geloescht': [b.id for b in geaendert if not ist_sichtbar(b)]
+    })
 
 @app.route('/api/buchung', methods=['POST'])
 def create_buchung():
     data = request.json
 
+    # Wiederholte Anfragen (Doppelklick, Retry) mit gleichem Idempotency-Key liefern die gespeicherte Antwort
+    idempotenz_key = request.headers.get('Idempotency-Key', '').strip() or None
+    anfrage_hash = hashlib.sha256(request.get_data()).hexdigest()
+    if idempotenz_key:
+        if len(idempotenz_key) > 100:
+            return jsonify({'error': 'Idempotency-Key ist zu lang (max. 100 Zeichen)'}), 400
+        eintrag = get_idempotenz_eintrag(idempotenz_key)
+        if eintrag:
+            return idempotenz_antwort(eintrag, anfrage_hash)
+
     try:
         neue_buchung = Buchung(
             raum_id=data['raum_id'],
@@ -779,24 +2583,98 @@ def create_buchung():
             return jsonify({'error': 'Dieser Zeitraum ist bereits gebucht'}), 400
 
         db.session.add(neue_buchung)
-        db.session.commit()
+        protokolliere(neue_buchung, 'erstellt', 'benutzer')
+
+        # Key in derselben Transaktion wie die Buchung anlegen: parallele Duplikate scheitern am Unique-Index
+        eintrag = None
+        if idempotenz_key:
+            IdempotenzSchluessel.query.filter(
+                IdempotenzSchluessel.schluessel == idempotenz_key,
+                IdempotenzSchluessel.erstellt_am < datetime.utcnow() - timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS)
+            ).delete(synchronize_session=False)  # abgelaufener Eintrag mit gleichem Key
+            eintrag = IdempotenzSchluessel(schluessel=idempotenz_key, anfrage_hash=anfrage_hash)
+            db.session.add(eintrag)
+
+        try:
+            db.session.flush()  # Buchungs-ID für die gespeicherte Antwort
+            antwort = {
+                'message': 'Buchungsanfrage wurde gesendet',
+                'buchung_id': neue_buchung.id,
+                'status': 'ausstehend'
+            }
+            # Antwort mit der Buchung committen: ein Fehler danach lässt den Key nicht "in Bearbeitung" zurück
+            if eintrag is not None:
+                eintrag.status_code = 201
+                eintrag.antwort = app.json.dumps(antwort)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            if not idempotenz_key:
+                raise
+            eintrag = get_idempotenz_eintrag(idempotenz_key)
+            if eintrag:
+                return idempotenz_antwort(eintrag, anfrage_hash)
+            return jsonify({'error': 'Diese Anfrage wird bereits verarbeitet'}), 409
 
-        # Sende Benachrichtigungs-E-Mail an Administrator
-        email_sent = send_booking_request_email(neue_buchung)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
+    # Die Buchung ist angelegt; Fehler beim Mailversand ändern daran nichts mehr
+    email_sent = user_email_sent = False
+    try:
+        # Sende Benachrichtigungs-E-Mail an Administrator (im Digest-Modus später gesammelt)
+        email_sent = benachrichtige_admin_ueber_anfrage(neue_buchung)
 
         # Sende Bestätigungs-E-Mail an Benutzer
         user_email_sent = send_user_request_confirmation(neue_buchung)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Fehler nach dem Anlegen von Buchung {neue_buchung.id}: {str(e)}")
+
+    if email_sent:
+        antwort['message'] += ' und E-Mail wurde verschickt'
+    antwort['email_sent'] = email_sent
+    antwort['user_email_sent'] = user_email_sent
+
+    if eintrag is not None:
+        # Wiederholungen sollen dieselben Angaben sehen; schlägt das fehl, bleibt die Antwort ohne Mail-Status
+        try:
+            IdempotenzSchluessel.query.filter_by(id=eintrag.id) \
+                .update({IdempotenzSchluessel.antwort: app.json.dumps(antwort)}, synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Idempotenz-Antwort für Buchung {neue_buchung.id} nicht aktualisiert: {str(e)}")
 
-        return jsonify({
-            'message': 'Buchungsanfrage wurde gesendet' + (' und E-Mail wurde verschickt' if email_sent else ''),
-            'buchung_id': neue_buchung.id,
-            'status': 'ausstehend',
-            'email_sent': email_sent,
-            'user_email_sent': user_email_sent
-        }), 201
+    return jsonify(antwort), 201
 
-    except Exception as e:
-        return jsonify({'error': str(e)}), 400
+def bearbeitet_text(buchung):
+    if not buchung.is_active:
+        return 'inzwischen gelöscht'
+    return {'bestätigt': 'bereits bestätigt',
+            'abgelaufen': 'nicht rechtzeitig bearbeitet und ist abgelaufen'}.get(buchung.status, 'bereits abgelehnt')
+
+def bereits_bearbeitet_fehler(buchung):
+    """409 für das Admin-Panel, wenn ein anderer Request die Anfrage zuerst bearbeitet hat"""
+    return jsonify({'error': f'Diese Buchung wurde {bearbeitet_text(buchung)}', 'status': buchung.status}), 409
+
+def bereits_bearbeitet_seite(buchung):
+    return render_template('message.html',
+                           title='Bereits bearbeitet',
+                           message=f'Diese Buchung wurde {bearbeitet_text(buchung)}.',
+                           typ='warning')
+
+@app.errorhandler(StaleDataError)
+def veraltete_buchung(e):
+    """Ein ORM-UPDATE traf auf eine inzwischen geänderte Version (z.B. Löschen parallel zur Bestätigung)"""
+    db.session.rollback()
+    if request.path.startswith('/api/'):
+        return jsonify({'error': 'Die Buchung wurde inzwischen geändert, bitte neu laden'}), 409
+    return render_template('message.html',
+                           title='Bereits bearbeitet',
+                           message='Diese Buchung wurde inzwischen geändert.',
+                           typ='warning'), 409
 
 @app.route('/api/buchung/<int:buchung_id>/bestaetigen', methods=['POST'])
 @admin_required
@@ -816,8 +2694,8 @@ def bestaetigen_buchung(buchung_id):
     if ueberschneidungen:
         return jsonify({'error': 'Konflikt mit anderer Buchung'}), 400
 
-    buchung.status = 'bestätigt'
-    db.session.commit()
+    if not status_uebergang(buchung, 'bestätigt', 'bestaetigt', 'admin'):
+        return bereits_bearbeitet_fehler(buchung)
 
     # Sende Bestätigungs-E-Mail an Benutzer
     send_user_confirmation(buchung)
@@ -833,8 +2711,8 @@ def ablehnen_buchung(buchung_id):
     data = request.get_json() if request.is_json else {}
     rejection_message = data.get('message', None)
 
-    buchung.status = 'abgelehnt'
-    db.session.commit()
+    if not status_uebergang(buchung, 'abgelehnt', 'abgelehnt', 'admin', rejection_message):
+        return bereits_bearbeitet_fehler(buchung)
 
     # Sende Ablehnungs-E-Mail an Benutzer mit optionaler Nachricht
     send_user_rejection(buchung, rejection_message)
@@ -847,10 +2725,222 @@ def loeschen_buchung(buchung_id):
     buchung = Buchung.query.get_or_404(buchung_id)
     buchung.is_active = False
     buchung.geloescht_am = datetime.utcnow()
+    protokolliere(buchung, 'geloescht', 'admin')
     db.session.commit()
 
     return jsonify({'message': 'Buchung wurde gelöscht'})
 
+BULK_AKTIONEN = ('bestaetigen', 'ablehnen', 'loeschen')
+BULK_MAX_IDS = 500
+
+def finde_bulk_konflikte(kandidaten, bestaetigte):
+    """Sweep-Line je Raum: liefert die IDs der Kandidaten, die mit bestätigten oder früheren Kandidaten kollidieren"""
+    konflikte = set()
+    nach_raum = {}
+    for b in bestaetigte:
+        nach_raum.setdefault(b.raum_id, ([], []))[0].append(b)
+    for b in kandidaten:
+        nach_raum.setdefault(b.raum_id, ([], []))[1].append(b)
+
+    for feste, offene in nach_raum.values():
+        feste.sort(key=lambda b: b.start_datum)
+        feste_starts = [b.start_datum for b in feste]
+        ereignisse = sorted(
+            [(b.start_datum, 0, b) for b in feste] + [(b.start_datum, 1, b) for b in offene],
+            key=lambda e: (e[0], e[1], e[2].id)
+        )
+        max_ende = None
+        for start, ist_kandidat, b in ereignisse:
+            if ist_kandidat:
+                # Überschneidung mit früher beginnenden Buchungen
+                konflikt = max_ende is not None and max_ende > start
+                # Überschneidung mit später beginnenden bestätigten Buchungen
+                if not konflikt:
+                    i = bisect_left(feste_starts, start)
+                    konflikt = i < len(feste) and feste[i].start_datum < b.end_datum
+                if konflikt:
+                    konflikte.add(b.id)
+                    continue
+            if max_ende is None or b.end_datum > max_ende:
+                max_ende = b.end_datum
+    return konflikte
+
+@app.route('/api/admin/buchungen')
+@admin_required
+@replica_lesen
+def get_admin_buchungen():
+    """Aktive Buchungen unabhängig vom angezeigten Monat (Standard: alle offenen Anfragen), optional je Raum"""
+    status = request.args.get('status', 'ausstehend')
+    raum_id = request.args.get('raum_id', type=int)
+    if status not in ('ausstehend', 'bestätigt', 'abgelehnt', 'abgelaufen'):
+        return jsonify({'error': 'Ungültiger Status'}), 400
+
+    query = Buchung.query.filter(Buchung.is_active == True, Buchung.status == status)
+    if raum_id:
+        query = query.filter(Buchung.raum_id == raum_id)
+    raum_namen = get_raum_namen()
+    return jsonify([buchung_to_dict(b, raum_namen) for b in query.order_by(Buchung.start_datum, Buchung.id)])
+
+@app.route('/api/admin/buchungen/bulk', methods=['POST'])
+@admin_required
+def bulk_buchungen():
+    """Mehrere Buchungen in einer Transaktion bestätigen, ablehnen oder löschen"""
+    data = request.get_json(silent=True) or {}
+    aktion = data.get('aktion')
+    ids = data.get('ids')
+    rejection_message = data.get('message') or None
+
+    if aktion not in BULK_AKTIONEN:
+        return jsonify({'error': f'Ungültige Aktion, erlaubt: {", ".join(BULK_AKTIONEN)}'}), 400
+    if not isinstance(ids, list) or not ids:
+        return jsonify({'error': 'ids muss eine nicht-leere Liste sein'}), 400
+    if len(ids) > BULK_MAX_IDS:
+        return jsonify({'error': f'Maximal {BULK_MAX_IDS} Buchungen pro Anfrage'}), 400
+    if not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        return jsonify({'error': 'ids dürfen nur ganze Zahlen enthalten'}), 400
+    ids = list(dict.fromkeys(ids))
+
+    buchungen = {b.id: b for b in Buchung.query.filter(Buchung.id.in_(ids), Buchung.is_active == True).all()}
+    ergebnisse = {i: {'id': i, 'ergebnis': 'nicht_gefunden'} for i in ids if i not in buchungen}
+    betroffen = []
+    verloren = []  # Zwischen Lesen und UPDATE von anderer Seite bearbeitet
+
+    # Bestätigen und Ablehnen nur für ausstehende Anfragen, wie bei den Einzelaktionen
+    kandidaten = []
+    for b in buchungen.values():
+        if aktion != 'loeschen' and b.status != 'ausstehend':
+            ergebnisse[b.id] = {'id': b.id, 'ergebnis': 'bereits_bearbeitet', 'status': b.status}
+        else:
+            kandidaten.append(b)
+    seq = naechste_aenderung_seq() if aktion != 'loeschen' and kandidaten else None
+
+    if aktion == 'bestaetigen':
+
+        konflikte = set()
+        if kandidaten:
+            # Alle bestätigten Buchungen im betroffenen Zeitraum mit einer Abfrage laden
+            bestaetigte = Buchung.query.filter(
+                Buchung.raum_id.in_({b.raum_id for b in kandidaten}),
+                Buchung.status == 'bestätigt',
+                Buchung.is_active == True,
+                Buchung.start_datum < max(b.end_datum for b in kandidaten),
+                Buchung.end_datum > min(b.start_datum for b in kandidaten)
+            ).all()
+            konflikte = finde_bulk_konflikte(kandidaten, bestaetigte)
+
+        for b in kandidaten:
+            if b.id in konflikte:
+                ergebnisse[b.id] = {'id': b.id, 'ergebnis': 'konflikt', 'error': 'Konflikt mit anderer Buchung'}
+            elif bedingt_aendern(b, 'bestätigt', seq):
+                protokolliere(b, 'bestaetigt', 'admin')
+                betroffen.append(b)
+                ergebnisse[b.id] = {'id': b.id, 'ergebnis': 'bestaetigt', 'status': 'bestätigt'}
+            else:
+                verloren.append(b)
+
+    elif aktion == 'ablehnen':
+        for b in kandidaten:
+            if bedingt_aendern(b, 'abgelehnt', seq):
+                protokolliere(b, 'abgelehnt', 'admin', rejection_message)
+                betroffen.append(b)
+                ergebnisse[b.id] = {'id': b.id, 'ergebnis': 'abgelehnt', 'status': 'abgelehnt'}
+            else:
+                verloren.append(b)
+
+    else:
+        jetzt = datetime.utcnow()
+        for b in kandidaten:
+            b.is_active = False
+            b.geloescht_am = jetzt
+            protokolliere(b, 'geloescht', 'admin')
+            ergebnisse[b.id] = {'id': b.id, 'ergebnis': 'geloescht'}
+
+    try:
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'error': 'Buchungen wurden inzwischen geändert, bitte neu laden'}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Änderungen konnten nicht gespeichert werden: {str(e)}'}), 500
+
+    # Die bedingten UPDATEs laufen am ORM vorbei: Antwort-Cache selbst invalidieren
+    antwort_cache_invalidieren(betroffen, seq)
+    for b in verloren:
+        # Nach dem Commit neu geladen: aktueller Status der anderen Seite
+        ergebnisse[b.id] = {'id': b.id, 'ergebnis': 'bereits_bearbeitet',
+                            'status': b.status if b.is_active else 'gelöscht'}
+
+    # Benachrichtigungen nach dem Commit gesammelt über eine SMTP-Verbindung verschicken
+    if betroffen:
+        with mail.sammelversand():
+            for b in betroffen:
+                if aktion == 'bestaetigen':
+                    ergebnisse[b.id]['email_sent'] = send_user_confirmation(b)
+                else:
+                    ergebnisse[b.id]['email_sent'] = send_user_rejection(b, rejection_message)
+
+    liste = [ergebnisse[i] for i in ids]
+    zusammenfassung = {}
+    for e in liste:
+        zusammenfassung[e['ergebnis']] = zusammenfassung.get(e['ergebnis'], 0) + 1
+
+    return jsonify({'aktion': aktion, 'ergebnisse': liste, 'zusammenfassung': zusammenfassung})
+
+def finde_konfliktgruppen(buchungen):
+    """
+    Sweep-Line über nach (Raum, Beginn) sortierte Buchungen: eine Gruppe wächst, solange die nächste Buchung
+    vor dem bisher spätesten Ende beginnt. Liefert nur Gruppen mit mindestens zwei Buchungen.
+    """
+    gruppen = []
+    aktuell, raum_id, max_ende = [], None, None
+    for b in buchungen:
+        if b.raum_id == raum_id and b.start_datum < max_ende:
+            aktuell.append(b)
+            max_ende = max(max_ende, b.end_datum)
+            continue
+        if len(aktuell) > 1:
+            gruppen.append(aktuell)
+        aktuell, raum_id, max_ende = [b], b.raum_id, b.end_datum
+    if len(aktuell) > 1:
+        gruppen.append(aktuell)
+    return gruppen
+
+@app.route('/api/admin/konflikte')
+@admin_required
+@replica_lesen
+def get_admin_konflikte():
+    """Gruppen sich überschneidender ausstehender/bestätigter Buchungen je Raum (ab heute bzw. ?ab=JJJJ-MM-TT)"""
+    try:
+        ab = datetime.fromisoformat(request.args['ab']) if request.args.get('ab') else datetime.now()
+    except ValueError:
+        return jsonify({'error': 'ab muss im Format JJJJ-MM-TT angegeben werden'}), 400
+
+    # Eine Abfrage, sortiert von der Datenbank; der Sweep selbst ist linear
+    buchungen = Buchung.query.filter(
+        Buchung.is_active == True,
+        Buchung.status.in_(('ausstehend', 'bestätigt')),
+        Buchung.end_datum > ab
+    ).order_by(Buchung.raum_id, Buchung.start_datum, Buchung.id).all()
+
+    raum_namen = get_raum_namen()
+    gruppen = []
+    for gruppe in finde_konfliktgruppen(buchungen):
+        ausstehend = sum(1 for b in gruppe if b.status == 'ausstehend')
+        if not ausstehend:
+            continue  # Nur entscheidbare Konflikte anzeigen
+        gruppen.append({
+            'raum_id': gruppe[0].raum_id,
+            'raum_name': raum_namen.get(gruppe[0].raum_id),
+            'von': min(b.start_datum for b in gruppe).isoformat(),
+            'bis': max(b.end_datum for b in gruppe).isoformat(),
+            'ausstehend': ausstehend,
+            'bestaetigt': len(gruppe) - ausstehend,
+            'buchungen': [buchung_to_dict(b, raum_namen) for b in gruppe]
+        })
+
+    return jsonify(gruppen)
+
 @app.route('/api/buchung/<int:buchung_id>/stornieren', methods=['POST'])
 @admin_required
 def stornieren_buchung(buchung_id):
@@ -865,71 +2955,494 @@ def stornieren_buchung(buchung_id):
     # Markiere Buchung als gelöscht
     buchung.is_active = False
     buchung.geloescht_am = datetime.utcnow()
+    protokolliere(buchung, 'storniert', 'admin')
     db.session.commit()
 
     return jsonify({'message': 'Buchung wurde storniert', 'status': 'storniert'})
 
 @app.route('/api/raeume')
+@replica_lesen
 def get_raeume():
-    raeume = Raum.query.all()
-    return jsonify([{
-        'id': r.id,
-        'name': r.name,
-        'beschreibung': r.beschreibung
-    } for r in raeume])
+    return jsonify(get_raeume_cached())
+
+# Jahresübersicht: ab so vielen bestätigten Stunden gilt ein Tag als ausgebucht
+FULLY_BOOKED_HOURS = float(os.getenv('FULLY_BOOKED_HOURS', 12))
+JAHR_FELDER = ['minuten', 'bestaetigt', 'ausstehend', 'ausgebucht']
+
+def dauer_minuten_sql(start, ende):
+    """SQL-Ausdruck für die Dauer zwischen zwei Zeitstempeln in Minuten"""
+    if ist_sqlite():
+        return (db.func.julianday(ende) - db.func.julianday(start)) * 1440
+    return db.func.extract('epoch', ende - start) / 60
+
+def query_tageswerte(raum_id, jahr):
+    """
+    Pro Tag: gebuchte Minuten (bestätigt) und Anzahl bestätigter/ausstehender Buchungen.
+    Buchungen innerhalb eines Tages werden in der Datenbank gruppiert; die seltenen mehrtägigen
+    werden einzeln geladen und auf ihre Tage aufgeteilt.
+    """
+    beginn, ende = datetime(jahr, 1, 1), datetime(jahr + 1, 1, 1)
+    basis = db.session.query(Buchung).filter(
+        Buchung.raum_id == raum_id,
+        Buchung.is_active == True,
+        Buchung.status.in_(['bestätigt', 'ausstehend']),
+        Buchung.start_datum < ende,
+        Buchung.end_datum > beginn
+    )
+    tag = db.func.date(Buchung.start_datum)
+    eintaegig = db.func.date(Buchung.end_datum) == tag
+    bestaetigt = Buchung.status == 'bestätigt'
+
+    tage = {}
+    for datum, minuten, anzahl_bestaetigt, anzahl_ausstehend in basis.filter(eintaegig).with_entities(
+            tag,
+            db.func.sum(db.case((bestaetigt, dauer_minuten_sql(Buchung.start_datum, Buchung.end_datum)), else_=0)),
+            db.func.sum(db.case((bestaetigt, 1), else_=0)),
+            db.func.sum(db.case((bestaetigt, 0), else_=1))
+    ).group_by(tag):
+        tage[str(datum)] = [round(float(minuten or 0)), int(anzahl_bestaetigt), int(anzahl_ausstehend)]
+
+    for start, end_datum, status in basis.filter(db.not_(eintaegig)).with_entities(
+            Buchung.start_datum, Buchung.end_datum, Buchung.status):
+        stichtag = max(start, beginn).replace(hour=0, minute=0, second=0, microsecond=0)
+        while stichtag < min(end_datum, ende):
+            naechster = stichtag + timedelta(days=1)
+            werte = tage.setdefault(stichtag.date().isoformat(), [0, 0, 0])
+            if status == 'bestätigt':
+                werte[0] += round((min(end_datum, naechster) - max(start, stichtag)).total_seconds() / 60)
+                werte[1] += 1
+            else:
+                werte[2] += 1
+            stichtag = naechster
+    return tage
+
+@app.route('/api/raeume/<int:raum_id>/jahr/<int:jahr>')
+@replica_lesen
+def get_jahresuebersicht(raum_id, jahr):
+    """Kompakte Jahresübersicht pro Tag statt zwölf Monatsabrufen; nur Tage mit Buchungen"""
+    if raum_id not in get_raum_namen():
+        return jsonify({'error': 'Raum nicht gefunden'}), 404
+    if not 1900 <= jahr <= 2999:
+        return jsonify({'error': 'Ungültiges Jahr'}), 400
+
+    grenze = FULLY_BOOKED_HOURS * 60
+    tage = query_tageswerte(raum_id, jahr)
+    return jsonify({
+        'raum_id': raum_id,
+        'jahr': jahr,
+        'ausgebucht_ab_minuten': round(grenze),
+        'felder': JAHR_FELDER,
+        'tage': {datum: werte + [1 if werte[0] >= grenze else 0] for datum, werte in sorted(tage.items())}
+    })
+
+# Darstellung der Events im Admin-Log: Status (für die Farbe), Anzeigetext, Meldung
+EVENT_ANZEIGE = {
+    'erstellt': ('ausstehend', 'Erstellt', 'Buchungsanfrage von {name}'),
+    'bestaetigt': ('bestätigt', 'Bestätigt', 'Buchung von {name} bestätigt'),
+    'abgelehnt': ('abgelehnt', 'Abgelehnt', 'Buchung von {name} abgelehnt'),
+    'geloescht': ('gelöscht', 'Gelöscht', 'Buchung von {name} gelöscht'),
+    'storniert': ('gelöscht', 'Storniert', 'Buchung von {name} storniert'),
+    'abgelaufen': ('abgelaufen', 'Abgelaufen', 'Anfrage von {name} abgelaufen'),
+}
+EVENT_QUELLEN = {'benutzer': 'Benutzer', 'admin': 'Admin', 'email': 'Admin per E-Mail-Link', 'system': 'automatisch'}
+ADMIN_LOGS_LIMIT = 50
 
 @app.route('/api/admin/logs')
 @admin_required
+@replica_lesen
 def get_admin_logs():
-    # Hole alle Buchungen sortiert nach Erstellungsdatum (inkl. gelöschte)
-    buchungen = Buchung.query.order_by(Buchung.erstellt_am.desc()).limit(50).all()
+    """Neueste Events zuerst; ältere Seiten über ?cursor=<zeitpunkt>_<id> (Keyset-Paging)"""
+    limit = min(request.args.get('limit', ADMIN_LOGS_LIMIT, type=int), 200)
+    query = BuchungEvent.query.options(db.joinedload(BuchungEvent.buchung))
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            zeitpunkt, event_id = cursor.rsplit('_', 1)
+            query = query.filter(db.tuple_(BuchungEvent.zeitpunkt, BuchungEvent.id) <
+                                 db.tuple_(datetime.fromisoformat(zeitpunkt), int(event_id)))
+        except ValueError:
+            return jsonify({'error': 'Ungültiger Cursor'}), 400
+
+    events = query.order_by(BuchungEvent.zeitpunkt.desc(), BuchungEvent.id.desc()).limit(limit + 1).all()
+    hat_mehr = len(events) > limit
+    events = events[:limit]
 
     logs = []
-    for b in buchungen:
-        # Bestimme den Status-Text
-        if not b.is_active:
-            status = 'gelöscht'
-            status_text = 'Gelöscht'
-            if b.geloescht_am:
-                details_suffix = f' (gelöscht am {b.geloescht_am.strftime("%d.%m.%Y %H:%M")})'
-            else:
-                details_suffix = ' (gelöscht)'
-        else:
-            status = b.status
-            status_text = b.status.capitalize()
-            details_suffix = ''
+    for e in events:
+        b = e.buchung
+        status, status_text, meldung = EVENT_ANZEIGE.get(e.typ, (e.typ, e.typ.capitalize(), '{name}'))
+        details = f'{b.start_datum.strftime("%d.%m.%Y %H:%M")} - {b.end_datum.strftime("%H:%M")} ({EVENT_QUELLEN.get(e.quelle, e.quelle)})'
+        if e.details:
+            details += f': {e.details}'
 
         logs.append({
             'id': b.id,
-            'timestamp': b.erstellt_am.isoformat(),
-            'type': 'buchung_erstellt',
+            'event_id': e.id,
+            'timestamp': e.zeitpunkt.isoformat(),
+            'type': f'buchung_{e.typ}',
             'status': status,
             'status_text': status_text,
-            'message': f'Buchungsanfrage von {b.benutzer_name}',
-            'details': f'{b.start_datum.strftime("%d.%m.%Y %H:%M")} - {b.end_datum.strftime("%H:%M")}{details_suffix}',
+            'message': meldung.format(name=b.benutzer_name),
+            'details': details,
             'email': b.benutzer_email,
             'is_active': b.is_active
         })
 
-    return jsonify(logs)
+    response = jsonify(logs)
+    if hat_mehr:
+        response.headers['X-Naechster-Cursor'] = f'{events[-1].zeitpunkt.isoformat()}_{events[-1].id}'
+    return response
+
+@app.route('/api/admin/logs/monate')
+@admin_required
+@replica_lesen
+def get_admin_logs_monate():
+    """Monatliche Verdichtung der Events, die älter als EVENT_LOG_RETENTION_DAYS sind"""
+    monate = {}
+    for r in BuchungEventMonat.query.order_by(BuchungEventMonat.monat.desc()).all():
+        monate.setdefault(r.monat, {})[r.typ] = r.anzahl
+    return jsonify([{'monat': monat, 'anzahl': anzahl} for monat, anzahl in monate.items()])
+
+# Volltextsuche über Name, E-Mail und Zweck
+# SQLite: FTS5-Tabelle mit der Buchung-Tabelle als externem Inhalt, per Trigger synchron gehalten
+# PostgreSQL: GIN-Trigrammindex (pg_trgm) auf dem zusammengesetzten Text
+SUCHE_LIMIT = 50
+SUCHE_MAX_BEGRIFFE = 8
+_suche_modus = {'modus': 'like'}  # fts5, trgm oder like (Fallback ohne Index)
+
+SUCHE_PG_TEXT = "(benutzer_name || ' ' || benutzer_email || ' ' || coalesce(zweck, ''))"
+
+SUCHE_FTS5_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS buchung_suche USING fts5("
+    "benutzer_name, benutzer_email, zweck, content='buchung', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS buchung_suche_ai AFTER INSERT ON buchung BEGIN "
+    "INSERT INTO buchung_suche (rowid, benutzer_name, benutzer_email, zweck) "
+    "VALUES (new.id, new.benutzer_name, new.benutzer_email, new.zweck); END",
+    "CREATE TRIGGER IF NOT EXISTS buchung_suche_ad AFTER DELETE ON buchung BEGIN "
+    "INSERT INTO buchung_suche (buchung_suche, rowid, benutzer_name, benutzer_email, zweck) "
+    "VALUES ('delete', old.id, old.benutzer_name, old.benutzer_email, old.zweck); END",
+    # Nur bei Änderungen an den durchsuchten Spalten, Statuswechsel lassen den Index in Ruhe
+    "CREATE TRIGGER IF NOT EXISTS buchung_suche_au AFTER UPDATE OF benutzer_name, benutzer_email, zweck "
+    "ON buchung BEGIN "
+    "INSERT INTO buchung_suche (buchung_suche, rowid, benutzer_name, benutzer_email, zweck) "
+    "VALUES ('delete', old.id, old.benutzer_name, old.benutzer_email, old.zweck); "
+    "INSERT INTO buchung_suche (rowid, benutzer_name, benutzer_email, zweck) "
+    "VALUES (new.id, new.benutzer_name, new.benutzer_email, new.zweck); END",
+]
+
+def suchindex_einrichten(engine, neu_aufbauen=False):
+    """Legt den Suchindex an (idempotent); neu_aufbauen=True baut ihn aus den bestehenden Buchungen neu auf"""
+    try:
+        with engine.begin() as conn:
+            if engine.dialect.name == 'sqlite':
+                vorhanden = conn.execute(db.text(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'buchung_suche'")).first() is not None
+                if neu_aufbauen and vorhanden:
+                    conn.execute(db.text("DROP TABLE buchung_suche"))
+                for ddl in SUCHE_FTS5_DDL:
+                    conn.execute(db.text(ddl))
+                if neu_aufbauen or not vorhanden:
+                    # Bestehende Buchungen in den neuen Index übernehmen
+                    conn.execute(db.text("INSERT INTO buchung_suche (buchung_suche) VALUES ('rebuild')"))
+                return 'fts5'
+            if engine.dialect.name == 'postgresql':
+                conn.execute(db.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                conn.execute(db.text(
+                    f"CREATE INDEX IF NOT EXISTS ix_buchung_suche_trgm ON buchung "
+                    f"USING gin ({SUCHE_PG_TEXT} gin_trgm_ops)"))
+                return 'trgm'
+    except Exception as e:
+        logger.warning(f"Suchindex konnte nicht angelegt werden, Suche ohne Index: {str(e)}")
+    return 'like'
+
+def suche_buchungen(begriffe, limit, nach=None):
+    """
+    Buchungs-IDs mit Rang (kleiner = besser) in Rangfolge, alle Begriffe müssen vorkommen (Präfixsuche).
+    nach=(rang, id) setzt hinter diesem Treffer fort (Keyset-Paging).
+    """
+    parameter = {'limit': limit}
+    modus = _suche_modus['modus']
+    if modus == 'fts5':
+        # bm25 gewichtet Treffer im Namen vor E-Mail und Zweck
+        parameter['q'] = ' '.join(f'"{b}"*' for b in begriffe)
+        innen = ("SELECT rowid AS id, bm25(buchung_suche, 10.0, 5.0, 1.0) AS rang "
+                 "FROM buchung_suche WHERE buchung_suche MATCH :q")
+    else:
+        bedingungen = []
+        for i, begriff in enumerate(begriffe):
+            parameter[f'b{i}'] = '%' + begriff.replace('_', r'\_') + '%'
+            bedingungen.append(f"{SUCHE_PG_TEXT} ILIKE :b{i} ESCAPE '\\'" if modus == 'trgm'
+                               else f"lower({SUCHE_PG_TEXT}) LIKE :b{i} ESCAPE '\\'")
+        if modus == 'trgm':
+            parameter['q'] = ' '.join(begriffe)
+            rang = f"-word_similarity(:q, {SUCHE_PG_TEXT})"
+        else:
+            rang = "0.0"
+        innen = f"SELECT id, {rang} AS rang FROM buchung WHERE {' AND '.join(bedingungen)}"
+
+    sql = f"SELECT id, rang FROM ({innen}) AS treffer"
+    if nach is not None:
+        sql += " WHERE (rang > :nach_rang OR (rang = :nach_rang AND id > :nach_id))"
+        parameter.update(nach_rang=nach[0], nach_id=nach[1])
+    sql += " ORDER BY rang, id LIMIT :limit"
+    return [(zeile.id, float(zeile.rang)) for zeile in db.session.execute(db.text(sql), parameter)]
+
+@app.route('/api/admin/suche')
+@admin_required
+@replica_lesen
+def admin_suche():
+    """Gerankte Suche über Name, E-Mail und Zweck; Folgeseiten über ?cursor=<rang>_<id>"""
+    begriffe = re.findall(r'\w+', request.args.get('q', '').lower())[:SUCHE_MAX_BEGRIFFE]
+    if not begriffe:
+        return jsonify({'error': 'Suchbegriff fehlt'}), 400
+    limit = min(request.args.get('limit', SUCHE_LIMIT, type=int), 200)
+
+    nach = None
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            rang, buchung_id = cursor.rsplit('_', 1)
+            nach = (float(rang), int(buchung_id))
+        except ValueError:
+            return jsonify({'error': 'Ungültiger Cursor'}), 400
+
+    treffer = suche_buchungen(begriffe, limit + 1, nach)
+    hat_mehr = len(treffer) > limit
+    treffer = treffer[:limit]
+
+    buchungen = {b.id: b for b in Buchung.query.filter(Buchung.id.in_([t[0] for t in treffer])).all()}
+    raum_namen = get_raum_namen()
+    ergebnisse = []
+    for buchung_id, rang in treffer:
+        b = buchungen.get(buchung_id)
+        if b is None:
+            continue
+        eintrag = buchung_to_dict(b, raum_namen)
+        eintrag.update({'is_active': b.is_active, 'erstellt_am': b.erstellt_am.isoformat() if b.erstellt_am else None,
+                        'rang': rang})
+        ergebnisse.append(eintrag)
+
+    response = jsonify(ergebnisse)
+    if hat_mehr:
+        response.headers['X-Naechster-Cursor'] = f'{treffer[-1][1]!r}_{treffer[-1][0]}'
+    return response
 
 @app.route('/api/admin/stats')
 @admin_required
+@replica_lesen
 def get_admin_stats():
     total = Buchung.query.count()
     pending = Buchung.query.filter_by(status='ausstehend', is_active=True).count()
     confirmed = Buchung.query.filter_by(status='bestätigt', is_active=True).count()
     rejected = Buchung.query.filter_by(status='abgelehnt', is_active=True).count()
     deleted = Buchung.query.filter_by(is_active=False).count()
+    expired = Buchung.query.filter_by(status='abgelaufen', is_active=True).count()
 
     return jsonify({
         'total': total,
         'pending': pending,
         'confirmed': confirmed,
         'rejected': rejected,
-        'deleted': deleted
+        'deleted': deleted,
+        'expired': expired,
+        'ablauf': get_ablauf_metriken()
     })
 
+# Auslastungsstatistik (Heatmap Wochentag x Stunde, Verlauf pro Monat)
+AUSLASTUNG_RASTER = {'stunde': 3600, 'tag': 86400}
+AUSLASTUNG_MAX_TAGE = 366 * 10
+AUSLASTUNG_CACHE_GROESSE = 32
+_auslastung_cache = OrderedDict()  # (von, bis, raster, raum_id) -> (aenderung_seq, ergebnis)
+_auslastung_lock = threading.Lock()
+
+def _belegung_pro_intervall(starts, enden, kanten):
+    """
+    Belegte Sekunden je Intervall [kanten[k], kanten[k+1]) ohne Schleife über die Buchungen:
+    F(t) = Summe der bis t belegten Zeit = sum(t - s | s < t) - sum(t - e | e < t), Ergebnis = diff(F(kanten)).
+    starts, enden und kanten sind Sekunden relativ zum Fensterbeginn.
+    """
+    if np is not None:
+        starts, enden = np.sort(starts), np.sort(enden)
+        kum_s = np.concatenate(([0.0], np.cumsum(starts)))
+        kum_e = np.concatenate(([0.0], np.cumsum(enden)))
+        n_s = np.searchsorted(starts, kanten, side='left')
+        n_e = np.searchsorted(enden, kanten, side='left')
+        belegt_bis = (kanten * n_s - kum_s[n_s]) - (kanten * n_e - kum_e[n_e])
+        return np.minimum(np.diff(belegt_bis), np.diff(kanten))
+
+    starts, enden = sorted(starts), sorted(enden)
+    kum_s = [0] + list(accumulate(starts))
+    kum_e = [0] + list(accumulate(enden))
+    belegt_bis = []
+    for t in kanten:
+        n_s, n_e = bisect_left(starts, t), bisect_left(enden, t)
+        belegt_bis.append((t * n_s - kum_s[n_s]) - (t * n_e - kum_e[n_e]))
+    return [min(b - a, k2 - k1) for a, b, k1, k2 in zip(belegt_bis, belegt_bis[1:], kanten, kanten[1:])]
+
+def _belegung_vereinigen(raeume, starts, enden):
+    """
+    Vereinigt überlappende Buchungen desselben Raums, damit doppelt belegte Zeit nur einmal zählt.
+    Gibt (starts, enden) der vereinigten Intervalle zurück; Zeiten wie bei _belegung_pro_intervall.
+    """
+    if np is not None:
+        if not len(starts):
+            return starts, enden
+        # Räume durch einen Versatz > Fensterlänge trennen, dann genügt ein laufendes Maximum über alle Enden
+        raum_index = np.unique(raeume, return_inverse=True)[1]
+        versatz = raum_index * (max(enden.max(), 0) + 1)
+        reihenfolge = np.lexsort((starts, raum_index))
+        versatz = versatz[reihenfolge]
+        s, e = starts[reihenfolge] + versatz, enden[reihenfolge] + versatz
+        e_max = np.maximum.accumulate(e)
+        neu = np.ones(len(s), dtype=bool)
+        neu[1:] = s[1:] > e_max[:-1]
+        anfang = np.flatnonzero(neu)
+        ende = np.append(anfang[1:], len(s)) - 1
+        return s[anfang] - versatz[anfang], e_max[ende] - versatz[anfang]
+
+    vereinigt_s, vereinigt_e = [], []
+    letzter_raum = None
+    for raum, s, e in sorted(zip(raeume, starts, enden)):
+        if raum == letzter_raum and s <= vereinigt_e[-1]:
+            vereinigt_e[-1] = max(vereinigt_e[-1], e)
+        else:
+            vereinigt_s.append(s)
+            vereinigt_e.append(e)
+            letzter_raum = raum
+    return vereinigt_s, vereinigt_e
+
+def berechne_auslastung(von, bis, raster, raum_id=None):
+    """Auslastung bestätigter Buchungen im Fenster [von, bis) im Stunden- oder Tagesraster"""
+    schritt = AUSLASTUNG_RASTER[raster]
+    query = db.session.query(Buchung.start_datum, Buchung.end_datum, Buchung.raum_id).filter(
+        Buchung.status == 'bestätigt',
+        Buchung.is_active == True,
+        Buchung.start_datum < bis,
+        Buchung.end_datum > von
+    )
+    if raum_id:
+        query = query.filter(Buchung.raum_id == raum_id)
+    zeilen = query.all()
+
+    anzahl = int((bis - von).total_seconds()) // schritt
+    fenster = anzahl * schritt
+    stunden_pro_tag = 24 if raster == 'stunde' else 1
+    erster_wochentag = von.weekday()
+
+    if np is not None:
+        basis = np.datetime64(von, 's')
+        if zeilen:
+            # Spaltenweise umwandeln: deutlich schneller als ein 2D-Array aus den Ergebniszeilen
+            start_spalte, end_spalte, raum_spalte = zip(*zeilen)
+            starts = np.clip((np.array(start_spalte, dtype='datetime64[s]') - basis).astype(np.float64), 0, fenster)
+            enden = np.clip((np.array(end_spalte, dtype='datetime64[s]') - basis).astype(np.float64), 0, fenster)
+            starts, enden = _belegung_vereinigen(np.array(raum_spalte), starts, enden)
+        else:
+            starts = enden = np.zeros(0)
+        kanten = np.arange(anzahl + 1, dtype=np.float64) * schritt
+        belegt = _belegung_pro_intervall(starts, enden, kanten)
+
+        index = np.arange(anzahl)
+        tag = index // stunden_pro_tag
+        wochentag = (erster_wochentag + tag) % 7
+        zelle = wochentag * stunden_pro_tag + index % stunden_pro_tag
+        zellen_belegt = np.bincount(zelle, weights=belegt, minlength=7 * stunden_pro_tag)
+        zellen_anzahl = np.bincount(zelle, minlength=7 * stunden_pro_tag)
+        heatmap = np.divide(zellen_belegt * 100, zellen_anzahl * schritt,
+                            out=np.zeros(7 * stunden_pro_tag), where=zellen_anzahl > 0)
+        heatmap = heatmap.reshape(7, stunden_pro_tag).round(1).tolist()
+
+        monat_je_tag = (np.datetime64(von.date(), 'D') + tag).astype('datetime64[M]')
+        monate, monat_index = np.unique(monat_je_tag, return_inverse=True)
+        monat_belegt = np.bincount(monat_index, weights=belegt)
+        monat_anzahl = np.bincount(monat_index)
+        monatsverlauf = [{
+            'monat': str(m),
+            'gebuchte_stunden': round(float(b) / 3600, 1),
+            'auslastung_prozent': round(float(b) * 100 / (int(n) * schritt), 2)
+        } for m, b, n in zip(monate, monat_belegt, monat_anzahl)]
+        gesamt_belegt = float(belegt.sum())
+    else:
+        starts = [min(max((s - von).total_seconds(), 0), fenster) for s, _, _ in zeilen]
+        enden = [min(max((e - von).total_seconds(), 0), fenster) for _, e, _ in zeilen]
+        starts, enden = _belegung_vereinigen([r for _, _, r in zeilen], starts, enden)
+        belegt = _belegung_pro_intervall(starts, enden, [k * schritt for k in range(anzahl + 1)])
+
+        zellen_belegt = [0.0] * (7 * stunden_pro_tag)
+        zellen_anzahl = [0] * (7 * stunden_pro_tag)
+        monat_summen = OrderedDict()
+        for k, b in enumerate(belegt):
+            tag = k // stunden_pro_tag
+            zelle = ((erster_wochentag + tag) % 7) * stunden_pro_tag + k % stunden_pro_tag
+            zellen_belegt[zelle] += b
+            zellen_anzahl[zelle] += 1
+            monat = (von + timedelta(days=tag)).strftime('%Y-%m')
+            summe = monat_summen.setdefault(monat, [0.0, 0])
+            summe[0] += b
+            summe[1] += 1
+        werte = [round(b * 100 / (n * schritt), 1) if n else 0.0 for b, n in zip(zellen_belegt, zellen_anzahl)]
+        heatmap = [werte[w * stunden_pro_tag:(w + 1) * stunden_pro_tag] for w in range(7)]
+        monatsverlauf = [{
+            'monat': m,
+            'gebuchte_stunden': round(b / 3600, 1),
+            'auslastung_prozent': round(b * 100 / (n * schritt), 2)
+        } for m, (b, n) in monat_summen.items()]
+        gesamt_belegt = sum(belegt)
+
+    return {
+        'von': von.date().isoformat(),
+        'bis': bis.date().isoformat(),
+        'raster': raster,
+        'buchungen': len(zeilen),
+        'gebuchte_stunden': round(gesamt_belegt / 3600, 1),
+        'auslastung_prozent': round(gesamt_belegt * 100 / fenster, 2) if fenster else 0.0,
+        # Zeilen = Wochentage (0 = Montag), Spalten = Stunden (raster=stunde) bzw. eine Spalte (raster=tag)
+        'heatmap': heatmap,
+        'monate': monatsverlauf
+    }
+
+@app.route('/api/admin/auslastung')
+@admin_required
+@replica_lesen
+def get_admin_auslastung():
+    """Auslastung nach Wochentag/Stunde und pro Monat, z.B. ?von=2024-01-01&bis=2025-01-01&raster=stunde"""
+    raster = request.args.get('raster', 'stunde')
+    raum_id = request.args.get('raum_id', type=int)
+    if raster not in AUSLASTUNG_RASTER:
+        return jsonify({'error': 'raster muss stunde oder tag sein'}), 400
+
+    heute = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    try:
+        bis = datetime.fromisoformat(request.args['bis']) if request.args.get('bis') else heute + timedelta(days=1)
+        von = datetime.fromisoformat(request.args['von']) if request.args.get('von') else bis - timedelta(days=365)
+    except ValueError:
+        return jsonify({'error': 'von/bis müssen im Format JJJJ-MM-TT angegeben werden'}), 400
+    von = von.replace(hour=0, minute=0, second=0, microsecond=0)
+    bis = bis.replace(hour=0, minute=0, second=0, microsecond=0)
+    if not von < bis:
+        return jsonify({'error': 'von muss vor bis liegen'}), 400
+    if (bis - von).days > AUSLASTUNG_MAX_TAGE:
+        return jsonify({'error': f'Zeitraum darf höchstens {AUSLASTUNG_MAX_TAGE} Tage umfassen'}), 400
+
+    # Cache-Eintrag gilt, solange sich keine Buchung geändert hat (globaler Änderungszähler)
+    schluessel = (von, bis, raster, raum_id)
+    seq = aktuelle_aenderung_seq()
+    with _auslastung_lock:
+        eintrag = _auslastung_cache.get(schluessel)
+        if eintrag and eintrag[0] == seq:
+            _auslastung_cache.move_to_end(schluessel)
+            return jsonify(eintrag[1])
+
+    ergebnis = berechne_auslastung(von, bis, raster, raum_id)
+    with _auslastung_lock:
+        _auslastung_cache[schluessel] = (seq, ergebnis)
+        _auslastung_cache.move_to_end(schluessel)
+        while len(_auslastung_cache) > AUSLASTUNG_CACHE_GROESSE:
+            _auslastung_cache.popitem(last=False)
+    return jsonify(ergebnis)
+
 @app.route('/api/admin/verify-pin', methods=['POST'])
 @limiter.limit("5 per 15 minutes")  # Max 5 Versuche pro 15 Minuten
 def verify_admin_pin():
@@ -975,7 +3488,9 @@ def get_admin_settings():
 
     return jsonify({
         'admin_email': admin_email,
-        'saal_verantwortlicher_email': saal_email
+        'saal_verantwortlicher_email': saal_email,
+        'benachrichtigung_modus': get_benachrichtigung_modus(),
+        'digest_intervall_minuten': get_digest_intervall_minuten()
     })
 
 @app.route('/api/admin/settings/saal-email', methods=['POST'])
@@ -997,6 +3512,34 @@ def update_saal_email():
         'email': email
     })
 
+@app.route('/api/admin/settings/benachrichtigung', methods=['POST'])
+@admin_required
+def update_benachrichtigung():
+    """Setzt den Modus der Admin-Benachrichtigungen (sofort/digest) und das Digest-Intervall"""
+    data = request.json
+    modus = data.get('modus', 'sofort')
+    intervall = data.get('intervall_minuten', DIGEST_INTERVALL_STANDARD)
+
+    if modus not in BENACHRICHTIGUNG_MODI:
+        return jsonify({'error': 'Ungültiger Benachrichtigungsmodus'}), 400
+
+    try:
+        intervall = int(intervall)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Ungültiges Intervall'}), 400
+    if not 1 <= intervall <= 24 * 60:
+        return jsonify({'error': 'Das Intervall muss zwischen 1 und 1440 Minuten liegen'}), 400
+
+    set_setting('admin_benachrichtigung_modus', modus, 'Admin-Benachrichtigungen: sofort oder digest')
+    set_setting('admin_digest_intervall_minuten', str(intervall), 'Intervall des Admin-Digests in Minuten')
+
+    return jsonify({
+        'success': True,
+        'message': 'Benachrichtigungseinstellungen wurden aktualisiert',
+        'modus': modus,
+        'intervall_minuten': intervall
+    })
+
 # E-Mail-basierte Bestätigung/Ablehnung
 @app.route('/buchung/bestaetigen/<token>')
 def confirm_buchung_email(token):
@@ -1016,11 +3559,7 @@ def confirm_buchung_email(token):
                                typ='error')
 
     if buchung.status != 'ausstehend':
-        status_text = 'bereits bestätigt' if buchung.status == 'bestätigt' else 'bereits abgelehnt'
-        return render_template('message.html',
-                               title='Bereits bearbeitet',
-                               message=f'Diese Buchung wurde {status_text}.',
-                               typ='warning')
+        return bereits_bearbeitet_seite(buchung)
 
     # Prüfe auf Überschneidungen (nur aktive Buchungen)
     ueberschneidungen = Buchung.query.filter(
@@ -1038,8 +3577,8 @@ def confirm_buchung_email(token):
                                message='Diese Buchung kann nicht bestätigt werden, da es eine Überschneidung mit einer anderen Buchung gibt.',
                                typ='error')
 
-    buchung.status = 'bestätigt'
-    db.session.commit()
+    if not status_uebergang(buchung, 'bestätigt', 'bestaetigt', 'email'):
+        return bereits_bearbeitet_seite(buchung)
 
     # Sende Bestätigungs-E-Mail an Benutzer
     send_user_confirmation(buchung)
@@ -1067,14 +3606,10 @@ def reject_buchung_email(token):
                                typ='error')
 
     if buchung.status != 'ausstehend':
-        status_text = 'bereits bestätigt' if buchung.status == 'bestätigt' else 'bereits abgelehnt'
-        return render_template('message.html',
-                               title='Bereits bearbeitet',
-                               message=f'Diese Buchung wurde {status_text}.',
-                               typ='warning')
+        return bereits_bearbeitet_seite(buchung)
 
-    buchung.status = 'abgelehnt'
-    db.session.commit()
+    if not status_uebergang(buchung, 'abgelehnt', 'abgelehnt', 'email'):
+        return bereits_bearbeitet_seite(buchung)
 
     return render_template('message.html',
                            title='Buchung abgelehnt',
@@ -1110,6 +3645,7 @@ def cancel_buchung_user(token):
     # Markiere Buchung als gelöscht (statt sie zu löschen)
     buchung.is_active = False
     buchung.geloescht_am = datetime.utcnow()
+    protokolliere(buchung, 'storniert', 'benutzer')
     db.session.commit()
 
     return render_template('message.html',
@@ -1117,17 +3653,863 @@ def cancel_buchung_user(token):
                            message=f'Ihre Buchung wurde erfolgreich storniert. Der Administrator wurde informiert.',
                            typ='success')
 
+# Statische Assets: Build-Schritt (minifizieren, Hash im Dateinamen, vorkomprimieren) und Auslieferung
+ASSET_DIST_DIR = os.path.join(app.static_folder, 'dist')
+ASSET_MANIFEST_PATH = os.path.join(ASSET_DIST_DIR, 'manifest.json')
+ASSET_QUELLEN = ['js/calendar.js', 'css/style.css']
+_asset_manifest = {'mtime': None, 'eintraege': {}}
+
+def minify_css(quelltext):
+    """Einfache, konservative CSS-Minifizierung (Kommentare und überflüssige Leerzeichen)"""
+    teile = re.split(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')''', quelltext)
+    ergebnis = []
+    for i, teil in enumerate(teile):
+        if i % 2 == 1:
+            ergebnis.append(teil)  # String-Literal unverändert übernehmen
+            continue
+        teil = re.sub(r'/\*.*?\*/', '', teil, flags=re.S)
+        teil = re.sub(r'\s+', ' ', teil)
+        teil = re.sub(r'\s*([{};,>])\s*', r'\1', teil)
+        teil = re.sub(r':\s+', ':', teil)
+        teil = teil.replace(';}', '}')
+        ergebnis.append(teil)
+    return ''.join(ergebnis).strip()
+
+JS_REGEX_DAVOR = set('(,=:[!&|?{};+-*%<>~^')
+JS_REGEX_SCHLUESSELWOERTER = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void',
+                              'throw', 'instanceof', 'yield', 'await'}
+
+def minify_js(quelltext):
+    """
+    Konservative JS-Minifizierung: entfernt Kommentare, Einrückung und Leerzeilen.
+    Zeilenumbrüche bleiben erhalten (keine Probleme mit automatischer Semikolon-Einfügung),
+    String-, Template- (auch verschachtelt) und Regex-Literale bleiben unverändert.
+    """
+    ausgabe = []
+    zeile = []
+    i = 0
+    n = len(quelltext)
+    # Stack: 'code' oder 'template'; Klammertiefe je Code-Ebene für ${ ... }
+    modus = ['code']
+    klammern = [0]
+
+    def zeile_abschliessen():
+        text = ''.join(zeile).strip()
+        if text:
+            ausgabe.append(text)
+        zeile.clear()
+
+    def regex_erlaubt():
+        # Ein '/' beginnt ein Regex-Literal, wenn davor kein Wert steht (Operator, Klammer, Schlüsselwort)
+        davor = ''.join(zeile).rstrip() or (ausgabe[-1] if ausgabe else '')
+        if not davor:
+            return True
+        if davor[-1] in JS_REGEX_DAVOR:
+            return True
+        wort = re.search(r'[A-Za-z_$][\w$]*$', davor)
+        return wort is not None and wort.group(0) in JS_REGEX_SCHLUESSELWOERTER
+
+    while i < n:
+        c = quelltext[i]
+        if modus[-1] == 'template':
+            if c == '\\':
+                zeile.append(quelltext[i:i + 2])
+                i += 2
+            elif c == '`':
+                zeile.append(c)
+                modus.pop()
+                i += 1
+            elif quelltext.startswith('${', i):
+                zeile.append('${')
+                modus.append('code')
+                klammern.append(0)
+                i += 2
+            else:
+                zeile.append(c)
+                i += 1
+            continue
+
+        if quelltext.startswith('//', i):
+            ende = quelltext.find('\n', i)
+            i = n if ende == -1 else ende
+        elif quelltext.startswith('/*', i):
+            ende = quelltext.find('*/', i + 2)
+            i = n if ende == -1 else ende + 2
+        elif c in '\'"':
+            j = i + 1
+            while j < n and quelltext[j] != c:
+                j += 2 if quelltext[j] == '\\' else 1
+            zeile.append(quelltext[i:j + 1])
+            i = j + 1
+        elif c == '/' and regex_erlaubt():
+            # Regex-Literal bis zum schließenden '/' außerhalb einer Zeichenklasse, danach die Flags
+            j, klasse = i + 1, False
+            while j < n and quelltext[j] != '\n':
+                if quelltext[j] == '\\':
+                    j += 1
+                elif quelltext[j] == '[':
+                    klasse = True
+                elif quelltext[j] == ']':
+                    klasse = False
+                elif quelltext[j] == '/' and not klasse:
+                    break
+                j += 1
+            if j >= n or quelltext[j] != '/':
+                # Kein vollständiges Literal in dieser Zeile: doch eine Division
+                zeile.append(c)
+                i += 1
+                continue
+            j += 1
+            while j < n and (quelltext[j].isalnum() or quelltext[j] in '_$'):
+                j += 1
+            zeile.append(quelltext[i:j])
+            i = j
+        elif c == '`':
+            zeile.append(c)
+            modus.append('template')
+            i += 1
+        elif c == '{':
+            klammern[-1] += 1
+            zeile.append(c)
+            i += 1
+        elif c == '}':
+            if klammern[-1] == 0 and len(modus) > 1:
+                # Ende eines ${ ... } Ausdrucks, zurück ins Template-Literal
+                modus.pop()
+                klammern.pop()
+            else:
+                klammern[-1] -= 1
+            zeile.append(c)
+            i += 1
+        elif c == '\n' and len(modus) == 1:
+            zeile_abschliessen()
+            i += 1
+        else:
+            zeile.append(c)
+            i += 1
+
+    zeile_abschliessen()
+    return '\n'.join(ausgabe) + '\n'
+
+def build_assets(dist_dir=ASSET_DIST_DIR):
+    """Erzeugt minifizierte, gehashte und vorkomprimierte Assets samt Manifest"""
+    import shutil
+
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+
+    manifest = {}
+    for quelle in ASSET_QUELLEN:
+        with open(os.path.join(app.static_folder, quelle), encoding='utf-8') as f:
+            inhalt = f.read()
+
+        minifiziert = minify_js(inhalt) if quelle.endswith('.js') else minify_css(inhalt)
+        daten = minifiziert.encode('utf-8')
+        fingerprint = hashlib.sha256(daten).hexdigest()[:12]
+
+        basis, endung = os.path.splitext(quelle)
+        ziel = f'{basis}.{fingerprint}.min{endung}'
+        ziel_pfad = os.path.join(dist_dir, ziel)
+        os.makedirs(os.path.dirname(ziel_pfad), exist_ok=True)
+
+        with open(ziel_pfad, 'wb') as f:
+            f.write(daten)
+        with open(ziel_pfad + '.gz', 'wb') as f:
+            f.write(gzip.compress(daten, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(ziel_pfad + '.br', 'wb') as f:
+                f.write(brotli.compress(daten, quality=11))
+
+        manifest[quelle] = ziel
+        yield quelle, ziel, len(inhalt.encode('utf-8')), len(daten)
+
+    with open(os.path.join(dist_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+def get_asset_manifest():
+    """Lädt das Asset-Manifest (neu, falls es seit dem letzten Laden neu gebaut wurde)"""
+    try:
+        mtime = os.path.getmtime(ASSET_MANIFEST_PATH)
+    except OSError:
+        return {}
+
+    if _asset_manifest['mtime'] != mtime:
+        with open(ASSET_MANIFEST_PATH, encoding='utf-8') as f:
+            _asset_manifest['eintraege'] = json.load(f)
+        _asset_manifest['mtime'] = mtime
+    return _asset_manifest['eintraege']
+
+@app.template_global()
+def asset_url(filename):
+    """url_for für statische Dateien, löst gebaute (gehashte) Dateinamen auf"""
+    gebaut = get_asset_manifest().get(filename)
+    if gebaut:
+        return url_for('asset', filename=gebaut)
+    return url_for('static', filename=filename)
+
+@app.route('/assets/<path:filename>')
+@limiter.exempt
+def asset(filename):
+    """Liefert gebaute Assets aus, bevorzugt die vorkomprimierte Variante"""
+    akzeptiert = request.accept_encodings
+    varianten = []
+    if akzeptiert['br'] and brotli is not None:
+        varianten.append(('.br', 'br'))
+    if akzeptiert['gzip']:
+        varianten.append(('.gz', 'gzip'))
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    for endung, encoding in varianten:
+        if os.path.isfile(os.path.join(ASSET_DIST_DIR, filename + endung)):
+            response = send_from_directory(ASSET_DIST_DIR, filename + endung, mimetype=mimetype)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(ASSET_DIST_DIR, filename, mimetype=mimetype)
+
+    # Dateiname enthält den Inhalts-Hash, daher unbegrenzt cachebar
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.vary.add('Accept-Encoding')
+    return response
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Minifiziert und fingerprintet die statischen Assets (static/dist)"""
+    for quelle, ziel, vorher, nachher in build_assets():
+        print(f"[OK] {quelle} -> dist/{ziel} ({vorher} -> {nachher} Bytes)")
+    if brotli is None:
+        print("[WARNUNG] Brotli nicht installiert, es wurden keine .br Dateien erzeugt")
+    invalidate_raum_cache()
+
+# Datenbank-Wartung
+@app.cli.command('db-optimize')
+def db_optimize_command():
+    """Aktualisiert die Planer-Statistiken (SQLite: optimize/ANALYZE + WAL-Checkpoint, PostgreSQL: ANALYZE)"""
+    with db.engine.connect() as conn:
+        if ist_sqlite():
+            conn.exec_driver_sql('PRAGMA optimize')
+            conn.exec_driver_sql('ANALYZE')
+            ergebnis = conn.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+            print("[OK] PRAGMA optimize und ANALYZE ausgeführt")
+            if ergebnis is not None:
+                print(f"[OK] WAL-Checkpoint: busy={ergebnis[0]}, log={ergebnis[1]}, checkpointed={ergebnis[2]}")
+        else:
+            conn.execute(db.text('ANALYZE'))
+            print("[OK] ANALYZE ausgeführt")
+        conn.commit()
+
+# Backup und Wiederherstellung (flask db-backup / db-verify / db-restore)
+# Archiv = tar mit manifest.json (Prüfsummen) und gzip-komprimierten Dateien:
+#   SQLite, voll: Kopie der Datenbankdatei über die Backup-API
+#   PostgreSQL, voll: eine CSV-Datei pro Tabelle (COPY)
+#   inkrementell (beide): CSV der seit dem Basis-Backup geänderten Zeilen, kleine Tabellen vollständig,
+#   dazu pro Tabelle alle Primärschlüssel, damit gelöschte Zeilen auch beim Einspielen verschwinden
+BACKUP_DIR = os.getenv('BACKUP_DIR', 'backups')
+BACKUP_OVERLAP_SECONDS = 300  # Zeilen, die vor dem Stichtag geändert, aber erst danach committet wurden
+BACKUP_AENDERUNGSSPALTEN = {'buchung': 'geaendert_am', 'buchung_event': 'zeitpunkt'}
+BACKUP_NULL = '\\N'
+BACKUP_MANIFEST = 'manifest.json'
+
+def _sha256_datei(pfad):
+    pruefsumme = hashlib.sha256()
+    with open(pfad, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            pruefsumme.update(block)
+    return pruefsumme.hexdigest()
+
+def _sqlite_zeitstempel(zeitpunkt):
+    # Speicherformat von SQLAlchemy für DateTime-Spalten in SQLite
+    return zeitpunkt.strftime('%Y-%m-%d %H:%M:%S.%f')
+
+def _backup_tabellen():
+    return [t.name for t in db.metadata.sorted_tables]
+
+def _primaerschluessel(tabelle):
+    return [c.name for c in db.metadata.tables[tabelle].primary_key]
+
+def _tabelle_exportieren(raw, tabelle, ziel, spalte=None, grenze=None, spalten=None):
+    """Schreibt eine Tabelle (bzw. die ab `grenze` geänderten Zeilen) als gzip-CSV; gibt (Spalten, Zeilen) zurück"""
+    spalten = spalten or [c.name for c in db.metadata.tables[tabelle].columns]
+    liste = ', '.join(f'"{c}"' for c in spalten)
+    cursor = raw.cursor()
+    try:
+        if ist_sqlite():
+            sql = f'SELECT {liste} FROM "{tabelle}"'
+            parameter = ()
+            if spalte:
+                sql += f' WHERE "{spalte}" >= ?'
+                parameter = (_sqlite_zeitstempel(grenze),)
+            cursor.execute(sql, parameter)
+            zeilen = 0
+            with gzip.open(ziel, 'wt', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(spalten)
+                for zeile in cursor:
+                    writer.writerow([BACKUP_NULL if wert is None else wert for wert in zeile])
+                    zeilen += 1
+            return spalten, zeilen
+
+        if spalte:
+            # Kein Bind-Parameter in COPY möglich; grenze ist ein datetime-Objekt, kein Benutzereingabe-Text
+            quelle = f"(SELECT {liste} FROM \"{tabelle}\" WHERE \"{spalte}\" >= '{grenze.isoformat()}')"
+        else:
+            quelle = f'"{tabelle}" ({liste})'
+        with gzip.open(ziel, 'wb') as f:
+            cursor.copy_expert(f"COPY {quelle} TO STDOUT WITH (FORMAT csv, HEADER true, NULL '{BACKUP_NULL}')", f)
+        return spalten, cursor.rowcount
+    finally:
+        cursor.close()
+
+def _sqlite_datei_sichern(ziel):
+    """Konsistente Kopie der laufenden SQLite-Datenbank, ohne Schreiber zu sperren"""
+    quelle = sqlite3.connect(db.engine.url.database)
+    kopie_pfad = ziel + '.db'
+    kopie = sqlite3.connect(kopie_pfad)
+    try:
+        # In einem Schritt: ein schrittweises Backup beginnt nach jedem fremden Schreibzugriff von vorn und
+        # wird bei ständigen Schreibern nie fertig. Im WAL-Modus blockiert der Lese-Snapshot die Schreiber nicht.
+        quelle.backup(kopie)
+    finally:
+        kopie.close()
+        quelle.close()
+    with open(kopie_pfad, 'rb') as f_in, gzip.open(ziel, 'wb') as f_out:
+        for block in iter(lambda: f_in.read(1024 * 1024), b''):
+            f_out.write(block)
+    os.remove(kopie_pfad)
+
+def backup_manifest(archiv):
+    with tarfile.open(archiv) as tar:
+        return json.load(tar.extractfile(BACKUP_MANIFEST))
+
+def _letztes_backup(verzeichnis):
+    """Neuestes Archiv dieser Datenbank-Art im Verzeichnis (Basis für ein inkrementelles Backup)"""
+    kandidaten = []
+    for name in os.listdir(verzeichnis) if os.path.isdir(verzeichnis) else []:
+        if not name.endswith('.tar'):
+            continue
+        try:
+            manifest = backup_manifest(os.path.join(verzeichnis, name))
+        except (OSError, KeyError, ValueError, tarfile.TarError):
+            continue
+        if manifest.get('dialekt') == db.engine.dialect.name:
+            kandidaten.append((manifest['erstellt_am'], name))
+    return max(kandidaten)[1] if kandidaten else None
+
+def backup_erstellen(verzeichnis=BACKUP_DIR, inkrementell=False):
+    """Erstellt ein volles oder inkrementelles Backup; gibt (Archivpfad, Manifest) zurück"""
+    jetzt = datetime.utcnow()
+    basis = _letztes_backup(verzeichnis) if inkrementell else None
+    if inkrementell and basis is None:
+        raise ValueError(f'Kein Basis-Backup in {verzeichnis} gefunden, zuerst ein volles Backup erstellen')
+    grenze = None
+    if basis:
+        grenze = datetime.fromisoformat(backup_manifest(os.path.join(verzeichnis, basis))['erstellt_am'])
+        grenze -= timedelta(seconds=BACKUP_OVERLAP_SECONDS)
+
+    os.makedirs(verzeichnis, exist_ok=True)
+    name = f"raumbuchung-{jetzt.strftime('%Y%m%dT%H%M%S')}-{'inkr' if basis else 'voll'}.tar"
+    dateien = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        if ist_sqlite() and not basis:
+            pfad = os.path.join(tmp, 'datenbank.sqlite3.gz')
+            _sqlite_datei_sichern(pfad)
+            dateien['datenbank.sqlite3.gz'] = {}
+        else:
+            raw = db.engine.raw_connection()
+            try:
+                # Ein Snapshot für alle Tabellen, damit Fremdschlüssel zusammenpassen
+                cursor = raw.cursor()
+                cursor.execute('BEGIN' if ist_sqlite() else 'SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+                cursor.close()
+                for tabelle in _backup_tabellen():
+                    spalte = BACKUP_AENDERUNGSSPALTEN.get(tabelle) if basis else None
+                    datei = f'{tabelle}.csv.gz'
+                    spalten, zeilen = _tabelle_exportieren(raw, tabelle, os.path.join(tmp, datei), spalte, grenze)
+                    dateien[datei] = {'tabelle': tabelle, 'spalten': spalten, 'zeilen': zeilen}
+                    if basis:
+                        # Alle vorhandenen Schlüssel: was hier fehlt, wurde seit dem Basis-Backup gelöscht
+                        datei = f'{tabelle}.schluessel.csv.gz'
+                        spalten, zeilen = _tabelle_exportieren(raw, tabelle, os.path.join(tmp, datei),
+                                                               spalten=_primaerschluessel(tabelle))
+                        dateien[datei] = {'schluessel_von': tabelle, 'spalten': spalten, 'zeilen': zeilen}
+                raw.rollback()
+            finally:
+                raw.close()
+
+        for datei, info in dateien.items():
+            pfad = os.path.join(tmp, datei)
+            info.update({'sha256': _sha256_datei(pfad), 'bytes': os.path.getsize(pfad)})
+        manifest = {
+            'format': 1,
+            'typ': 'inkrementell' if basis else 'voll',
+            'dialekt': db.engine.dialect.name,
+            'erstellt_am': jetzt.isoformat(),
+            'basis': basis,
+            'dateien': dateien,
+        }
+        with open(os.path.join(tmp, BACKUP_MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        # Erst vollständig schreiben, dann umbenennen: ein abgebrochenes Backup hinterlässt kein halbes Archiv
+        archiv = os.path.join(verzeichnis, name)
+        with tarfile.open(archiv + '.tmp', 'w') as tar:
+            tar.add(os.path.join(tmp, BACKUP_MANIFEST), BACKUP_MANIFEST)
+            for datei in dateien:
+                tar.add(os.path.join(tmp, datei), datei)
+        os.replace(archiv + '.tmp', archiv)
+    return archiv, manifest
+
+def backup_pruefen(archiv):
+    """Prüft alle Dateien des Archivs gegen die Prüfsummen im Manifest; gibt das Manifest zurück"""
+    with tarfile.open(archiv) as tar:
+        manifest = json.load(tar.extractfile(BACKUP_MANIFEST))
+        for datei, info in manifest['dateien'].items():
+            pruefsumme = hashlib.sha256()
+            inhalt = tar.extractfile(datei)
+            for block in iter(lambda: inhalt.read(1024 * 1024), b''):
+                pruefsumme.update(block)
+            if pruefsumme.hexdigest() != info['sha256']:
+                raise ValueError(f'{os.path.basename(archiv)}: Prüfsumme von {datei} stimmt nicht')
+    return manifest
+
+def backup_kette(archiv):
+    """Volles Backup und alle inkrementellen bis einschließlich `archiv`, älteste zuerst"""
+    kette = [archiv]
+    while True:
+        basis = backup_manifest(kette[0]).get('basis')
+        if not basis:
+            return kette
+        pfad = os.path.join(os.path.dirname(archiv), basis)
+        if not os.path.exists(pfad):
+            raise ValueError(f'Basis-Backup {basis} fehlt')
+        kette.insert(0, pfad)
+
+def _csv_zeilen(pfad):
+    with gzip.open(pfad, 'rt', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader)  # Kopfzeile
+        for zeile in reader:
+            yield [None if wert == BACKUP_NULL else wert for wert in zeile]
+
+def _upsert_sql(tabelle, spalten, quelle):
+    primaer = _primaerschluessel(tabelle)
+    aenderungen = ', '.join(f'"{c}" = excluded."{c}"' for c in spalten if c not in primaer)
+    konflikt = ', '.join(f'"{c}"' for c in primaer)
+    aktion = f'DO UPDATE SET {aenderungen}' if aenderungen else 'DO NOTHING'
+    liste = ', '.join(f'"{c}"' for c in spalten)
+    return f'INSERT INTO "{tabelle}" ({liste}) {quelle} ON CONFLICT ({konflikt}) {aktion}'
+
+def _postgres_sequenzen_setzen(cursor, tabellen):
+    for tabelle in tabellen:
+        if 'id' in db.metadata.tables[tabelle].columns:
+            cursor.execute(f"SELECT setval(pg_get_serial_sequence('\"{tabelle}\"', 'id'), "
+                           f"COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) FROM \"{tabelle}\"")
+
+def _geloeschte_entfernen(cursor, manifest, tmp):
+    """Löscht Zeilen, deren Schlüssel im inkrementellen Backup fehlen (abhängige Tabellen zuerst)"""
+    schluessel_dateien = {info['schluessel_von']: (datei, info) for datei, info in manifest['dateien'].items()
+                          if 'schluessel_von' in info}
+    for tabelle in reversed(_backup_tabellen()):
+        if tabelle not in schluessel_dateien:
+            continue  # Tabelle gab es beim Backup noch nicht
+        datei, info = schluessel_dateien[tabelle]
+        liste = ', '.join(f'"{c}"' for c in info['spalten'])
+        temp = f'backup_schluessel_{tabelle}'
+        if ist_sqlite():
+            cursor.execute(f'CREATE TEMP TABLE {temp} AS SELECT {liste} FROM "{tabelle}" WHERE 0')
+            platzhalter = ', '.join('?' for _ in info['spalten'])
+            cursor.executemany(f'INSERT INTO {temp} ({liste}) VALUES ({platzhalter})',
+                               _csv_zeilen(os.path.join(tmp, datei)))
+        else:
+            cursor.execute(f'CREATE TEMP TABLE {temp} ON COMMIT DROP AS SELECT {liste} FROM "{tabelle}" WITH NO DATA')
+            with gzip.open(os.path.join(tmp, datei), 'rb') as f:
+                cursor.copy_expert(
+                    f"COPY {temp} ({liste}) FROM STDIN WITH (FORMAT csv, HEADER true, NULL '{BACKUP_NULL}')", f)
+        bedingung = ' AND '.join(f'k."{c}" = "{tabelle}"."{c}"' for c in info['spalten'])
+        cursor.execute(f'DELETE FROM "{tabelle}" WHERE NOT EXISTS (SELECT 1 FROM {temp} k WHERE {bedingung})')
+        if ist_sqlite():
+            cursor.execute(f'DROP TABLE {temp}')
+
+def _backup_laden(manifest, tmp):
+    """Spielt ein einzelnes (bereits entpacktes) Archiv ein"""
+    if ist_sqlite() and manifest['typ'] == 'voll':
+        kopie_pfad = os.path.join(tmp, 'wiederherstellung.db')
+        with gzip.open(os.path.join(tmp, 'datenbank.sqlite3.gz'), 'rb') as f_in, open(kopie_pfad, 'wb') as f_out:
+            for block in iter(lambda: f_in.read(1024 * 1024), b''):
+                f_out.write(block)
+        quelle = sqlite3.connect(kopie_pfad)
+        try:
+            if quelle.execute('PRAGMA quick_check').fetchone()[0] != 'ok':
+                raise ValueError('Gesicherte SQLite-Datei ist beschädigt')
+            ziel = sqlite3.connect(db.engine.url.database)
+            try:
+                quelle.backup(ziel)
+            finally:
+                ziel.close()
+        finally:
+            quelle.close()
+        return
+
+    raw = db.engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        dateien = [(d, info) for d, info in manifest['dateien'].items() if 'tabelle' in info]
+        if manifest['typ'] != 'voll':
+            _geloeschte_entfernen(cursor, manifest, tmp)
+        if ist_sqlite():
+            # Nur inkrementell: geänderte Zeilen per Upsert (Trigger halten den Suchindex aktuell)
+            for datei, info in dateien:
+                platzhalter = ', '.join('?' for _ in info['spalten'])
+                cursor.executemany(_upsert_sql(info['tabelle'], info['spalten'], f'VALUES ({platzhalter})'),
+                                   _csv_zeilen(os.path.join(tmp, datei)))
+        else:
+            if manifest['typ'] == 'voll':
+                tabellen = ', '.join(f'"{info["tabelle"]}"' for _, info in dateien)
+                cursor.execute(f'TRUNCATE {tabellen} RESTART IDENTITY CASCADE')
+            for datei, info in dateien:
+                tabelle, liste = info['tabelle'], ', '.join(f'"{c}"' for c in info['spalten'])
+                ziel = f'"{tabelle}"'
+                if manifest['typ'] != 'voll':
+                    ziel = f'backup_{tabelle}'
+                    cursor.execute(f'CREATE TEMP TABLE {ziel} (LIKE "{tabelle}") ON COMMIT DROP')
+                with gzip.open(os.path.join(tmp, datei), 'rb') as f:
+                    cursor.copy_expert(
+                        f"COPY {ziel} ({liste}) FROM STDIN WITH (FORMAT csv, HEADER true, NULL '{BACKUP_NULL}')", f)
+                if manifest['typ'] != 'voll':
+                    cursor.execute(_upsert_sql(tabelle, info['spalten'], f'SELECT {liste} FROM {ziel}'))
+            _postgres_sequenzen_setzen(cursor, [info['tabelle'] for _, info in dateien])
+        raw.commit()
+    except BaseException:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+def backup_wiederherstellen(archiv):
+    """Spielt das volle Backup und alle inkrementellen bis `archiv` ein; gibt die Kette zurück"""
+    kette = backup_kette(archiv)
+    manifeste = [backup_pruefen(a) for a in kette]  # Erst alles prüfen, dann schreiben
+    for manifest in manifeste:
+        if manifest['dialekt'] != db.engine.dialect.name:
+            raise ValueError(f"Backup stammt aus {manifest['dialekt']}, Ziel ist {db.engine.dialect.name} "
+                             f"(für den Umzug SQLite -> PostgreSQL migrate_to_postgres.py verwenden)")
+
+    db.session.remove()
+    db.engine.dispose()
+    for pfad, manifest in zip(kette, manifeste):
+        with tempfile.TemporaryDirectory() as tmp:
+            with tarfile.open(pfad) as tar:
+                for datei in manifest['dateien']:
+                    tar.extract(datei, tmp)
+            _backup_laden(manifest, tmp)
+    db.engine.dispose()
+    if RESPONSE_CACHE_ENABLED:
+        antwort_cache.leeren(alles=True)
+    return kette
+
+@app.cli.command('db-backup')
+@click.option('--ziel', default=BACKUP_DIR, show_default=True, help='Verzeichnis für die Archive')
+@click.option('--inkrementell', is_flag=True, help='Nur Änderungen seit dem neuesten Backup in --ziel')
+def db_backup_command(ziel, inkrementell):
+    """Online-Backup ohne lange Schreibsperre (SQLite: Backup-API, PostgreSQL: COPY) mit Prüfsummen"""
+    beginn = time.monotonic()
+    try:
+        archiv, manifest = backup_erstellen(ziel, inkrementell)
+        backup_pruefen(archiv)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    groesse = os.path.getsize(archiv) / 1024
+    zeilen = sum(info.get('zeilen', 0) for info in manifest['dateien'].values())
+    print(f"[OK] {manifest['typ'].capitalize()}es Backup: {archiv} ({groesse:.0f} KB, "
+          f"{time.monotonic() - beginn:.1f} s)")
+    if manifest['basis']:
+        print(f"[OK] Basis: {manifest['basis']}, {zeilen} geänderte Zeilen")
+    print("[OK] Prüfsummen verifiziert")
+
+@app.cli.command('db-verify')
+@click.argument('archiv')
+def db_verify_command(archiv):
+    """Prüft ein Backup und alle Basis-Backups, von denen es abhängt"""
+    try:
+        for pfad in backup_kette(archiv):
+            manifest = backup_pruefen(pfad)
+            print(f"[OK] {os.path.basename(pfad)}: {manifest['typ']}, {len(manifest['dateien'])} Datei(en)")
+    except (ValueError, KeyError, OSError, tarfile.TarError) as e:
+        raise click.ClickException(str(e))
+
+@app.cli.command('db-restore')
+@click.argument('archiv')
+@click.option('--ja', is_flag=True, help='Ohne Rückfrage überschreiben')
+def db_restore_command(archiv, ja):
+    """Stellt die Datenbank aus einem Backup (inkl. Basis-Backups) wieder her"""
+    if not ja:
+        click.confirm('Die aktuelle Datenbank wird überschrieben. Fortfahren?', abort=True)
+    beginn = time.monotonic()
+    try:
+        kette = backup_wiederherstellen(archiv)
+    except (ValueError, KeyError, OSError, tarfile.TarError) as e:
+        raise click.ClickException(str(e))
+    for pfad in kette:
+        print(f"[OK] Eingespielt: {os.path.basename(pfad)}")
+    print(f"[OK] Wiederherstellung abgeschlossen ({time.monotonic() - beginn:.1f} s)")
+
+# Testdaten für profile-route, tests/ und benchmark.py (nur auf leeren Test-Datenbanken)
+TESTDATEN_NAMEN = ['Musikverein', 'Turnverein', 'Chor St. Martin', 'Familie Becker',
+                   'Landfrauen', 'Jugendfeuerwehr', 'Seniorenkreis', 'Schachclub']
+TESTDATEN_STATUS = ['bestätigt'] * 6 + ['ausstehend'] * 3 + ['abgelehnt']
+
+def seed_buchungen(jahr, pro_tag=4, raum_id=1):
+    """Erzeugt ein volles Jahr an Buchungen (pro_tag Buchungen je Tag)"""
+    zufall = random.Random(42)
+    zeilen = []
+    tag = datetime(jahr, 1, 1)
+    while tag.year == jahr:
+        for slot in range(pro_tag):
+            start = tag + timedelta(hours=8 + slot * 3)
+            name = zufall.choice(TESTDATEN_NAMEN)
+            zeilen.append({
+                'raum_id': raum_id,
+                'start_datum': start,
+                'end_datum': start + timedelta(hours=2),
+                'benutzer_name': name,
+                'benutzer_email': name.lower().replace(' ', '.') + '@example.com',
+                'zweck': zufall.choice(['Probe', 'Versammlung', 'Feier', '']),
+                'status': zufall.choice(TESTDATEN_STATUS),
+                'is_active': True,
+                'erstellt_am': start - timedelta(days=zufall.randint(1, 60))
+            })
+        tag += timedelta(days=1)
+
+    with app.app_context():
+        db.session.execute(db.insert(Buchung), zeilen)
+        db.session.commit()
+    return len(zeilen)
+
+# Profiling auf Anforderung: die nächsten N Requests eines Endpoints werden profiliert
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join('logs', 'profiles'))
+PROFILE_MAX_REQUESTS = 100
+PROFILE_SAMPLE_INTERVAL = 0.001  # Sekunden zwischen zwei Stichproben (Modus 'sampling'), praktisch begrenzt durch den GIL
+PROFIL_MODI = ('cprofile', 'sampling')
+_profil_auftraege = {}  # Endpoint -> {'anzahl': offene Requests, 'modus': ...}
+_profil_lock = threading.Lock()
+
+class StichprobenProfiler:
+    """Einfacher Sampling-Profiler: liest in einem Thread periodisch den Stack des Request-Threads"""
+
+    def __init__(self, intervall=PROFILE_SAMPLE_INTERVAL):
+        self.intervall = intervall
+        self.thread_id = threading.get_ident()
+        self.stacks = []
+        self.zeitpunkte = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sammeln, name='profil-sampler', daemon=True)
+
+    def enable(self):
+        self.beginn = time.perf_counter()
+        self._thread.start()
+
+    def disable(self):
+        self._stop.set()
+        self._thread.join()
+        self.ende = time.perf_counter()
+
+    def _sammeln(self):
+        while not self._stop.wait(self.intervall):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append((frame.f_code.co_name, frame.f_code.co_filename, frame.f_code.co_firstlineno))
+                frame = frame.f_back
+            self.stacks.append(tuple(reversed(stack)))
+            self.zeitpunkte.append(time.perf_counter())
+
+    def speedscope(self, name):
+        """Profil im Speedscope-Format (https://www.speedscope.app)"""
+        frames, index = [], {}
+        samples = []
+        for stack in self.stacks:
+            sample = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append({'name': frame[0], 'file': frame[1], 'line': frame[2]})
+                sample.append(index[frame])
+            samples.append(sample)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': self.ende - self.beginn,
+                'samples': samples,
+                # Gewicht = tatsächlicher Abstand zur vorherigen Stichprobe
+                'weights': [b - a for a, b in zip([self.beginn] + self.zeitpunkte, self.zeitpunkte)]
+            }]
+        }
+
+def profil_anfordern(endpoint, anzahl, modus='cprofile'):
+    """Fordert das Profiling der nächsten `anzahl` Requests an `endpoint` an (gilt für diesen Worker-Prozess)"""
+    with _profil_lock:
+        if anzahl > 0:
+            _profil_auftraege[endpoint] = {'anzahl': anzahl, 'modus': modus}
+        else:
+            _profil_auftraege.pop(endpoint, None)
+
+def _profil_auftrag_nehmen(endpoint):
+    with _profil_lock:
+        auftrag = _profil_auftraege.get(endpoint)
+        if not auftrag:
+            return None
+        auftrag['anzahl'] -= 1
+        if auftrag['anzahl'] <= 0:
+            del _profil_auftraege[endpoint]
+        return auftrag['modus']
+
+@app.before_request
+def _profiling_starten():
+    if not _profil_auftraege:
+        return  # Normalfall: keine Kosten außer dieser Prüfung
+    modus = _profil_auftrag_nehmen(request.endpoint)
+    if modus is None:
+        return
+    profiler = cProfile.Profile() if modus == 'cprofile' else StichprobenProfiler()
+    try:
+        profiler.enable()
+    except ValueError:
+        return  # Es läuft bereits ein anderer cProfile in diesem Prozess
+    g.profiler = profiler
+    g.profil_beginn = time.perf_counter()
+
+@app.after_request
+def _profiling_beenden(response):
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    profiler.disable()
+    dauer_ms = (time.perf_counter() - g.pop('profil_beginn')) * 1000
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = f"{request.endpoint}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{os.getpid()}-{dauer_ms:.0f}ms"
+    if isinstance(profiler, cProfile.Profile):
+        pfad = os.path.join(PROFILE_DIR, name + '.prof')
+        profiler.dump_stats(pfad)
+    else:
+        pfad = os.path.join(PROFILE_DIR, name + '.speedscope.json')
+        with open(pfad, 'w') as f:
+            json.dump(profiler.speedscope(f'{request.method} {request.path}'), f)
+    response.headers['X-Profil'] = os.path.basename(pfad)
+    return response
+
+def profil_dateien(limit=20):
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    dateien = [os.path.join(PROFILE_DIR, n) for n in os.listdir(PROFILE_DIR)
+               if n.endswith('.prof') or n.endswith('.speedscope.json')]
+    dateien.sort(key=os.path.getmtime, reverse=True)
+    return [{'datei': os.path.basename(d), 'groesse': os.path.getsize(d),
+             'erstellt_am': datetime.utcfromtimestamp(os.path.getmtime(d)).isoformat()} for d in dateien[:limit]]
+
+@app.route('/api/admin/profiling', methods=['GET'])
+@admin_required
+def get_profiling():
+    with _profil_lock:
+        auftraege = {endpoint: dict(auftrag) for endpoint, auftrag in _profil_auftraege.items()}
+    return jsonify({'pid': os.getpid(), 'auftraege': auftraege, 'dateien': profil_dateien()})
+
+@app.route('/api/admin/profiling', methods=['POST'])
+@admin_required
+def start_profiling():
+    """Profiliert die nächsten N Requests an einen Endpoint; anzahl=0 bricht ab"""
+    data = request.get_json(silent=True) or {}
+    endpoint = data.get('endpoint')
+    anzahl = data.get('anzahl', 10)
+    modus = data.get('modus', 'cprofile')
+
+    if endpoint not in app.view_functions:
+        return jsonify({'error': 'Unbekannter Endpoint'}), 400
+    if not isinstance(anzahl, int) or not 0 <= anzahl <= PROFILE_MAX_REQUESTS:
+        return jsonify({'error': f'anzahl muss zwischen 0 und {PROFILE_MAX_REQUESTS} liegen'}), 400
+    if modus not in PROFIL_MODI:
+        return jsonify({'error': f'Ungültiger Modus, erlaubt: {", ".join(PROFIL_MODI)}'}), 400
+
+    profil_anfordern(endpoint, anzahl, modus)
+    return jsonify({
+        'message': f'Die nächsten {anzahl} Requests an {endpoint} werden profiliert' if anzahl else 'Profiling beendet',
+        'pid': os.getpid(),
+        'verzeichnis': PROFILE_DIR
+    })
+
+@app.cli.command('profile-route')
+@click.argument('pfad')
+@click.option('--anzahl', default=20, show_default=True, help='Anzahl profilierter Requests')
+@click.option('--modus', type=click.Choice(PROFIL_MODI), default='cprofile', show_default=True)
+@click.option('--methode', default='GET', show_default=True)
+@click.option('--admin', is_flag=True, help='Requests mit Admin-Session senden')
+@click.option('--seed', 'seed_jahr', type=int, help='Vorher ein Jahr Testdaten anlegen (nur bei leerer Datenbank)')
+def profile_route_command(pfad, anzahl, modus, methode, admin, seed_jahr):
+    """Profiliert PFAD mit dem Test-Client, z.B. flask profile-route "/api/buchungen?jahr=2026&monat=5" --seed 2026"""
+    if seed_jahr:
+        if Buchung.query.count() > 0:
+            raise click.ClickException('--seed nur auf einer leeren Datenbank (z.B. DATABASE_URI=sqlite:////tmp/profil.db)')
+        print(f"[OK] {seed_buchungen(seed_jahr)} Testbuchungen angelegt")
+
+    try:
+        endpoint, _ = app.url_map.bind('localhost').match(pfad.split('?', 1)[0], method=methode)
+    except Exception as e:
+        raise click.ClickException(f'Pfad passt zu keiner Route: {e}')
+
+    limiter.enabled = False
+    client = app.test_client()
+    if admin:
+        with client.session_transaction() as s:
+            s['is_admin'] = True
+            s['admin_login_time'] = datetime.utcnow().isoformat()
+
+    profil_anfordern(endpoint, anzahl, modus)
+    dateien, dauer = [], []
+    for _ in range(anzahl):
+        beginn = time.perf_counter()
+        response = client.open(pfad, method=methode)
+        dauer.append((time.perf_counter() - beginn) * 1000)
+        if 'X-Profil' in response.headers:
+            dateien.append(os.path.join(PROFILE_DIR, response.headers['X-Profil']))
+    profil_anfordern(endpoint, 0)
+
+    dauer.sort()
+    print(f"[OK] {anzahl} Requests an {endpoint} (Status {response.status_code}): "
+          f"Median {dauer[len(dauer) // 2]:.1f} ms, Max {dauer[-1]:.1f} ms")
+    print(f"[OK] {len(dateien)} Profile in {PROFILE_DIR}")
+    if modus == 'cprofile' and dateien:
+        pstats.Stats(*dateien).sort_stats('cumulative').print_stats(15)
+
 # Initialisierung
 def init_db():
     with app.app_context():
         db.create_all()
 
+        # Lokaler Test des Read/Write-Splits mit zwei SQLite-Dateien: Schema auch in der Replik anlegen
+        if DATABASE_REPLICA_URI and DATABASE_REPLICA_URI.startswith('sqlite'):
+            db.metadata.create_all(db.engines['replica'])
+            suchindex_einrichten(db.engines['replica'])
+
+        _suche_modus['modus'] = suchindex_einrichten(db.engine)
+
+        if db.session.get(AenderungsZaehler, 1) is None:
+            db.session.add(AenderungsZaehler(id=1, wert=0))
+            try:
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()  # Anderer Worker hat den Zähler gleichzeitig angelegt
+
         # Erstelle Raum, wenn noch keiner vorhanden ist
         if Raum.query.count() == 0:
             raum = Raum(name='Saal Raiffeisenstraße 12', beschreibung='')
             db.session.add(raum)
             db.session.commit()
-            print("Raum 'Saal Raiffeisenstraße 12' wurde erstellt")
+            logger.info("Raum 'Saal Raiffeisenstraße 12' wurde erstellt")
 
 # Initialisiere DB beim Import (wichtig für Gunicorn/Production)
 init_db()
@@ -0,0 +1,554 @@
+"""
+Benchmark-Skript fuer das Raumbuchungssystem
+Arbeitet auf einer temporaeren Datenbank mit generierten Testdaten
+
+Verwendung:
+    python benchmark.py <szenario> [optionen]
+    python benchmark.py --list
+"""
+import os
+import sys
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Temporaere Datenbank, damit niemals Produktionsdaten angefasst werden
+BENCH_DIR = tempfile.mkdtemp(prefix='raumbuchung-bench-')
+os.environ['DATABASE_URI'] = os.getenv(
+    'BENCH_DATABASE_URI', 'sqlite:///' + os.path.join(BENCH_DIR, 'bench.db')
+)
+os.environ.setdefault('RESPONSE_CACHE_PATH', os.path.join(BENCH_DIR, 'antwort_cache.db'))
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+os.environ.setdefault('ADMIN_PIN', '0000')
+os.environ.setdefault('ADMIN_EMAIL', 'admin@example.com')
+
+def messen(funktion, wiederholungen=20):
+    """Gibt die mittlere Laufzeit in Millisekunden zurueck"""
+    funktion()  # Aufwaermen
+    start = time.perf_counter()
+    for _ in range(wiederholungen):
+        funktion()
+    return (time.perf_counter() - start) / wiederholungen * 1000
+
+
+def bench_json(argv):
+    """Payload-Groesse und Serialisierungszeit fuer ein volles Jahr (Zeilen vs. Spalten)"""
+    import gzip
+    import json
+    from app import (app, Buchung, FastJSONProvider, buchung_to_dict,
+                     buchungen_to_columns, get_raum_namen, brotli, orjson, seed_buchungen)
+    from flask import jsonify
+
+    jahr = datetime.now().year
+    anzahl = seed_buchungen(jahr)
+    print(f"[OK] {anzahl} Buchungen fuer {jahr} erzeugt\n")
+
+    with app.app_context():
+        buchungen = Buchung.query.order_by(Buchung.start_datum).all()
+        raum_namen = get_raum_namen()
+
+        formate = {
+            'zeilen': lambda: [buchung_to_dict(b, raum_namen) for b in buchungen],
+            'spalten': lambda: buchungen_to_columns(buchungen, raum_namen),
+        }
+        provider = {'stdlib': stdlib_provider(app)}
+        if orjson is not None:
+            provider['orjson'] = FastJSONProvider(app)
+
+        print(f"{'Format':<10}{'Provider':<10}{'Aufbau ms':>11}{'jsonify ms':>12}"
+              f"{'Bytes':>10}{'gzip':>9}{'br':>9}")
+        for format_name, aufbau in formate.items():
+            aufbau_ms = messen(aufbau)
+            daten = aufbau()
+            for provider_name, p in provider.items():
+                # Über response() wie jsonify, damit dieselben Argumente wie in Produktion ankommen
+                app.json = p
+                with app.test_request_context():
+                    dumps_ms = messen(lambda: jsonify(daten).get_data())
+                    roh = jsonify(daten).get_data()
+                gz = len(gzip.compress(roh, compresslevel=6))
+                br = len(brotli.compress(roh, quality=5)) if brotli is not None else '-'
+                print(f"{format_name:<10}{provider_name:<10}{aufbau_ms:>11.2f}{dumps_ms:>12.2f}"
+                      f"{len(roh):>10}{gz:>9}{br:>9}")
+
+        app.json = FastJSONProvider(app)
+
+        # Kontrolle: beide Formate enthalten dieselben Daten
+        assert len(json.loads(provider['stdlib'].dumps(formate['spalten']()))['id']) == anzahl
+
+
+def stdlib_provider(app):
+    """Flask-Standardprovider (json-Modul der Standardbibliothek) zum Vergleich"""
+    from flask.json.provider import DefaultJSONProvider
+    provider = DefaultJSONProvider(app)
+    provider.compact = True
+    return provider
+
+
+def _sqlite_schreib_worker(db_uri, profil, anzahl, worker_nr, ergebnisse):
+    """Ein Prozess, der Buchungsanfragen wie create_buchung schreibt (Überschneidungsprüfung + Insert)"""
+    os.environ['DATABASE_URI'] = db_uri
+    os.environ['SQLITE_PRODUCTION_PROFILE'] = 'True' if profil == 'produktion' else 'False'
+    from sqlalchemy.exc import OperationalError
+    from app import app, db, Buchung
+
+    ok = gesperrt = 0
+    latenzen = []
+    with app.app_context():
+        for i in range(anzahl):
+            start = datetime(2030, 1, 1) + timedelta(hours=(worker_nr * anzahl + i) * 3)
+            t0 = time.perf_counter()
+            try:
+                Buchung.query.filter(
+                    Buchung.raum_id == 1,
+                    Buchung.status == 'bestätigt',
+                    Buchung.is_active == True,
+                    Buchung.start_datum < start + timedelta(hours=2),
+                    Buchung.end_datum > start
+                ).first()
+                db.session.add(Buchung(raum_id=1, start_datum=start, end_datum=start + timedelta(hours=2),
+                                       benutzer_name=f'Worker {worker_nr}', benutzer_email='w@example.com',
+                                       status='ausstehend'))
+                db.session.commit()
+                ok += 1
+            except OperationalError as e:
+                db.session.rollback()
+                if 'locked' not in str(e) and 'busy' not in str(e):
+                    raise
+                gesperrt += 1
+            latenzen.append((time.perf_counter() - t0) * 1000)
+    ergebnisse.put((ok, gesperrt, latenzen))
+
+
+def bench_sqlite_writes(argv):
+    """Parallele Schreibzugriffe aus mehreren Prozessen: SQLite-Standard vs. Produktionsprofil"""
+    import multiprocessing
+
+    prozesse = int(argv[0]) if len(argv) > 0 else 4
+    anzahl = int(argv[1]) if len(argv) > 1 else 200
+    ctx = multiprocessing.get_context('spawn')
+
+    print(f"{prozesse} Prozesse x {anzahl} Schreibvorgaenge\n")
+    print(f"{'Profil':<12}{'OK':>7}{'gesperrt':>10}{'Dauer s':>9}{'Writes/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for profil in ['standard', 'produktion']:
+        db_uri = 'sqlite:///' + os.path.join(BENCH_DIR, f'writes-{profil}.db')
+        ergebnisse = ctx.Queue()
+
+        # Schema anlegen, bevor die Worker parallel starten
+        init = ctx.Process(target=_sqlite_schreib_worker, args=(db_uri, profil, 0, 0, ergebnisse))
+        init.start()
+        ergebnisse.get()
+        init.join()
+
+        worker = [ctx.Process(target=_sqlite_schreib_worker, args=(db_uri, profil, anzahl, nr, ergebnisse))
+                  for nr in range(prozesse)]
+        start = time.perf_counter()
+        for w in worker:
+            w.start()
+        resultate = [ergebnisse.get() for _ in worker]
+        for w in worker:
+            w.join()
+        dauer = time.perf_counter() - start
+
+        ok = sum(r[0] for r in resultate)
+        gesperrt = sum(r[1] for r in resultate)
+        latenzen = sorted(l for r in resultate for l in r[2])
+        p50 = latenzen[len(latenzen) // 2]
+        p99 = latenzen[min(len(latenzen) - 1, int(len(latenzen) * 0.99))]
+        print(f"{profil:<12}{ok:>7}{gesperrt:>10}{dauer:>9.2f}{ok / dauer:>10.1f}{p50:>9.2f}{p99:>9.2f}")
+
+
+def _fake_smtp_server(modus):
+    """
+    Startet einen lokalen SMTP-Server in einem Thread.
+    modus='haengt': nimmt Verbindungen an und antwortet nie; modus='ok': minimaler funktionierender Server;
+    modus='langsam': wie 'ok', braucht aber SMTP_BENCH_DELAY_MS (Standard: 100) pro E-Mail.
+    """
+    import socket
+    import threading
+
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(('127.0.0.1', 0))
+    server.listen(16)
+    empfangen = []
+    offene_verbindungen = []
+    verzoegerung = int(os.getenv('SMTP_BENCH_DELAY_MS', 100)) / 1000 if modus == 'langsam' else 0
+
+    def bediene(conn):
+        if modus == 'haengt':
+            offene_verbindungen.append(conn)  # Verbindung offen halten, nie antworten
+            return
+        datei = conn.makefile('rb')
+        conn.sendall(b'220 fake ESMTP\r\n')
+        for zeile in datei:
+            befehl = zeile.strip().upper()
+            if befehl.startswith(b'EHLO') or befehl.startswith(b'HELO'):
+                conn.sendall(b'250 fake\r\n')
+            elif befehl == b'DATA':
+                conn.sendall(b'354 weiter\r\n')
+                for datenzeile in datei:
+                    if datenzeile in (b'.\r\n', b'.\n'):
+                        break
+                time.sleep(verzoegerung)
+                empfangen.append(1)
+                conn.sendall(b'250 OK\r\n')
+            elif befehl == b'QUIT':
+                conn.sendall(b'221 Tschuess\r\n')
+                break
+            else:
+                conn.sendall(b'250 OK\r\n')
+        conn.close()
+
+    def annehmen():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            threading.Thread(target=bediene, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=annehmen, daemon=True).start()
+    return server, server.getsockname()[1], empfangen
+
+
+def bench_smtp_hang(argv):
+    """Versand gegen einen haengenden SMTP-Server: Timeouts, Circuit Breaker und Postausgang"""
+    anzahl = int(argv[0]) if argv else 6
+    haengend, port, _ = _fake_smtp_server('haengt')
+
+    os.environ.update({
+        'MAIL_SERVER': '127.0.0.1', 'MAIL_PORT': str(port),
+        'MAIL_DEFAULT_SENDER_NAME': 'Benchmark', 'MAIL_DEFAULT_SENDER_EMAIL': 'bench@example.com',
+        'SMTP_CONNECT_TIMEOUT': os.getenv('SMTP_CONNECT_TIMEOUT', '1'),
+        'SMTP_BREAKER_THRESHOLD': os.getenv('SMTP_BREAKER_THRESHOLD', '3'),
+        'SMTP_BREAKER_RESET_SECONDS': os.getenv('SMTP_BREAKER_RESET_SECONDS', '2'),
+        'BACKGROUND_JOBS_ENABLED': 'False',
+    })
+    from flask_mail import Message
+    from app import app, mail, smtp_breaker, postausgang_offen, postausgang_zustellen
+
+    print(f"Haengender SMTP-Server auf Port {port}\n")
+    with app.app_context():
+        for i in range(anzahl):
+            t0 = time.perf_counter()
+            try:
+                mail.send(Message(subject=f'Test {i}', recipients=['user@example.com'], html='<p>Test</p>'))
+                ergebnis = 'gesendet'
+            except Exception as e:
+                ergebnis = type(e).__name__
+            dauer = (time.perf_counter() - t0) * 1000
+            print(f"  Versand {i + 1}: {dauer:8.1f} ms  {ergebnis:<22} Breaker: {smtp_breaker.zustand()}")
+
+        print(f"\n[OK] Im Postausgang vorgemerkt: {postausgang_offen()}")
+
+        # Mailserver wieder erreichbar: Postausgang wird nach Ablauf der Reset-Zeit zugestellt
+        haengend.close()
+        _, port_ok, empfangen = _fake_smtp_server('ok')
+        app.extensions['mail'].port = port_ok
+        time.sleep(smtp_breaker.reset_sekunden)
+        postausgang_zustellen()
+        print(f"[OK] Nach Wiederherstellung zugestellt: {len(empfangen)}, offen: {postausgang_offen()}, "
+              f"Breaker: {smtp_breaker.zustand()}")
+
+
+
+def bench_auslastung(argv):
+    """Auslastungsstatistik ueber mehrere Jahre: numpy gegen reines Python"""
+    jahre = int(argv[0]) if argv else 3
+    import app as app_modul
+    from app import app, berechne_auslastung, seed_buchungen
+
+    erstes_jahr = datetime.now().year - jahre
+    anzahl = sum(seed_buchungen(erstes_jahr + i) for i in range(jahre))
+    print(f"[OK] {anzahl} Buchungen fuer {jahre} Jahre erzeugt\n")
+
+    von, bis = datetime(erstes_jahr, 1, 1), datetime(erstes_jahr + jahre, 1, 1)
+    varianten = {'python': None}
+    if app_modul.np is not None:
+        varianten['numpy'] = app_modul.np
+    else:
+        print("[WARNUNG] numpy nicht installiert, nur die Python-Variante wird gemessen")
+
+    print(f"{'Variante':<10}{'Raster':<8}{'ms':>10}")
+    with app.app_context():
+        for name, modul in varianten.items():
+            app_modul.np = modul
+            for raster in ('stunde', 'tag'):
+                dauer = messen(lambda: berechne_auslastung(von, bis, raster), wiederholungen=5)
+                print(f"{name:<10}{raster:<8}{dauer:>10.1f}")
+        app_modul.np = varianten.get('numpy')
+
+
+def _freier_port():
+    import socket
+
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _last_erzeugen(basis_url, clients, dauer, schreibanteil, jahr):
+    """
+    Feuert aus `clients` Threads fuer `dauer` Sekunden Requests ab: Monatsansichten lesen und mit
+    Anteil `schreibanteil` Buchungsanfragen stellen (zwei E-Mails pro Anfrage).
+    Liefert (ok, abgewiesen, fehler, latenzen); abgewiesen = 503 der Admission Control.
+    """
+    import json
+    import threading
+    import urllib.error
+    import urllib.request
+
+    ende = time.monotonic() + dauer
+    ergebnisse = []
+
+    def client(nr):
+        zufall = random.Random(nr)
+        ok, abgewiesen, fehler, latenzen = 0, 0, 0, []
+        while time.monotonic() < ende:
+            if zufall.random() < schreibanteil:
+                start = datetime(jahr + 1, 1, 1) + timedelta(days=zufall.randrange(365), hours=zufall.randrange(8, 20))
+                daten = json.dumps({
+                    'raum_id': 1, 'start_datum': start.isoformat(),
+                    'end_datum': (start + timedelta(hours=2)).isoformat(),
+                    'benutzer_name': f'Last {nr}', 'benutzer_email': f'last{nr}@example.com'
+                }).encode()
+                anfrage = urllib.request.Request(basis_url + '/api/buchung', data=daten,
+                                                 headers={'Content-Type': 'application/json'})
+            else:
+                anfrage = urllib.request.Request(f"{basis_url}/api/buchungen?jahr={jahr}&monat={zufall.randint(1, 12)}")
+            t0 = time.perf_counter()
+            pause = 0.0
+            try:
+                with urllib.request.urlopen(anfrage, timeout=30) as antwort:
+                    antwort.read()
+                ok += 1
+            except urllib.error.HTTPError as e:
+                if e.code == 503:
+                    abgewiesen += 1
+                    # Wie ein gut erzogener Client: Retry-After abwarten statt sofort erneut zu senden
+                    pause = float(e.headers.get('Retry-After') or 0)
+                else:
+                    fehler += 1
+            except Exception:
+                fehler += 1
+            latenzen.append((time.perf_counter() - t0) * 1000)
+            time.sleep(max(0.0, min(pause, ende - time.monotonic())))
+        ergebnisse.append((ok, abgewiesen, fehler, latenzen))
+
+    threads = [threading.Thread(target=client, args=(nr,)) for nr in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    latenzen = sorted(l for *_, ls in ergebnisse for l in ls)
+    return (sum(e[0] for e in ergebnisse), sum(e[1] for e in ergebnisse), sum(e[2] for e in ergebnisse),
+            latenzen)
+
+
+def _perzentil(werte, anteil):
+    """werte muss sortiert sein"""
+    return werte[min(len(werte) - 1, int(len(werte) * anteil))] if werte else 0
+
+
+def _gunicorn_starten(env):
+    """Startet Gunicorn mit gunicorn.conf.py und wartet auf /health/live; None, wenn er nicht startet"""
+    import subprocess
+    import urllib.request
+
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"http://{env['GUNICORN_BIND']}/health/live", timeout=1).read()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    server.wait()
+    return None
+
+
+def bench_gunicorn(argv):
+    """Durchsatz unter Last: Gunicorn sync- gegen gthread-Worker (gunicorn.conf.py) mit langsamem SMTP"""
+    dauer = int(argv[0]) if argv else 10
+    clients = int(argv[1]) if len(argv) > 1 else 32
+    schreibanteil = float(os.getenv('BENCH_SCHREIBANTEIL', '0.2'))
+    jahr = datetime.now().year
+    from app import seed_buchungen
+
+    print(f"[OK] {seed_buchungen(jahr)} Buchungen erzeugt")
+    _, smtp_port, empfangen = _fake_smtp_server('langsam')
+    print(f"Langsamer SMTP-Server auf Port {smtp_port}, {clients} Clients, {dauer} s je Variante, "
+          f"Schreibanteil {schreibanteil:.0%}\n")
+
+    print(f"{'Klasse':<10}{'Worker':>7}{'Threads':>8}{'ok':>8}{'Fehler':>8}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    for klasse in ('sync', 'gthread'):
+        port = _freier_port()
+        env = dict(os.environ, **{
+            'GUNICORN_WORKER_CLASS': klasse, 'GUNICORN_BIND': f'127.0.0.1:{port}',
+            'GUNICORN_WORKERS': os.getenv('GUNICORN_WORKERS', '2'),
+            'GUNICORN_THREADS': os.getenv('GUNICORN_THREADS', '8'),
+            'GUNICORN_ACCESS_LOG': os.devnull,
+            'MAIL_SERVER': '127.0.0.1', 'MAIL_PORT': str(smtp_port),
+            'MAIL_DEFAULT_SENDER_NAME': 'Benchmark', 'MAIL_DEFAULT_SENDER_EMAIL': 'bench@example.com',
+            'RATELIMIT_ENABLED': 'False', 'BACKGROUND_JOBS_ENABLED': 'False',
+            'ADMISSION_CONTROL_ENABLED': 'False',  # Reiner Durchsatzvergleich, nichts abweisen
+        })
+        server = _gunicorn_starten(env)
+        if server is None:
+            print(f"{klasse:<10}Gunicorn startet nicht (installiert?)")
+            continue
+        try:
+            ok, _, fehler, latenzen = _last_erzeugen(f'http://127.0.0.1:{port}', clients, dauer, schreibanteil, jahr)
+            threads = env['GUNICORN_THREADS'] if klasse == 'gthread' else '1'
+            print(f"{klasse:<10}{env['GUNICORN_WORKERS']:>7}{threads:>8}{ok:>8}{fehler:>8}"
+                  f"{ok / dauer:>9.1f}{_perzentil(latenzen, 0.5):>9.1f}{_perzentil(latenzen, 0.99):>9.1f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"\n[OK] E-Mails empfangen: {len(empfangen)}")
+
+
+def bench_admission(argv):
+    """Überlast mit sehr langsamem SMTP: Admission Control aus/an, Latenz der Health-Checks und Abweisungen"""
+    import json
+    import threading
+    import urllib.request
+
+    dauer = int(argv[0]) if argv else 10
+    clients = int(argv[1]) if len(argv) > 1 else 64
+    schreibanteil = float(os.getenv('BENCH_SCHREIBANTEIL', '0.5'))
+    os.environ.setdefault('SMTP_BENCH_DELAY_MS', '500')
+    jahr = datetime.now().year
+    from app import seed_buchungen
+
+    print(f"[OK] {seed_buchungen(jahr)} Buchungen erzeugt")
+    _, smtp_port, _ = _fake_smtp_server('langsam')
+    print(f"SMTP mit {os.environ['SMTP_BENCH_DELAY_MS']} ms pro E-Mail, {clients} Clients, {dauer} s je Variante, "
+          f"Schreibanteil {schreibanteil:.0%}\n")
+
+    print(f"{'Admission':<10}{'ok':>7}{'503':>7}{'Fehler':>8}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'Health p50':>12}{'Health max':>12}")
+    for aktiv in ('False', 'True'):
+        port = _freier_port()
+        env = dict(os.environ, **{
+            'GUNICORN_WORKER_CLASS': 'gthread', 'GUNICORN_BIND': f'127.0.0.1:{port}',
+            'GUNICORN_WORKERS': os.getenv('GUNICORN_WORKERS', '2'),
+            'GUNICORN_THREADS': os.getenv('GUNICORN_THREADS', '8'),
+            'GUNICORN_ACCESS_LOG': os.devnull,
+            'MAIL_SERVER': '127.0.0.1', 'MAIL_PORT': str(smtp_port),
+            'MAIL_DEFAULT_SENDER_NAME': 'Benchmark', 'MAIL_DEFAULT_SENDER_EMAIL': 'bench@example.com',
+            'RATELIMIT_ENABLED': 'False', 'BACKGROUND_JOBS_ENABLED': 'False',
+            'ADMISSION_CONTROL_ENABLED': aktiv,
+        })
+        server = _gunicorn_starten(env)
+        if server is None:
+            print(f"{aktiv:<10}Gunicorn startet nicht (installiert?)")
+            continue
+        basis_url = f'http://127.0.0.1:{port}'
+        health, laeuft = [], [True]
+
+        def health_probe():
+            # Wie ein Load Balancer: alle 200 ms /health/ready, Timeout 10 s
+            while laeuft[0]:
+                t0 = time.perf_counter()
+                try:
+                    urllib.request.urlopen(basis_url + '/health/ready', timeout=10).read()
+                    health.append((time.perf_counter() - t0) * 1000)
+                except Exception:
+                    health.append(10_000.0)
+                time.sleep(0.2)
+
+        probe = threading.Thread(target=health_probe)
+        try:
+            probe.start()
+            ok, abgewiesen, fehler, latenzen = _last_erzeugen(basis_url, clients, dauer, schreibanteil, jahr)
+            laeuft[0] = False
+            probe.join()
+            health.sort()
+            print(f"{aktiv:<10}{ok:>7}{abgewiesen:>7}{fehler:>8}{_perzentil(latenzen, 0.5):>9.1f}"
+                  f"{_perzentil(latenzen, 0.99):>9.1f}{_perzentil(health, 0.5):>12.1f}{health[-1] if health else 0:>12.1f}")
+            if aktiv == 'True':
+                status = json.loads(urllib.request.urlopen(basis_url + '/health/ready', timeout=10).read())
+                print(f"\nAdmission eines Workers: {status['admission']}")
+        finally:
+            laeuft[0] = False
+            server.terminate()
+            server.wait()
+
+
+def bench_suche(argv):
+    """Admin-Suche auf vielen Buchungen: Suchindex (FTS5 bzw. pg_trgm) gegen LIKE ohne Index"""
+    anzahl = int(argv[0]) if argv else 1_000_000
+    import app as app_modul
+    from app import app, db, Buchung, suche_buchungen, TESTDATEN_NAMEN, TESTDATEN_STATUS
+
+    zufall = random.Random(42)
+    zwecke = ['Probe', 'Versammlung', 'Feier', 'Jahreshauptversammlung', 'Kinderturnen', '']
+    start = datetime(2000, 1, 1)
+    t0 = time.perf_counter()
+    with app.app_context():
+        for beginn in range(0, anzahl, 50_000):
+            zeilen = []
+            for i in range(beginn, min(beginn + 50_000, anzahl)):
+                name = f'{zufall.choice(TESTDATEN_NAMEN)} {i % 5000}'
+                zeilen.append({
+                    'raum_id': 1, 'start_datum': start + timedelta(hours=i), 'end_datum': start + timedelta(hours=i + 1),
+                    'benutzer_name': name, 'benutzer_email': f'mitglied{i}@example.com',
+                    'zweck': zufall.choice(zwecke), 'status': zufall.choice(TESTDATEN_STATUS), 'is_active': True,
+                })
+            db.session.execute(db.insert(Buchung), zeilen)
+            db.session.commit()
+    print(f"[OK] {anzahl} Buchungen erzeugt ({time.perf_counter() - t0:.1f} s inkl. Suchindex)\n")
+
+    anfragen = {
+        'E-Mail (1 Treffer)': ['mitglied424242'],
+        'Name + Nummer': ['schachclub', '4711'],
+        'Praefix (selten)': ['jahreshaupt', 'chor', '17'],
+        'Haeufig (1/8)': ['musikverein'],
+    }
+    varianten = [app_modul._suche_modus['modus'], 'like']
+    print(f"{'Anfrage':<22}" + ''.join(f"{v + ' ms':>14}" for v in varianten) + f"{'Seite 2 ms':>14}{'Treffer':>10}")
+    with app.app_context():
+        for name, begriffe in anfragen.items():
+            zeile = f"{name:<22}"
+            for modus in varianten:
+                app_modul._suche_modus['modus'] = modus
+                dauer = messen(lambda: suche_buchungen(begriffe, 51), wiederholungen=3)
+                zeile += f"{dauer:>14.1f}"
+            app_modul._suche_modus['modus'] = varianten[0]
+            erste_seite = suche_buchungen(begriffe, 51)
+            if len(erste_seite) > 50:
+                nach = erste_seite[49][1], erste_seite[49][0]
+                zeile += f"{messen(lambda: suche_buchungen(begriffe, 51, nach), wiederholungen=3):>14.1f}"
+            else:
+                zeile += f"{'-':>14}"
+            print(zeile + f"{len(suche_buchungen(begriffe, anzahl)):>10}")
+
+
+BENCHMARKS = {
+    'json': bench_json,
+    'sqlite-writes': bench_sqlite_writes,
+    'smtp-hang': bench_smtp_hang,
+    'auslastung': bench_auslastung,
+    'gunicorn': bench_gunicorn,
+    'admission': bench_admission,
+    'suche': bench_suche,
+}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print("Verfuegbare Szenarien:")
+        for name, funktion in BENCHMARKS.items():
+            print(f"  {name:<16}{funktion.__doc__}")
+        sys.exit(0 if len(sys.argv) > 1 and sys.argv[1] == '--list' else 1)
+
+    print(f"Benchmark-Datenbank: {os.environ['DATABASE_URI']}\n")
+    BENCHMARKS[sys.argv[1]](sys.argv[2:])
@@ -0,0 +1,71 @@
+"""
+Gunicorn-Konfiguration für das Raumbuchungssystem
+
+Start: gunicorn -c gunicorn.conf.py app:app
+Alle Werte lassen sich über Umgebungsvariablen (GUNICORN_*) überschreiben.
+"""
+import multiprocessing
+import os
+
+
+def _env_int(name, standard):
+    wert = os.getenv(name)
+    return int(wert) if wert else standard
+
+
+# Worker-Klasse: 'gthread' (Standard), 'sync' oder 'gevent' (benötigt das Paket gevent)
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+if worker_class not in ('sync', 'gthread', 'gevent'):
+    raise ValueError(f"GUNICORN_WORKER_CLASS muss sync, gthread oder gevent sein, nicht {worker_class!r}")
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Die meiste Zeit eines Requests wartet auf Datenbank und SMTP. Mit sync blockiert jede Wartezeit einen ganzen
+# Prozess, daher viele Worker; mit Threads (bzw. Greenlets) reichen wenige Prozesse mit mehreren Threads.
+_cpu = multiprocessing.cpu_count()
+if worker_class == 'sync':
+    workers = _env_int('GUNICORN_WORKERS', _cpu * 2 + 1)
+else:
+    workers = _env_int('GUNICORN_WORKERS', _cpu + 1)
+
+# Threads pro Worker (nur gthread). Nicht größer als der SQLAlchemy-Pool (5 + 10 Overflow) wählen,
+# sonst warten Threads auf freie Verbindungen.
+threads = _env_int('GUNICORN_THREADS', 8) if worker_class == 'gthread' else 1
+
+# Gleichzeitige Verbindungen pro gevent-Worker
+worker_connections = _env_int('GUNICORN_WORKER_CONNECTIONS', 100)
+
+# Timeouts: SMTP-Versand ist durch SMTP_CONNECT_TIMEOUT/SMTP_SEND_TIMEOUT begrenzt
+timeout = _env_int('GUNICORN_TIMEOUT', 60)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+# Worker nach N Requests (mit Zufallsstreuung, damit nicht alle gleichzeitig) neu starten
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+# App einmal im Master laden (init_db läuft nur einmal, Worker teilen sich den Speicher per Copy-on-Write).
+# Bei gevent nicht vorladen: das Monkey-Patching muss vor dem Import der App passieren.
+preload_app = os.getenv('GUNICORN_PRELOAD', str(worker_class != 'gevent')).lower() == 'true'
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = os.getenv('GUNICORN_ERROR_LOG', '-')
+
+
+def post_fork(server, worker):
+    """Verbindungspools aus dem Master verwerfen, damit kein Worker dessen Sockets weiterverwendet"""
+    if not preload_app:
+        return
+    from app import app, db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            # close=False: Verbindungen des Masters nur vergessen, nicht schließen (würde sie dort kaputt machen)
+            engine.dispose(close=False)
+
+
+def when_ready(server):
+    server.log.info(
+        "Raumbuchung: %s Worker (%s), %s Threads, max_requests=%s (+%s), preload=%s",
+        workers, worker_class, threads, max_requests, max_requests_jitter, preload_app,
+    )
@@ -1,53 +1,126 @@
 """
 Migrations-Skript fuer die Datenbank
-Fuegt is_active und geloescht_am Felder zur Buchung-Tabelle hinzu
+Fuegt neue Felder zur Buchung-Tabelle hinzu (is_active, geloescht_am und spaetere Erweiterungen)
+und legt fehlende Tabellen an
 """
-import os
 import sys
+from sqlalchemy import inspect
 from app import app, db
 
+# Nachtraeglich hinzugekommene Spalten der Buchung-Tabelle (Name, Typ, Standardwert, NOT NULL).
+# Typ und Standardwert werden fuer den jeweiligen Dialekt uebersetzt (SQLite und PostgreSQL).
+NEUE_BUCHUNG_SPALTEN = [
+    ('is_active', db.Boolean(), True, False),
+    ('geloescht_am', db.DateTime(), None, False),
+    ('admin_benachrichtigt_am', db.DateTime(), None, False),
+    ('abgelaufen_am', db.DateTime(), None, False),
+    ('geaendert_am', db.DateTime(), None, False),
+    ('aenderung_seq', db.Integer(), None, False),
+    ('version', db.Integer(), 1, True),
+]
+
+# Dasselbe fuer weitere Tabellen (fehlt die Tabelle noch, legt create_all sie vollstaendig an)
+NEUE_SPALTEN = {
+    'buchung': NEUE_BUCHUNG_SPALTEN,
+    'mail_ausgang': [
+        ('beansprucht_am', db.DateTime(), None, False),
+        ('aufgegeben_am', db.DateTime(), None, False),
+    ],
+}
+
+# Nachtraeglich hinzugekommene Indizes (create_all legt sie fuer bestehende Tabellen nicht an)
+NEUE_BUCHUNG_INDIZES = [
+    ('ix_buchung_geaendert_am', 'geaendert_am'),
+    ('ix_buchung_aenderung_seq', 'aenderung_seq'),
+    ('ix_buchung_end_datum', 'end_datum'),
+    ('ix_buchung_aktiv_status', 'is_active, status'),
+]
+
+def spalte_hinzufuegen_sql(dialect, spalte, typ, standard, not_null, tabelle='buchung'):
+    """ALTER TABLE fuer eine neue Spalte im SQL des jeweiligen Dialekts"""
+    # PostgreSQL kann die Existenz selbst pruefen (schuetzt auch vor parallel laufenden Migrationen)
+    sql = f"ALTER TABLE {tabelle} ADD COLUMN "
+    if dialect.name == 'postgresql':
+        sql += "IF NOT EXISTS "
+    sql += f"{spalte} {typ.compile(dialect=dialect)}"
+    if standard is not None:
+        wert = db.literal(standard, typ).compile(dialect=dialect, compile_kwargs={'literal_binds': True})
+        sql += f" DEFAULT {wert}"
+    if not_null:
+        sql += " NOT NULL"
+    return sql
+
 def migrate_database():
     """Migriert die Datenbank und fuegt neue Felder hinzu"""
     with app.app_context():
         print("Starte Datenbank-Migration...")
 
-        # Backup der alten Datenbank erstellen
-        db_path = 'instance/buchungen.db'
-        if os.path.exists(db_path):
-            import shutil
-            backup_path = 'instance/buchungen_backup.db'
-            shutil.copy2(db_path, backup_path)
+        # Backup der alten Datenbank erstellen (Backup-API bzw. COPY, auch bei laufender Anwendung konsistent)
+        from app import backup_erstellen, ist_sqlite
+        backup_path = None
+        if ist_sqlite():
+            backup_path, _ = backup_erstellen()
             print(f"[OK] Backup erstellt: {backup_path}")
 
         # Fuehre SQL-Migration aus
         try:
             # Fuege neue Spalten hinzu, falls sie nicht existieren
             with db.engine.connect() as conn:
-                # Pruefe ob Spalten bereits existieren
-                result = conn.execute(db.text("PRAGMA table_info(buchung)"))
-                columns = [row[1] for row in result]
+                # Pruefe ob Spalten bereits existieren (funktioniert fuer SQLite und PostgreSQL)
+                inspektor = inspect(conn)
+                for tabelle, neue_spalten in NEUE_SPALTEN.items():
+                    if not inspektor.has_table(tabelle):
+                        continue
+                    columns = [spalte['name'] for spalte in inspektor.get_columns(tabelle)]
 
-                if 'is_active' not in columns:
-                    conn.execute(db.text("ALTER TABLE buchung ADD COLUMN is_active BOOLEAN DEFAULT 1"))
-                    conn.commit()
-                    print("[OK] Spalte 'is_active' hinzugefuegt")
-                else:
-                    print("[OK] Spalte 'is_active' existiert bereits")
+                    for spalte, typ, standard, not_null in neue_spalten:
+                        if spalte not in columns:
+                            conn.execute(db.text(spalte_hinzufuegen_sql(conn.dialect, spalte, typ, standard,
+                                                                        not_null, tabelle)))
+                            conn.commit()
+                            print(f"[OK] Spalte '{tabelle}.{spalte}' hinzugefuegt")
+                        else:
+                            print(f"[OK] Spalte '{tabelle}.{spalte}' existiert bereits")
 
-                if 'geloescht_am' not in columns:
-                    conn.execute(db.text("ALTER TABLE buchung ADD COLUMN geloescht_am DATETIME"))
+                for index, spalte in NEUE_BUCHUNG_INDIZES:
+                    conn.execute(db.text(f"CREATE INDEX IF NOT EXISTS {index} ON buchung ({spalte})"))
                     conn.commit()
-                    print("[OK] Spalte 'geloescht_am' hinzugefuegt")
-                else:
-                    print("[OK] Spalte 'geloescht_am' existiert bereits")
+                print("[OK] Indizes geprueft")
+
+                # Bestehende Buchungen: Aenderungszeitpunkt = Erstellungszeitpunkt
+                conn.execute(db.text("UPDATE buchung SET geaendert_am = erstellt_am WHERE geaendert_am IS NULL"))
+                conn.commit()
+
+            # Neue Tabellen anlegen (bestehende bleiben unveraendert)
+            db.create_all()
+            print("[OK] Fehlende Tabellen angelegt")
+
+            # Event-Log einmalig aus dem bestehenden Datenbestand befuellen (Zeitpunkte der Statuswechsel sind unbekannt)
+            with db.engine.begin() as conn:
+                if conn.execute(db.text("SELECT COUNT(*) FROM buchung_event")).scalar() == 0:
+                    conn.execute(db.text(
+                        "INSERT INTO buchung_event (buchung_id, zeitpunkt, typ, quelle, details) "
+                        "SELECT id, erstellt_am, 'erstellt', 'system', 'aus Migration' FROM buchung WHERE erstellt_am IS NOT NULL"
+                    ))
+                    conn.execute(db.text(
+                        "INSERT INTO buchung_event (buchung_id, zeitpunkt, typ, quelle, details) "
+                        "SELECT id, geloescht_am, 'geloescht', 'system', 'aus Migration' FROM buchung "
+                        "WHERE is_active = :inaktiv AND geloescht_am IS NOT NULL"
+                    ), {'inaktiv': False})
+                    print("[OK] Event-Log aus bestehenden Buchungen befuellt")
+
+            # Suchindex pruefen (wird beim ersten Anlegen aus den bestehenden Buchungen aufgebaut)
+            from app import suchindex_einrichten
+            print(f"[OK] Suchindex: {suchindex_einrichten(db.engine)}")
 
             print("\n[OK] Migration erfolgreich abgeschlossen!")
             print("\nDie Anwendung kann nun gestartet werden mit: python app.py")
 
         except Exception as e:
             print(f"\n[FEHLER] Fehler bei der Migration: {str(e)}")
-            print("\nFalls die Migration fehlschlaegt, koennen Sie die alte Datenbank")
-            print("wiederherstellen aus: instance/buchungen_backup.db")
+            if backup_path:
+                print("\nFalls die Migration fehlschlaegt, koennen Sie die alte Datenbank")
+                print(f"wiederherstellen mit: flask --app app db-restore {backup_path}")
             sys.exit(1)
 
 def reset_database():
@@ -68,6 +141,15 @@ def reset_database():
         db.create_all()
         print("[OK] Neue Tabellen erstellt")
 
+        # Gecachte Antworten und Invalidierungen beziehen sich auf die alte Datenbank
+        from app import RESPONSE_CACHE_ENABLED, antwort_cache
+        if RESPONSE_CACHE_ENABLED:
+            antwort_cache.leeren(alles=True)
+
+        # Suchindex gehoert nicht zu den Modellen und wird deshalb separat neu angelegt
+        from app import suchindex_einrichten
+        suchindex_einrichten(db.engine, neu_aufbauen=True)
+
         # Erstelle Standard-Raum
         from app import Raum
         if Raum.query.count() == 0:
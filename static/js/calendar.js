@@ -4,6 +4,14 @@ let selectedRaumId = null;
 let raumName = '';
 let buchungen = [];
 let isAdminMode = false;
+let bulkAuswahl = new Set();
+let konfliktGruppen = []; // Gruppen sich überschneidender Buchungen (nur Admin-Modus)
+let offeneAnfragen = []; // Alle ausstehenden Anfragen des Raums, unabhängig vom Monat (nur Admin-Modus)
+let listenUmfang = 'monat'; // Buchungsverwaltung: 'monat' (angezeigter Monat) oder 'offen' (alle offenen Anfragen)
+let monatsCache = new Map(); // "raum:jahr:monat" -> Buchungen des Monats
+let syncSeq = null; // Änderungsstand, bis zu dem der Cache aktuell ist
+let syncLaeuft = null;
+let buchungIdempotencyKey = null; // Ein Key pro Buchungsformular, damit Doppelklicks/Retries keine Duplikate erzeugen
 
 const monthNames = [
     'Januar', 'Februar', 'März', 'April', 'Mai', 'Juni',
@@ -114,10 +122,39 @@ document.addEventListener('DOMContentLoaded', function() {
     raumName = document.getElementById('raum-name').value;
 
     initEventListeners();
-    renderCalendar(); // Rendere den Kalender sofort (ohne Buchungen)
-    loadBuchungen(); // Lade Buchungen und aktualisiere Kalender
+
+    // Nutze die serverseitig eingebetteten Buchungen, falls sie zum angezeigten Monat passen
+    if (applyInitialBuchungen()) {
+        renderCalendar();
+        renderBuchungsListe();
+    } else {
+        renderCalendar(); // Rendere den Kalender sofort (ohne Buchungen)
+        loadBuchungen(); // Lade Buchungen und aktualisiere Kalender
+    }
 });
 
+function applyInitialBuchungen() {
+    const element = document.getElementById('initial-buchungen');
+    if (!element) return false;
+
+    try {
+        const initial = JSON.parse(element.textContent);
+        if (String(initial.raum_id) !== String(selectedRaumId) ||
+            initial.jahr !== currentYear ||
+            initial.monat !== currentMonth + 1) {
+            return false;
+        }
+        buchungen = initial.buchungen;
+        monatsCache.set(monatsKey(initial.jahr, initial.monat - 1), buchungen);
+        syncSeq = initial.seq;
+        prefetchNachbarmonate();
+        return true;
+    } catch (error) {
+        console.error('Fehler beim Lesen der eingebetteten Buchungen:', error);
+        return false;
+    }
+}
+
 function initEventListeners() {
     // Monat Navigation
     document.getElementById('prev-month').addEventListener('click', () => {
@@ -127,6 +164,7 @@ function initEventListeners() {
             currentYear--;
         }
         renderCalendar();
+        loadBuchungen();
     });
 
     document.getElementById('next-month').addEventListener('click', () => {
@@ -136,6 +174,7 @@ function initEventListeners() {
             currentYear++;
         }
         renderCalendar();
+        loadBuchungen();
     });
 
     // Buchungs-Modal schließen
@@ -156,6 +195,7 @@ function initEventListeners() {
 
     // E-Mail-Einstellungen
     document.getElementById('save-saal-email-btn').addEventListener('click', saveSaalEmail);
+    document.getElementById('save-benachrichtigung-btn').addEventListener('click', saveBenachrichtigung);
 }
 
 function renderCalendar() {
@@ -266,20 +306,137 @@ function renderCalendar() {
     calendar.appendChild(daysGrid);
 }
 
-function loadBuchungen() {
-    if (!selectedRaumId) return;
+function monatsKey(jahr, monat) {
+    return `${selectedRaumId}:${jahr}:${monat}`;
+}
 
-    fetch(`/api/buchungen?raum_id=${selectedRaumId}&jahr=${currentYear}&monat=${currentMonth + 1}`)
+function fetchMonat(jahr, monat) {
+    return fetch(`/api/buchungen?raum_id=${selectedRaumId}&jahr=${jahr}&monat=${monat + 1}&format=columns`)
         .then(response => response.json())
         .then(data => {
-            buchungen = data;
-            renderCalendar();
-            renderBuchungsListe();
+            monatsCache.set(monatsKey(jahr, monat), columnsToBuchungen(data));
+            // Ein älterer Stand als der Cache: Deltas ab diesem Stand erneut anwenden (idempotent)
+            if (syncSeq === null || data.seq < syncSeq) {
+                syncSeq = data.seq;
+            }
+        });
+}
+
+function zeigeAktuellenMonat() {
+    const cached = monatsCache.get(monatsKey(currentYear, currentMonth));
+    if (!cached) return false;
+    buchungen = cached;
+    renderCalendar();
+    renderBuchungsListe();
+    return true;
+}
+
+function prefetchNachbarmonate() {
+    [-1, 1].forEach(offset => {
+        const datum = new Date(currentYear, currentMonth + offset, 1);
+        if (!monatsCache.has(monatsKey(datum.getFullYear(), datum.getMonth()))) {
+            fetchMonat(datum.getFullYear(), datum.getMonth())
+                .catch(error => console.error('Fehler beim Vorladen der Buchungen:', error));
+        }
+    });
+}
+
+function loadBuchungen() {
+    if (!selectedRaumId) return;
+
+    // Monat aus dem Cache sofort anzeigen und nur die Änderungen nachladen
+    if (zeigeAktuellenMonat()) {
+        syncBuchungen();
+        prefetchNachbarmonate();
+        return;
+    }
+
+    const jahr = currentYear;
+    const monat = currentMonth;
+
+    fetchMonat(jahr, monat)
+        .then(() => {
+            // Antwort verwerfen, falls inzwischen ein anderer Monat angezeigt wird
+            if (jahr !== currentYear || monat !== currentMonth) return;
+            zeigeAktuellenMonat();
+            prefetchNachbarmonate();
         })
         .catch(error => console.error('Fehler beim Laden der Buchungen:', error));
 }
 
+// Holt nur die seit syncSeq geänderten Buchungen und wendet sie auf alle gecachten Monate an
+function syncBuchungen() {
+    if (syncSeq === null) return Promise.resolve();
+    if (syncLaeuft) return syncLaeuft.then(() => syncBuchungen());
+
+    const since = syncSeq;
+    syncLaeuft = fetch(`/api/buchungen?raum_id=${selectedRaumId}&since=${since}`)
+        .then(response => response.json())
+        .then(delta => {
+            if (delta.neu_laden) {
+                // Zu viele Änderungen: Cache verwerfen und neu laden
+                monatsCache.clear();
+                syncSeq = null;
+                loadBuchungen();
+                return;
+            }
+            if (delta.buchungen.length > 0 || delta.geloescht.length > 0) {
+                wendeDeltaAn(delta);
+                zeigeAktuellenMonat();
+            }
+            // Wurde währenddessen ein älterer Monat geladen, bleibt dessen (kleinerer) Stand maßgeblich
+            syncSeq = syncSeq === since ? delta.seq : Math.min(syncSeq, delta.seq);
+        })
+        .catch(error => console.error('Fehler beim Synchronisieren der Buchungen:', error))
+        .finally(() => { syncLaeuft = null; });
+    return syncLaeuft;
+}
+
+function wendeDeltaAn(delta) {
+    const entfernen = new Set(delta.geloescht.concat(delta.buchungen.map(b => b.id)));
+
+    monatsCache.forEach((liste, key) => {
+        const [, jahr, monat] = key.split(':').map(Number);
+        const beginn = new Date(jahr, monat, 1);
+        const ende = new Date(jahr, monat + 1, 1);
+
+        const neu = liste.filter(b => !entfernen.has(b.id));
+        delta.buchungen.forEach(b => {
+            if (new Date(b.start_datum) < ende && new Date(b.end_datum) > beginn) {
+                neu.push(b);
+            }
+        });
+        neu.sort((a, b) => new Date(a.start_datum) - new Date(b.start_datum));
+        monatsCache.set(key, neu);
+    });
+}
+
+// Wandelt das kompakte Spaltenformat der API zurück in eine Liste von Buchungsobjekten
+function columnsToBuchungen(data) {
+    if (Array.isArray(data)) return data;
+
+    return data.id.map((id, i) => ({
+        id: id,
+        raum_id: data.raum_id[i],
+        raum_name: data.raum_namen[data.raum_id[i]],
+        start_datum: data.start_datum[i],
+        end_datum: data.end_datum[i],
+        benutzer_name: data.benutzer_name[i],
+        benutzer_email: data.benutzer_email[i],
+        zweck: data.zweck[i],
+        status: data.status[i]
+    }));
+}
+
+function neuerIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}-${Math.random().toString(36).slice(2)}`;
+}
+
 function openBuchungModal(datum) {
+    buchungIdempotencyKey = neuerIdempotencyKey();
     document.getElementById('selected-raum-id').value = selectedRaumId;
     document.getElementById('selected-datum').value = datum.toISOString().split('T')[0];
     document.getElementById('selected-datum-anzeige').textContent =
@@ -366,7 +523,8 @@ async function submitBuchung(event) {
     fetch('/api/buchung', {
         method: 'POST',
         headers: {
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json',
+            'Idempotency-Key': buchungIdempotencyKey
         },
         body: JSON.stringify(buchungData)
     })
@@ -390,12 +548,48 @@ function renderBuchungsListe() {
     const liste = document.getElementById('buchungen-liste');
     liste.innerHTML = '';
 
-    if (buchungen.length === 0) {
-        liste.innerHTML = '<p style="text-align: center; color: #666; padding: 40px;">Keine Buchungen vorhanden.</p>';
+    // Auswahl, Bulk-Aktionen und Konflikt-Badges beziehen sich immer auf die angezeigte Liste
+    const eintraege = isAdminMode && listenUmfang === 'offen' ? offeneAnfragen : buchungen;
+
+    if (isAdminMode) {
+        const umfang = document.createElement('div');
+        umfang.className = 'listen-umfang';
+        umfang.innerHTML = `
+            <button class="btn ${listenUmfang === 'monat' ? 'active' : ''}" onclick="setzeListenUmfang('monat')">${monthNames[currentMonth]} ${currentYear}</button>
+            <button class="btn ${listenUmfang === 'offen' ? 'active' : ''}" onclick="setzeListenUmfang('offen')">Alle offenen Anfragen (${offeneAnfragen.length})</button>
+        `;
+        liste.appendChild(umfang);
+    }
+
+    if (eintraege.length === 0) {
+        const text = isAdminMode && listenUmfang === 'offen' ? 'Keine offenen Anfragen.' : 'Keine Buchungen vorhanden.';
+        liste.insertAdjacentHTML('beforeend', `<p style="text-align: center; color: #666; padding: 40px; grid-column: 1 / -1;">${text}</p>`);
         return;
     }
 
-    buchungen.forEach(buchung => {
+    // Nicht mehr sichtbare Buchungen aus der Auswahl entfernen
+    const sichtbareIds = new Set(eintraege.map(b => b.id));
+    bulkAuswahl.forEach(id => { if (!sichtbareIds.has(id)) bulkAuswahl.delete(id); });
+
+    if (isAdminMode) {
+        const leiste = document.createElement('div');
+        leiste.className = 'bulk-leiste';
+        leiste.innerHTML = `
+            <span id="bulk-anzahl">${bulkAuswahl.size} ausgewählt</span>
+            <button class="btn btn-success" onclick="bulkAktion('bestaetigen')">Auswahl bestätigen</button>
+            <button class="btn btn-danger" onclick="bulkAktion('ablehnen')">Auswahl ablehnen</button>
+            <button class="btn btn-delete" onclick="bulkAktion('loeschen')">Auswahl löschen</button>
+        `;
+        liste.appendChild(leiste);
+
+        if (konfliktGruppen.length > 0) {
+            liste.appendChild(renderKonfliktGruppen());
+        }
+    }
+
+    const konfliktIds = new Set(konfliktGruppen.flatMap(gruppe => gruppe.buchungen.map(b => b.id)));
+
+    eintraege.forEach(buchung => {
         const buchungElement = document.createElement('div');
         buchungElement.className = `buchung-item ${buchung.status}`;
 
@@ -433,7 +627,9 @@ function renderBuchungsListe() {
 
         buchungElement.innerHTML = `
             <div class="buchung-header">
+                ${isAdminMode ? `<input type="checkbox" class="bulk-checkbox" ${bulkAuswahl.has(buchung.id) ? 'checked' : ''} onchange="toggleBulkAuswahl(${buchung.id}, this.checked)">` : ''}
                 <strong>${buchung.benutzer_name}</strong>
+                ${isAdminMode && konfliktIds.has(buchung.id) ? '<span class="status-badge konflikt">Konflikt</span>' : ''}
                 <span class="status-badge ${buchung.status}">${statusText}</span>
             </div>
             <div class="buchung-details">
@@ -454,6 +650,205 @@ function renderBuchungsListe() {
     });
 }
 
+function setzeListenUmfang(umfang) {
+    listenUmfang = umfang;
+    bulkAuswahl.clear();
+    renderBuchungsListe();
+}
+
+// Konflikte und offene Anfragen gelten für alle Monate, nicht nur für den angezeigten
+function loadKonflikte() {
+    const laden = url => fetch(url).then(response => {
+        if (response.status === 401) return Promise.reject('Session abgelaufen');
+        return response.json();
+    });
+
+    Promise.all([laden('/api/admin/konflikte'), laden(`/api/admin/buchungen?status=ausstehend&raum_id=${selectedRaumId}`)])
+        .then(([gruppen, offene]) => {
+            konfliktGruppen = gruppen;
+            offeneAnfragen = offene;
+            renderBuchungsListe();
+        })
+        .catch(error => {
+            if (error !== 'Session abgelaufen') {
+                console.error('Fehler beim Laden der Konflikte:', error);
+            }
+        });
+}
+
+function formatZeitraum(buchung) {
+    const start = new Date(buchung.start_datum);
+    const ende = new Date(buchung.end_datum);
+    return `${start.toLocaleDateString('de-DE', {weekday: 'short', day: '2-digit', month: '2-digit', year: 'numeric'})}, ` +
+        `${start.toLocaleTimeString('de-DE', {hour: '2-digit', minute: '2-digit'})} - ` +
+        `${ende.toLocaleTimeString('de-DE', {hour: '2-digit', minute: '2-digit'})} Uhr`;
+}
+
+function renderKonfliktGruppen() {
+    const container = document.createElement('div');
+    container.className = 'konflikt-gruppen';
+    container.innerHTML = `<h3>Konflikte (${konfliktGruppen.length})</h3>`;
+
+    konfliktGruppen.forEach((gruppe, index) => {
+        const gruppeElement = document.createElement('div');
+        gruppeElement.className = 'konflikt-gruppe';
+
+        const eintraege = gruppe.buchungen.map(b => `
+            <div class="konflikt-eintrag ${b.status}">
+                <div>
+                    <strong>${b.benutzer_name}</strong> <span class="status-badge ${b.status}">${b.status}</span><br>
+                    <small>${formatZeitraum(b)}${b.zweck ? ' &middot; ' + b.zweck : ''}</small>
+                </div>
+                ${b.status === 'ausstehend' ? `<button class="btn btn-success" onclick="loeseKonflikt(${index}, ${b.id})">Diese bestätigen</button>` : ''}
+            </div>
+        `).join('');
+
+        gruppeElement.innerHTML = `
+            <div class="konflikt-kopf">${gruppe.raum_name || ''}: ${gruppe.buchungen.length} überschneidende Buchungen</div>
+            ${eintraege}
+        `;
+        container.appendChild(gruppeElement);
+    });
+
+    return container;
+}
+
+// Bestätigt eine Buchung der Gruppe und lehnt alle ausstehenden ab, die sich mit ihr überschneiden
+async function loeseKonflikt(gruppenIndex, buchungId) {
+    const gruppe = konfliktGruppen[gruppenIndex];
+    const gewaehlt = gruppe.buchungen.find(b => b.id === buchungId);
+    const abzulehnen = gruppe.buchungen.filter(b =>
+        b.id !== buchungId &&
+        b.status === 'ausstehend' &&
+        new Date(b.start_datum) < new Date(gewaehlt.end_datum) &&
+        new Date(b.end_datum) > new Date(gewaehlt.start_datum)
+    ).map(b => b.id);
+
+    const result = await customConfirm(
+        `Buchung von ${gewaehlt.benutzer_name} bestätigen` +
+        (abzulehnen.length ? ` und ${abzulehnen.length} überschneidende Anfrage(n) ablehnen?` : '?'),
+        'Konflikt lösen',
+        abzulehnen.length ? {showInput: true, inputLabel: 'Grund der Ablehnung (optional):'} : {}
+    );
+    if (!result.confirmed) return;
+
+    const sende = (aktion, ids, message) => fetch('/api/admin/buchungen/bulk', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify(message ? {aktion: aktion, ids: ids, message: message} : {aktion: aktion, ids: ids})
+    }).then(response => {
+        if (response.status === 401) {
+            customAlert('Ihre Admin-Session ist abgelaufen. Bitte melden Sie sich erneut an.', 'Session abgelaufen', 'warning');
+            isAdminMode = false;
+            updateAdminStatus();
+            renderBuchungsListe();
+            return Promise.reject('Session abgelaufen');
+        }
+        return response.json();
+    });
+
+    try {
+        const bestaetigung = await sende('bestaetigen', [buchungId]);
+        const ergebnis = bestaetigung.ergebnisse ? bestaetigung.ergebnisse[0] : null;
+        const schonBestaetigt = ergebnis && ergebnis.ergebnis === 'bereits_bearbeitet' && ergebnis.status === 'bestätigt';
+        if (!ergebnis || (ergebnis.ergebnis !== 'bestaetigt' && !schonBestaetigt)) {
+            await customAlert('Die Buchung konnte nicht bestätigt werden: ' +
+                (bestaetigung.error || (ergebnis && ergebnis.error) || 'unbekannter Fehler'), 'Fehler', 'error');
+        } else {
+            if (abzulehnen.length) {
+                await sende('ablehnen', abzulehnen, result.inputValue);
+            }
+            await customAlert('Konflikt wurde gelöst.', 'Erfolg', 'success');
+        }
+    } catch (error) {
+        if (error !== 'Session abgelaufen') {
+            console.error('Fehler:', error);
+            await customAlert('Es gab einen Fehler beim Lösen des Konflikts.', 'Fehler', 'error');
+        }
+        return;
+    }
+
+    loadBuchungen();
+    loadAdminLogs();
+    loadAdminStats();
+    loadKonflikte();
+}
+
+function toggleBulkAuswahl(buchungId, ausgewaehlt) {
+    if (ausgewaehlt) {
+        bulkAuswahl.add(buchungId);
+    } else {
+        bulkAuswahl.delete(buchungId);
+    }
+    const anzahl = document.getElementById('bulk-anzahl');
+    if (anzahl) anzahl.textContent = `${bulkAuswahl.size} ausgewählt`;
+}
+
+async function bulkAktion(aktion) {
+    if (bulkAuswahl.size === 0) {
+        await customAlert('Bitte wählen Sie mindestens eine Buchung aus.', 'Hinweis', 'warning');
+        return;
+    }
+
+    const titel = {bestaetigen: 'Buchungen bestätigen', ablehnen: 'Buchungen ablehnen', loeschen: 'Buchungen löschen'}[aktion];
+    const result = await customConfirm(
+        `Möchten Sie diese Aktion für ${bulkAuswahl.size} Buchung(en) ausführen?`,
+        titel,
+        aktion === 'ablehnen' ? {showInput: true, inputLabel: 'Grund der Ablehnung (optional):'} : {}
+    );
+    if (!result.confirmed) return;
+
+    const requestBody = {aktion: aktion, ids: Array.from(bulkAuswahl)};
+    if (result.inputValue) requestBody.message = result.inputValue;
+
+    fetch('/api/admin/buchungen/bulk', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify(requestBody)
+    })
+    .then(response => {
+        if (response.status === 401) {
+            // Session abgelaufen
+            customAlert('Ihre Admin-Session ist abgelaufen. Bitte melden Sie sich erneut an.', 'Session abgelaufen', 'warning');
+            isAdminMode = false;
+            updateAdminStatus();
+            renderBuchungsListe();
+            return Promise.reject('Session abgelaufen');
+        }
+        return response.json();
+    })
+    .then(async data => {
+        if (data.error) {
+            await customAlert('Fehler: ' + data.error, 'Fehler', 'error');
+            return;
+        }
+
+        bulkAuswahl.clear();
+        const z = data.zusammenfassung;
+        const erledigt = (z.bestaetigt || 0) + (z.abgelehnt || 0) + (z.geloescht || 0);
+        let text = `${erledigt} Buchung(en) bearbeitet.`;
+        if (z.konflikt) text += ` ${z.konflikt} wegen Konflikten nicht bestätigt.`;
+        if (z.bereits_bearbeitet) text += ` ${z.bereits_bearbeitet} bereits bearbeitet.`;
+        if (z.nicht_gefunden) text += ` ${z.nicht_gefunden} nicht gefunden.`;
+        await customAlert(text, 'Ergebnis', z.konflikt ? 'warning' : 'success');
+
+        loadBuchungen();
+        loadAdminLogs();
+        loadAdminStats();
+        loadKonflikte();
+    })
+    .catch(async error => {
+        if (error !== 'Session abgelaufen') {
+            console.error('Fehler:', error);
+            await customAlert('Es gab einen Fehler bei der Sammelaktion.', 'Fehler', 'error');
+        }
+    });
+}
+
 async function bestaetigeBuchung(buchungId) {
     const result = await customConfirm('Möchten Sie diese Buchung wirklich bestätigen?', 'Buchung bestätigen');
     if (!result.confirmed) return;
@@ -475,6 +870,7 @@ async function bestaetigeBuchung(buchungId) {
     .then(async data => {
         if (data.error) {
             await customAlert('Fehler: ' + data.error, 'Fehler', 'error');
+            loadBuchungen();
         } else {
             await customAlert('Buchung wurde bestätigt!', 'Erfolg', 'success');
             loadBuchungen();
@@ -483,6 +879,7 @@ async function bestaetigeBuchung(buchungId) {
             if (isAdminMode) {
                 loadAdminLogs();
                 loadAdminStats();
+                loadKonflikte();
             }
         }
     })
@@ -527,6 +924,12 @@ async function lehneAb(buchungId) {
         return response.json();
     })
     .then(async data => {
+        if (data.error) {
+            // z.B. 409: Anfrage wurde inzwischen per E-Mail-Link bearbeitet
+            await customAlert('Fehler: ' + data.error, 'Fehler', 'error');
+            loadBuchungen();
+            return;
+        }
         await customAlert('Buchung wurde abgelehnt.', 'Erfolg', 'success');
         loadBuchungen();
 
@@ -534,6 +937,7 @@ async function lehneAb(buchungId) {
         if (isAdminMode) {
             loadAdminLogs();
             loadAdminStats();
+            loadKonflikte();
         }
     })
     .catch(async error => {
@@ -637,11 +1041,15 @@ function updateAdminStatus() {
         loadAdminSettings();
         loadAdminLogs();
         loadAdminStats();
+        loadKonflikte();
     } else {
         buttonElement.classList.remove('active');
         buttonElement.title = 'Admin-Modus';
         sidebar.classList.remove('show');
         container.classList.remove('admin-mode');
+        konfliktGruppen = [];
+        offeneAnfragen = [];
+        listenUmfang = 'monat';
     }
 }
 
@@ -660,6 +1068,8 @@ function loadAdminSettings() {
         .then(settings => {
             document.getElementById('admin-email-display').value = settings.admin_email;
             document.getElementById('saal-email-input').value = settings.saal_verantwortlicher_email || '';
+            document.getElementById('benachrichtigung-modus').value = settings.benachrichtigung_modus;
+            document.getElementById('digest-intervall').value = settings.digest_intervall_minuten;
         })
         .catch(error => {
             if (error !== 'Session abgelaufen') {
@@ -711,8 +1121,52 @@ async function saveSaalEmail() {
     });
 }
 
-function loadAdminLogs() {
-    fetch('/api/admin/logs')
+async function saveBenachrichtigung() {
+    const modus = document.getElementById('benachrichtigung-modus').value;
+    const intervall = parseInt(document.getElementById('digest-intervall').value, 10);
+
+    if (!intervall || intervall < 1 || intervall > 1440) {
+        await customAlert('Bitte geben Sie ein Intervall zwischen 1 und 1440 Minuten ein.', 'Ungültiges Intervall', 'error');
+        return;
+    }
+
+    fetch('/api/admin/settings/benachrichtigung', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ modus: modus, intervall_minuten: intervall })
+    })
+    .then(response => {
+        if (response.status === 401) {
+            // Session abgelaufen
+            customAlert('Ihre Admin-Session ist abgelaufen. Bitte melden Sie sich erneut an.', 'Session abgelaufen', 'warning');
+            isAdminMode = false;
+            updateAdminStatus();
+            renderBuchungsListe();
+            return Promise.reject('Session abgelaufen');
+        }
+        return response.json();
+    })
+    .then(async data => {
+        if (data.error) {
+            await customAlert('Fehler: ' + data.error, 'Fehler', 'error');
+        } else {
+            await customAlert('Die Benachrichtigungseinstellungen wurden gespeichert!', 'Erfolg', 'success');
+        }
+    })
+    .catch(async error => {
+        if (error !== 'Session abgelaufen') {
+            console.error('Fehler:', error);
+            await customAlert('Es gab einen Fehler beim Speichern der Einstellungen.', 'Fehler', 'error');
+        }
+    });
+}
+
+function loadAdminLogs(cursor = null) {
+    let naechsterCursor = null;
+
+    fetch(cursor ? `/api/admin/logs?cursor=${encodeURIComponent(cursor)}` : '/api/admin/logs')
         .then(response => {
             if (response.status === 401) {
                 // Session abgelaufen
@@ -722,17 +1176,23 @@ function loadAdminLogs() {
                 renderBuchungsListe();
                 return Promise.reject('Session abgelaufen');
             }
+            naechsterCursor = response.headers.get('X-Naechster-Cursor');
             return response.json();
         })
         .then(logs => {
             const logContainer = document.getElementById('email-log');
 
-            if (logs.length === 0) {
+            if (!cursor && logs.length === 0) {
                 logContainer.innerHTML = '<p class="loading">Keine Einträge vorhanden.</p>';
                 return;
             }
 
-            logContainer.innerHTML = '';
+            if (cursor) {
+                const mehrButton = logContainer.querySelector('.log-mehr');
+                if (mehrButton) mehrButton.remove();
+            } else {
+                logContainer.innerHTML = '';
+            }
             logs.forEach(log => {
                 const logEntry = document.createElement('div');
                 logEntry.className = `log-entry ${getLogClass(log.status)}`;
@@ -760,6 +1220,15 @@ function loadAdminLogs() {
 
                 logContainer.appendChild(logEntry);
             });
+
+            // Ältere Einträge seitenweise nachladen
+            if (naechsterCursor) {
+                const mehrButton = document.createElement('button');
+                mehrButton.className = 'btn btn-secondary log-mehr';
+                mehrButton.textContent = 'Ältere Einträge laden';
+                mehrButton.addEventListener('click', () => loadAdminLogs(naechsterCursor));
+                logContainer.appendChild(mehrButton);
+            }
         })
         .catch(error => {
             if (error !== 'Session abgelaufen') {
@@ -787,6 +1256,7 @@ function loadAdminStats() {
             document.getElementById('stat-confirmed').textContent = stats.confirmed;
             document.getElementById('stat-rejected').textContent = stats.rejected;
             document.getElementById('stat-deleted').textContent = stats.deleted;
+            document.getElementById('stat-expired').textContent = stats.expired;
         })
         .catch(error => {
             if (error !== 'Session abgelaufen') {
@@ -804,6 +1274,7 @@ function getLogClass(status) {
         case 'ausstehend':
             return 'warning';
         case 'gelöscht':
+        case 'abgelaufen':
             return 'deleted';
         default:
             return '';
@@ -836,6 +1307,7 @@ async function loescheBuchung(buchungId) {
         if (isAdminMode) {
             loadAdminLogs();
             loadAdminStats();
+            loadKonflikte();
         }
     })
     .catch(async error => {
@@ -875,6 +1347,7 @@ async function storniereBuchung(buchungId) {
             if (isAdminMode) {
                 loadAdminLogs();
                 loadAdminStats();
+                loadKonflikte();
             }
         }
     })
@@ -0,0 +1,65 @@
+"""
+Gemeinsame Einrichtung für die Tests: app.py liest seine Konfiguration beim Import,
+deshalb werden temporäre Datenbank, Cache und Logging hier vor dem ersten Import gesetzt.
+TEST_DATABASE_URI wählt eine andere (leere, nur für Tests genutzte) Datenbank, z.B. PostgreSQL.
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import pytest
+
+TEST_DIR = tempfile.mkdtemp(prefix='raumbuchung-test-')
+os.environ['DATABASE_URI'] = os.getenv('TEST_DATABASE_URI') or 'sqlite:///' + os.path.join(TEST_DIR, 'test.db')
+os.environ['RESPONSE_CACHE_PATH'] = os.path.join(TEST_DIR, 'antwort_cache.db')
+os.environ['LOG_DIR'] = ''
+os.environ['BACKUP_DIR'] = os.path.join(TEST_DIR, 'backups')
+os.environ['BACKGROUND_JOBS_LOCK_FILE'] = os.path.join(TEST_DIR, 'hintergrund_jobs.lock')
+os.environ.setdefault('SECRET_KEY', 'test')
+os.environ.setdefault('ADMIN_PIN', '0000')
+os.environ.setdefault('ADMIN_EMAIL', 'admin@example.com')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_modul  # noqa: E402
+
+
+@pytest.fixture
+def datenbank(monkeypatch):
+    """Leere Datenbank (Standard-Raum, Zähler, Suchindex) mit App-Kontext; Mails und Limiter aus"""
+    app, db = app_modul.app, app_modul.db
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+        app_modul.init_db()
+        app_modul.suchindex_einrichten(db.engine, neu_aufbauen=True)
+        app_modul.antwort_cache.leeren(alles=True)
+        app_modul._auslastung_cache.clear()
+
+        monkeypatch.setattr(app.extensions['mail'], 'suppress', True)
+        monkeypatch.setattr(app_modul.limiter, 'enabled', False)
+        monkeypatch.setattr(app_modul, 'smtp_breaker', app_modul.CircuitBreaker(
+            app_modul.SMTP_BREAKER_THRESHOLD, app_modul.SMTP_BREAKER_RESET_SECONDS))
+        yield db
+        db.session.remove()
+
+
+@pytest.fixture
+def client(datenbank):
+    return app_modul.app.test_client()
+
+
+@pytest.fixture
+def admin_client(client):
+    with client.session_transaction() as s:
+        s['is_admin'] = True
+        s['admin_login_time'] = datetime.utcnow().isoformat()
+    return client
+
+
+@pytest.fixture
+def mails(datenbank):
+    """Liste der (unterdrückt) versendeten E-Mails"""
+    with app_modul.mail.record_messages() as ausgang:
+        yield ausgang
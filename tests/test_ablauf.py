@@ -0,0 +1,56 @@
+"""Ablauf unbearbeiteter Anfragen (Hintergrund-Job anfragen-ablaufen)"""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as app_modul
+from app import db, Buchung
+
+
+@pytest.fixture
+def berlin(monkeypatch):
+    """Serverzeit in Europe/Berlin (start_datum ist lokale Zeit, erstellt_am UTC)"""
+    monkeypatch.setenv('TZ', 'Europe/Berlin')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def anfrage(start, erstellt_am=None):
+    buchung = Buchung(raum_id=1, start_datum=start, end_datum=start + timedelta(hours=1),
+                      benutzer_name='Test', benutzer_email='test@example.com', status='ausstehend')
+    if erstellt_am:
+        buchung.erstellt_am = erstellt_am
+    db.session.add(buchung)
+    db.session.commit()
+    return buchung.id
+
+
+def status(buchung_id):
+    db.session.expire_all()
+    return db.session.get(Buchung, buchung_id).status
+
+
+def test_alte_anfragen_laufen_ab(datenbank):
+    zukunft = datetime.now() + timedelta(days=30)
+    alt = anfrage(zukunft, datetime.utcnow() - timedelta(hours=app_modul.PENDING_EXPIRY_HOURS + 1))
+    frisch = anfrage(zukunft + timedelta(hours=2))
+
+    app_modul.anfragen_ablaufen_lassen()
+
+    assert status(alt) == 'abgelaufen'
+    assert status(frisch) == 'ausstehend'
+    assert app_modul.get_ablauf_metriken()['abgelaufen'] == 1
+
+
+def test_begonnener_termin_laeuft_nach_lokaler_zeit_ab(datenbank, berlin):
+    # In Berlin liegt UTC 1-2 Stunden zurück: gegen utcnow() verglichen wäre dieser Termin noch nicht begonnen
+    begonnen = anfrage(datetime.now() - timedelta(minutes=30))
+    bald = anfrage(datetime.now() + timedelta(minutes=30))
+
+    app_modul.anfragen_ablaufen_lassen()
+
+    assert status(begonnen) == 'abgelaufen'
+    assert status(bald) == 'ausstehend'
@@ -0,0 +1,32 @@
+"""Admin-Liste der offenen Anfragen unabhängig vom angezeigten Monat"""
+from datetime import datetime, timedelta
+
+from app import db, Buchung
+
+
+def buchung_anlegen(beginn, status='ausstehend', raum_id=1):
+    buchung = Buchung(raum_id=raum_id, start_datum=beginn, end_datum=beginn + timedelta(hours=2),
+                      benutzer_name='Test', benutzer_email='test@example.com', status=status)
+    db.session.add(buchung)
+    db.session.commit()
+    return buchung.id
+
+
+def test_offene_anfragen_aller_monate(admin_client):
+    januar = buchung_anlegen(datetime(2030, 1, 10, 10))
+    maerz = buchung_anlegen(datetime(2030, 3, 5, 10))
+    buchung_anlegen(datetime(2030, 2, 1, 10), status='bestätigt')
+
+    monat = admin_client.get('/api/buchungen?raum_id=1&jahr=2030&monat=1').json
+    assert [b['id'] for b in monat] == [januar]
+
+    offen = admin_client.get('/api/admin/buchungen?status=ausstehend&raum_id=1').json
+    assert [b['id'] for b in offen] == [januar, maerz]
+
+
+def test_nur_fuer_admins(client):
+    assert client.get('/api/admin/buchungen').status_code == 401
+
+
+def test_ungueltiger_status(admin_client):
+    assert admin_client.get('/api/admin/buchungen?status=geloescht').status_code == 400
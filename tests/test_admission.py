@@ -0,0 +1,55 @@
+"""Admission Control: Lastabwurf mit 503 und Retry-After, reservierte Plätze für Admin und Health-Checks"""
+import pytest
+
+import app as app_modul
+from app import app
+
+
+@pytest.fixture
+def steuerung(datenbank, monkeypatch):
+    """Eigene Middleware mit 4 Plätzen, davon 2 öffentlich"""
+    innere_app = app_modul.admission.wsgi_app if app_modul.admission else app.wsgi_app
+    steuerung = app_modul.AdmissionControl(innere_app, max_inflight=4, public_share=0.5, retry_after=7)
+    monkeypatch.setattr(app, 'wsgi_app', steuerung)
+    return steuerung
+
+
+def test_oeffentliche_requests_werden_ueber_der_grenze_abgewiesen(admin_client, steuerung):
+    steuerung.in_bearbeitung = 2  # zwei laufende Requests
+
+    response = admin_client.get('/api/buchungen')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '7'
+    assert response.headers['Cache-Control'] == 'no-store'
+    assert 'ausgelastet' in response.json['error']
+    assert admin_client.get('/').content_type.startswith('text/html')
+
+    # Reservierte Plätze für Admin-Aktionen und Health-Checks
+    assert admin_client.get('/api/admin/stats').status_code == 200
+    assert admin_client.get('/health/live').status_code == 200
+    assert admin_client.get('/static/css/style.css').status_code == 200  # zählt nicht mit
+
+    status = steuerung.status()
+    assert status['abgewiesen'] == {'kritisch': 0, 'admin': 0, 'oeffentlich': 2}
+    assert status['in_bearbeitung'] == 2  # nach jedem Request wieder freigegeben
+
+
+def test_admin_requests_bei_voller_auslastung(admin_client, steuerung):
+    steuerung.in_bearbeitung = 4
+
+    assert admin_client.get('/api/admin/stats').status_code == 503
+    assert admin_client.get('/health/live').status_code == 200
+
+
+def test_erschoepfter_pool_weist_oeffentliche_requests_ab(client, steuerung, monkeypatch):
+    monkeypatch.setattr(steuerung, '_pool_voll', lambda: True)
+
+    assert client.get('/api/buchungen').status_code == 503
+    assert client.get('/health/live').status_code == 200
+    assert steuerung.status()['davon_pool_erschoepft'] == 1
+
+
+def test_unter_der_grenze_zugelassen(client, steuerung):
+    assert client.get('/api/buchungen').status_code == 200
+    assert steuerung.status()['zugelassen']['oeffentlich'] == 1
+    assert steuerung.status()['spitze'] == 1
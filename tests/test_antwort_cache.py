@@ -0,0 +1,67 @@
+"""Antwort-Cache für Monatslisten: Treffer und Invalidierung nach Schreibzugriffen"""
+from datetime import datetime, timedelta
+
+from app import db, Buchung
+
+
+def buchung_anlegen(beginn, dauer=2):
+    buchung = Buchung(raum_id=1, start_datum=beginn, end_datum=beginn + timedelta(hours=dauer),
+                      benutzer_name='Test', benutzer_email='test@example.com', status='ausstehend')
+    db.session.add(buchung)
+    db.session.commit()
+    return buchung.id
+
+
+def monat(client, m, raum_id=1):
+    pfad = f'/api/buchungen?jahr=2030&monat={m}' + (f'&raum_id={raum_id}' if raum_id else '')
+    response = client.get(pfad)
+    return response.headers['X-Cache'], [b['id'] for b in response.json]
+
+
+def test_treffer_und_invalidierung_ueber_das_orm(client):
+    erste = buchung_anlegen(datetime(2030, 8, 1, 10))
+    assert monat(client, 8) == ('MISS', [erste])
+    assert monat(client, 8) == ('HIT', [erste])
+    assert monat(client, 9)[0] == 'MISS'
+
+    beginn = datetime(2030, 8, 5, 10)
+    zweite = client.post('/api/buchung', json={
+        'raum_id': 1, 'start_datum': beginn.isoformat(), 'end_datum': (beginn + timedelta(hours=1)).isoformat(),
+        'benutzer_name': 'Test', 'benutzer_email': 'test@example.com'}).json['buchung_id']
+
+    assert monat(client, 8) == ('MISS', [erste, zweite])
+    assert monat(client, 8, raum_id=None) == ('MISS', [erste, zweite])  # Ansicht über alle Räume
+    assert monat(client, 9)[0] == 'HIT'  # anderer Monat bleibt gültig
+
+
+def test_invalidierung_nach_massen_update(admin_client):
+    buchung_id = buchung_anlegen(datetime(2030, 8, 1, 10))
+    monat(admin_client, 8)
+    assert monat(admin_client, 8)[0] == 'HIT'
+
+    # Bulk-Bestätigung läuft als bedingtes UPDATE am ORM vorbei
+    admin_client.post('/api/admin/buchungen/bulk', json={'aktion': 'bestaetigen', 'ids': [buchung_id]})
+
+    response = admin_client.get('/api/buchungen?raum_id=1&jahr=2030&monat=8')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.json[0]['status'] == 'bestätigt'
+
+
+def test_monatsuebergreifende_buchung_invalidiert_beide_monate(client):
+    monat(client, 8)
+    monat(client, 9)
+    buchung_id = buchung_anlegen(datetime(2030, 8, 31, 22), dauer=4)
+
+    assert monat(client, 8) == ('MISS', [buchung_id])
+    assert monat(client, 9) == ('MISS', [buchung_id])
+
+
+def test_admin_und_oeffentliche_ansicht_getrennt(client):
+    buchung_anlegen(datetime(2030, 8, 1, 10))
+    assert monat(client, 8)[0] == 'MISS'
+    assert monat(client, 8)[0] == 'HIT'
+
+    with client.session_transaction() as s:
+        s['is_admin'] = True
+        s['admin_login_time'] = datetime.utcnow().isoformat()
+    assert monat(client, 8)[0] == 'MISS'
@@ -0,0 +1,24 @@
+"""JS-Minifizierung für build-assets"""
+from app import minify_js
+
+
+def test_regex_literale_bleiben_erhalten():
+    quelltext = (
+        "const q = s.replace(/['\"]/g, '');  // Kommentar 1\n"
+        "const r = a / b / c; // Kommentar 2\n"
+        "if (/\\/\\//.test(x)) { y = 1; } /* Block */\n"
+        "function f() { return /[/]x/i.test(z); }\n"
+        "const t = `a ${ /}/.source } b`; // Kommentar 3\n"
+    )
+    assert minify_js(quelltext).splitlines() == [
+        "const q = s.replace(/['\"]/g, '');",
+        "const r = a / b / c;",
+        "if (/\\/\\//.test(x)) { y = 1; }",
+        "function f() { return /[/]x/i.test(z); }",
+        "const t = `a ${ /}/.source } b`;",
+    ]
+
+
+def test_kommentare_und_einrueckung_entfernt():
+    quelltext = "/* Kopf */\nfunction f() {\n    // Kommentar\n    return 'http://x'; // Ende\n}\n"
+    assert minify_js(quelltext) == "function f() {\nreturn 'http://x';\n}\n"
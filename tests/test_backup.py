@@ -0,0 +1,62 @@
+"""Volles und inkrementelles Backup mit Wiederherstellung (inkl. gelöschter Zeilen)"""
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as app_modul
+from app import db, Buchung, BuchungEvent, IdempotenzSchluessel
+
+
+def buchung_anlegen(tag, status='ausstehend'):
+    beginn = datetime(2030, 1, tag, 10)
+    buchung = Buchung(raum_id=1, start_datum=beginn, end_datum=beginn + timedelta(hours=2),
+                      benutzer_name='Test', benutzer_email='test@example.com', status=status)
+    db.session.add(buchung)
+    db.session.commit()
+    return buchung.id
+
+
+def stand():
+    db.session.expire_all()
+    return {
+        'buchungen': sorted((b.id, b.status, b.admin_benachrichtigt_am) for b in Buchung.query.all()),
+        'events': db.session.query(BuchungEvent).count(),
+        'schluessel': sorted(k.schluessel for k in IdempotenzSchluessel.query.all()),
+    }
+
+
+@pytest.fixture
+def backup_verzeichnis(datenbank, tmp_path):
+    if not app_modul.ist_sqlite():
+        pytest.skip('Der Test ersetzt die Datenbankdatei')
+    return str(tmp_path)
+
+
+def test_inkrementelles_backup_spielt_loeschungen_ein(backup_verzeichnis):
+    erste = buchung_anlegen(1)
+    zweite = buchung_anlegen(2)
+    db.session.add(BuchungEvent(buchung_id=erste, zeitpunkt=datetime.utcnow(), typ='erstellt', quelle='test'))
+    db.session.add(IdempotenzSchluessel(schluessel='alt', anfrage_hash='x', status_code=201, antwort='{}'))
+    db.session.commit()
+    app_modul.backup_erstellen(backup_verzeichnis)
+
+    # Seit dem vollen Backup: harte Löschungen, neue Buchung, Massen-Update ohne ORM
+    db.session.query(BuchungEvent).delete()
+    IdempotenzSchluessel.query.delete()
+    Buchung.query.filter_by(id=zweite).delete()
+    buchung_anlegen(3)
+    markierung = datetime.utcnow()
+    Buchung.query.filter_by(id=erste).update(
+        {Buchung.admin_benachrichtigt_am: markierung, Buchung.geaendert_am: markierung}, synchronize_session=False)
+    db.session.commit()
+    erwartet = stand()
+    archiv, manifest = app_modul.backup_erstellen(backup_verzeichnis, inkrementell=True)
+    assert manifest['typ'] == 'inkrementell'
+
+    # Danach weiter ändern, dann die Kette einspielen
+    buchung_anlegen(4)
+    db.session.add(IdempotenzSchluessel(schluessel='neu', anfrage_hash='y', status_code=201, antwort='{}'))
+    db.session.commit()
+    app_modul.backup_wiederherstellen(archiv)
+
+    assert stand() == erwartet
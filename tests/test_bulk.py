@@ -0,0 +1,78 @@
+"""Sammelaktionen POST /api/admin/buchungen/bulk"""
+from datetime import datetime, timedelta
+
+from app import db, Buchung
+
+
+def buchung_anlegen(tag, stunde=10, dauer=2, status='ausstehend'):
+    beginn = datetime(2030, 6, tag, stunde)
+    buchung = Buchung(raum_id=1, start_datum=beginn, end_datum=beginn + timedelta(hours=dauer),
+                      benutzer_name='Test', benutzer_email='test@example.com', status=status)
+    db.session.add(buchung)
+    db.session.commit()
+    return buchung.id
+
+
+def bulk(admin_client, aktion, ids):
+    response = admin_client.post('/api/admin/buchungen/bulk', json={'aktion': aktion, 'ids': ids})
+    assert response.status_code == 200, response.json
+    return {e['id']: e['ergebnis'] for e in response.json['ergebnisse']}, response.json['zusammenfassung']
+
+
+def status(buchung_id):
+    db.session.expire_all()
+    return db.session.get(Buchung, buchung_id).status
+
+
+def test_bestaetigen_mit_konflikten(admin_client, mails):
+    bestaetigt = buchung_anlegen(1, status='bestätigt')
+    gegen_bestaetigte = buchung_anlegen(1, stunde=11)
+    frueher = buchung_anlegen(2, stunde=10)
+    spaeter = buchung_anlegen(2, stunde=11)  # überschneidet sich mit "frueher" innerhalb der Auswahl
+    frei = buchung_anlegen(3)
+
+    ergebnisse, zusammenfassung = bulk(admin_client, 'bestaetigen',
+                                       [gegen_bestaetigte, spaeter, frueher, frei, bestaetigt, 999])
+
+    assert ergebnisse == {
+        gegen_bestaetigte: 'konflikt',
+        spaeter: 'konflikt',
+        frueher: 'bestaetigt',
+        frei: 'bestaetigt',
+        bestaetigt: 'bereits_bearbeitet',
+        999: 'nicht_gefunden',
+    }
+    assert zusammenfassung == {'konflikt': 2, 'bestaetigt': 2, 'bereits_bearbeitet': 1, 'nicht_gefunden': 1}
+    assert [status(i) for i in (gegen_bestaetigte, spaeter, frueher, frei)] == \
+        ['ausstehend', 'ausstehend', 'bestätigt', 'bestätigt']
+    assert len(mails) == 2
+
+
+def test_ablehnen_nur_ausstehende(admin_client):
+    offen = buchung_anlegen(1)
+    abgelehnt = buchung_anlegen(2, status='abgelehnt')
+
+    ergebnisse, _ = bulk(admin_client, 'ablehnen', [offen, abgelehnt])
+
+    assert ergebnisse == {offen: 'abgelehnt', abgelehnt: 'bereits_bearbeitet'}
+    assert status(offen) == 'abgelehnt'
+
+
+def test_loeschen_unabhaengig_vom_status(admin_client):
+    ids = [buchung_anlegen(1, status='bestätigt'), buchung_anlegen(2)]
+
+    ergebnisse, _ = bulk(admin_client, 'loeschen', ids)
+
+    assert set(ergebnisse.values()) == {'geloescht'}
+    db.session.expire_all()
+    assert Buchung.query.filter_by(is_active=True).count() == 0
+
+
+def test_ungueltige_anfragen(admin_client):
+    for daten in ({'aktion': 'archivieren', 'ids': [1]}, {'aktion': 'loeschen', 'ids': []},
+                  {'aktion': 'loeschen', 'ids': [True]}, {'aktion': 'loeschen', 'ids': list(range(501))}):
+        assert admin_client.post('/api/admin/buchungen/bulk', json=daten).status_code == 400
+
+
+def test_nur_fuer_admins(client):
+    assert client.post('/api/admin/buchungen/bulk', json={'aktion': 'loeschen', 'ids': [1]}).status_code == 401
@@ -0,0 +1,58 @@
+"""Delta-Sync GET /api/buchungen?since=<seq>"""
+from datetime import datetime, timedelta
+
+import app as app_modul
+from app import db, Buchung
+
+
+def buchung_anlegen(tag, raum_id=1):
+    beginn = datetime(2030, 7, tag, 10)
+    buchung = Buchung(raum_id=raum_id, start_datum=beginn, end_datum=beginn + timedelta(hours=2),
+                      benutzer_name='Test', benutzer_email='test@example.com', status='ausstehend')
+    db.session.add(buchung)
+    db.session.commit()
+    return buchung.id
+
+
+def test_aenderungen_und_tombstones(admin_client):
+    bleibt, bestaetigen, loeschen = buchung_anlegen(1), buchung_anlegen(2), buchung_anlegen(3)
+    response = admin_client.get('/api/buchungen?raum_id=1&jahr=2030&monat=7')
+    seq = int(response.headers['X-Aenderung-Seq'])
+    assert {b['id'] for b in response.json} == {bleibt, bestaetigen, loeschen}
+
+    assert admin_client.post(f'/api/buchung/{bestaetigen}/bestaetigen', json={}).status_code == 200
+    assert admin_client.delete(f'/api/buchung/{loeschen}/loeschen').status_code == 200
+
+    delta = admin_client.get(f'/api/buchungen?raum_id=1&since={seq}').json
+    assert [(b['id'], b['status']) for b in delta['buchungen']] == [(bestaetigen, 'bestätigt')]
+    assert delta['geloescht'] == [loeschen]
+    assert delta['seq'] > seq
+
+    leer = admin_client.get(f"/api/buchungen?raum_id=1&since={delta['seq']}").json
+    assert leer == {'seq': delta['seq'], 'buchungen': [], 'geloescht': []}
+
+
+def test_filter_nach_raum(client):
+    seq = app_modul.aktuelle_aenderung_seq()
+    buchung_anlegen(1, raum_id=2)
+    assert client.get(f'/api/buchungen?raum_id=1&since={seq}').json['buchungen'] == []
+    assert len(client.get(f'/api/buchungen?raum_id=2&since={seq}').json['buchungen']) == 1
+
+
+def test_zu_viele_aenderungen_erzwingen_neu_laden(client, monkeypatch):
+    monkeypatch.setattr(app_modul, 'DELTA_MAX_ZEILEN', 1)
+    seq = app_modul.aktuelle_aenderung_seq()
+    buchung_anlegen(1)
+    buchung_anlegen(2)
+
+    delta = client.get(f'/api/buchungen?since={seq}').json
+    assert delta['neu_laden'] is True
+    assert delta['seq'] >= seq + 2
+
+
+def test_stand_aus_der_zukunft_und_ungueltige_werte(client):
+    buchung_anlegen(1)
+    seq = app_modul.aktuelle_aenderung_seq()
+    # z.B. eine nachlaufende Replik: auf den eigenen Stand begrenzen statt Änderungen zu verschweigen
+    assert client.get(f'/api/buchungen?since={seq + 100}').json['seq'] == seq
+    assert client.get('/api/buchungen?since=-1').status_code == 400
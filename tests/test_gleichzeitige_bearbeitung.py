@@ -0,0 +1,79 @@
+"""Optimistische Sperre: gleichzeitige Bearbeitung derselben Anfrage (Admin-Panel, E-Mail-Link, Ablauf-Job)"""
+from datetime import datetime, timedelta
+
+import app as app_modul
+from app import db, Buchung, BuchungEvent
+
+
+def buchung_anlegen():
+    beginn = datetime(2030, 9, 1, 10)
+    buchung = Buchung(raum_id=1, start_datum=beginn, end_datum=beginn + timedelta(hours=2),
+                      benutzer_name='Test', benutzer_email='test@example.com', status='ausstehend')
+    db.session.add(buchung)
+    db.session.commit()
+    return buchung.id
+
+
+def andere_seite(buchung_id, **werte):
+    """Ändert die Buchung über eine eigene Verbindung, wie ein paralleler Request"""
+    with db.engine.begin() as conn:
+        conn.execute(db.update(Buchung).where(Buchung.id == buchung_id)
+                     .values(version=Buchung.version + 1, **werte))
+
+
+def vorher(monkeypatch, name, aktion):
+    """Führt `aktion` aus, bevor die Route die Funktion `name` aufruft (nachdem sie die Buchung gelesen hat)"""
+    original = getattr(app_modul, name)
+
+    def wrapper(*args, **kwargs):
+        aktion()
+        return original(*args, **kwargs)
+    monkeypatch.setattr(app_modul, name, wrapper)
+
+
+def test_bestaetigen_nach_paralleler_ablehnung(admin_client, monkeypatch, mails):
+    buchung_id = buchung_anlegen()
+    vorher(monkeypatch, 'naechste_aenderung_seq', lambda: andere_seite(buchung_id, status='abgelehnt'))
+
+    response = admin_client.post(f'/api/buchung/{buchung_id}/bestaetigen', json={})
+
+    assert response.status_code == 409
+    assert response.json['status'] == 'abgelehnt'
+    db.session.expire_all()
+    assert db.session.get(Buchung, buchung_id).status == 'abgelehnt'
+    assert db.session.query(BuchungEvent).filter_by(typ='bestaetigt').count() == 0
+    assert len(mails) == 0
+
+
+def test_email_link_nach_bearbeitung_im_admin_panel(admin_client):
+    buchung_id = buchung_anlegen()
+    token = app_modul.generate_token(buchung_id)
+    assert admin_client.post(f'/api/buchung/{buchung_id}/ablehnen', json={}).status_code == 200
+
+    response = admin_client.get(f'/buchung/bestaetigen/{token}')
+
+    assert 'Bereits bearbeitet' in response.get_data(as_text=True)
+    db.session.expire_all()
+    assert db.session.get(Buchung, buchung_id).status == 'abgelehnt'
+
+
+def test_orm_update_auf_veraltete_version_ergibt_409(admin_client, monkeypatch):
+    buchung_id = buchung_anlegen()
+    vorher(monkeypatch, 'protokolliere', lambda: andere_seite(buchung_id))
+
+    response = admin_client.delete(f'/api/buchung/{buchung_id}/loeschen')
+
+    assert response.status_code == 409
+    assert 'inzwischen geändert' in response.json['error']  # StaleDataError-Handler
+    db.session.expire_all()
+    assert db.session.get(Buchung, buchung_id).is_active
+
+
+def test_version_steigt_bei_jedem_uebergang(admin_client):
+    buchung_id = buchung_anlegen()
+    version = db.session.get(Buchung, buchung_id).version
+
+    admin_client.post(f'/api/buchung/{buchung_id}/bestaetigen', json={})
+
+    db.session.expire_all()
+    assert db.session.get(Buchung, buchung_id).version == version + 1
@@ -0,0 +1,37 @@
+"""Readiness-Probe: Ausfall der Lese-Replik ist degraded, nicht unready"""
+import pytest
+
+import app as app_modul
+
+
+@pytest.fixture
+def replik_ausgefallen(datenbank, monkeypatch):
+    echte_engine = app_modul._health_engine
+
+    def health_engine(bind=None):
+        if bind == 'replica':
+            raise ConnectionError('Replik nicht erreichbar')
+        return echte_engine(bind)
+
+    monkeypatch.setattr(app_modul, 'DATABASE_REPLICA_URI', 'postgresql://replik/raumbuchung')
+    monkeypatch.setattr(app_modul, '_health_engine', health_engine)
+    monkeypatch.setattr(app_modul, '_health_cache', {'zeit': 0.0, 'ergebnis': None})
+
+
+def test_replik_ausfall_meldet_degraded(client, replik_ausgefallen):
+    response = client.get('/health/ready')
+    assert response.status_code == 200
+    assert response.json['status'] == 'degraded'
+    assert response.json['database'] == 'connected'
+    assert response.json['replica'] == 'disconnected'
+
+
+def test_primaere_datenbank_ausfall_ist_unready(client, monkeypatch):
+    def health_engine(bind=None):
+        raise ConnectionError('Datenbank nicht erreichbar')
+
+    monkeypatch.setattr(app_modul, '_health_engine', health_engine)
+    monkeypatch.setattr(app_modul, '_health_cache', {'zeit': 0.0, 'ergebnis': None})
+    response = client.get('/health/ready')
+    assert response.status_code == 503
+    assert response.json['status'] == 'unhealthy'
@@ -0,0 +1,34 @@
+"""Hintergrund-Jobs laufen nur in dem Prozess, der die Sperrdatei hält"""
+import multiprocessing
+import threading
+
+import app as app_modul
+
+
+def sperre_halten(gehalten, freigeben):
+    sperre = app_modul._scheduler_sperre_nehmen()
+    gehalten.set()
+    freigeben.wait(10)
+    sperre.close()
+
+
+def test_anderer_prozess_uebernimmt_die_sperre(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_modul, 'BACKGROUND_JOBS_LOCK_FILE', str(tmp_path / 'jobs.lock'))
+    monkeypatch.setattr(app_modul, 'BACKGROUND_JOBS_LOCK_RETRY', 0.05)
+    kontext = multiprocessing.get_context('fork')
+    gehalten, freigeben = kontext.Event(), kontext.Event()
+    worker = kontext.Process(target=sperre_halten, args=(gehalten, freigeben), daemon=True)
+    worker.start()
+    assert gehalten.wait(5)
+
+    ergebnis = []
+    warten = threading.Thread(target=lambda: ergebnis.append(app_modul._scheduler_sperre_nehmen()), daemon=True)
+    warten.start()
+    warten.join(0.5)
+    assert warten.is_alive()  # solange der erste Worker die Sperre hält, führt dieser Prozess keine Jobs aus
+
+    freigeben.set()  # erster Worker endet (z.B. Neustart nach max_requests)
+    worker.join(5)
+    warten.join(5)
+    assert ergebnis and ergebnis[0] is not None
+    ergebnis[0].close()
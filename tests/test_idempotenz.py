@@ -0,0 +1,51 @@
+"""Idempotency-Key für POST /api/buchung"""
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+from app import db, Buchung, IdempotenzSchluessel
+
+
+def anfrage(name='Test'):
+    beginn = datetime(2030, 5, 10, 10)
+    return {'raum_id': 1, 'start_datum': beginn.isoformat(), 'end_datum': (beginn + timedelta(hours=2)).isoformat(),
+            'benutzer_name': name, 'benutzer_email': 'test@example.com'}
+
+
+def test_wiederholung_liefert_gespeicherte_antwort(client, mails):
+    erste = client.post('/api/buchung', json=anfrage(), headers={'Idempotency-Key': 'abc'})
+    zweite = client.post('/api/buchung', json=anfrage(), headers={'Idempotency-Key': 'abc'})
+
+    assert erste.status_code == zweite.status_code == 201
+    assert 'Idempotent-Replayed' not in erste.headers
+    assert zweite.headers['Idempotent-Replayed'] == 'true'
+    assert zweite.json == erste.json
+    assert Buchung.query.count() == 1
+    assert len(mails) == 2  # Admin und Benutzer, nur beim ersten Request
+
+
+def test_key_mit_anderer_anfrage_wird_abgelehnt(client):
+    client.post('/api/buchung', json=anfrage(), headers={'Idempotency-Key': 'abc'})
+    response = client.post('/api/buchung', json=anfrage('Jemand anderes'), headers={'Idempotency-Key': 'abc'})
+
+    assert response.status_code == 422
+    assert Buchung.query.count() == 1
+
+
+def test_key_in_bearbeitung(client):
+    body = json.dumps(anfrage())
+    # Ein paralleler Request hat den Key angelegt, aber noch keine Antwort gespeichert
+    db.session.add(IdempotenzSchluessel(schluessel='abc', anfrage_hash=hashlib.sha256(body.encode()).hexdigest()))
+    db.session.commit()
+
+    response = client.post('/api/buchung', data=body, content_type='application/json',
+                           headers={'Idempotency-Key': 'abc'})
+    assert response.status_code == 409
+    assert response.headers['Retry-After'] == '2'
+    assert Buchung.query.count() == 0
+
+
+def test_ohne_key_entstehen_duplikate(client):
+    client.post('/api/buchung', json=anfrage())
+    client.post('/api/buchung', json=anfrage())
+    assert Buchung.query.count() == 2
@@ -0,0 +1,41 @@
+"""Jahresübersicht GET /api/raeume/<id>/jahr/<jahr>"""
+from datetime import datetime, timedelta
+
+import app as app_modul
+from app import db, Buchung
+
+
+def buchung_anlegen(beginn, stunden, status='bestätigt', raum_id=1, is_active=True):
+    buchung = Buchung(raum_id=raum_id, start_datum=beginn, end_datum=beginn + timedelta(hours=stunden),
+                      benutzer_name='Test', benutzer_email='test@example.com', status=status, is_active=is_active)
+    db.session.add(buchung)
+    db.session.commit()
+
+
+def test_tageswerte(client, monkeypatch):
+    monkeypatch.setattr(app_modul, 'FULLY_BOOKED_HOURS', 5)
+    buchung_anlegen(datetime(2030, 3, 1, 8), 2)
+    buchung_anlegen(datetime(2030, 3, 1, 12), 3)
+    buchung_anlegen(datetime(2030, 3, 1, 16), 1, status='ausstehend')
+    buchung_anlegen(datetime(2030, 3, 2, 10), 1, status='abgelehnt')
+    buchung_anlegen(datetime(2030, 3, 3, 10), 1, is_active=False)
+    buchung_anlegen(datetime(2030, 3, 4, 10), 1, raum_id=2)
+
+    daten = client.get('/api/raeume/1/jahr/2030').json
+
+    assert daten['felder'] == ['minuten', 'bestaetigt', 'ausstehend', 'ausgebucht']
+    assert daten['ausgebucht_ab_minuten'] == 300
+    assert daten['tage'] == {'2030-03-01': [300, 2, 1, 1]}
+
+
+def test_mehrtaegige_buchung_und_jahreswechsel(client):
+    buchung_anlegen(datetime(2029, 12, 31, 20), 30)  # bis 1.1. 24:00 (2.1. 02:00)
+
+    tage = client.get('/api/raeume/1/jahr/2030').json['tage']
+
+    assert tage == {'2030-01-01': [24 * 60, 1, 0, 1], '2030-01-02': [120, 1, 0, 0]}
+
+
+def test_ungueltige_anfragen(client):
+    assert client.get('/api/raeume/99/jahr/2030').status_code == 404
+    assert client.get('/api/raeume/1/jahr/1800').status_code == 400
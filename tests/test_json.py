@@ -0,0 +1,44 @@
+"""JSON-Antworten: orjson-Provider und Komprimierung"""
+import gzip
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from flask import jsonify
+from flask.json.provider import DefaultJSONProvider
+
+import app as app_modul
+from app import app
+
+
+@pytest.mark.skipif(app_modul.orjson is None, reason='orjson nicht installiert')
+def test_jsonify_nutzt_orjson_mit_gleicher_ausgabe(datenbank, monkeypatch):
+    daten = {'b': [1, 2.5, None], 'a': 'Müller', 'datum': datetime(2030, 1, 2, 3, 4), 'betrag': Decimal('1.50')}
+    aufrufe = []
+    original = app_modul.orjson.dumps
+    monkeypatch.setattr(app_modul.orjson, 'dumps', lambda *a, **k: aufrufe.append(1) or original(*a, **k))
+
+    with app.test_request_context():
+        schnell = jsonify(daten).get_data()
+        app.json = DefaultJSONProvider(app)
+        try:
+            standard = jsonify(daten).get_data()
+        finally:
+            app.json = app_modul.FastJSONProvider(app)
+
+    assert aufrufe  # jsonify ging über orjson, nicht über den Fallback
+    assert json.loads(schnell) == json.loads(standard)
+
+
+def test_grosse_antworten_werden_komprimiert(datenbank):
+    daten = [{'id': i, 'text': 'x' * 20} for i in range(200)]
+
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+        gross = app_modul.compress_json_response(jsonify(daten))
+        klein = app_modul.compress_json_response(jsonify({'id': 1}))
+
+    assert gross.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in gross.headers['Vary']
+    assert json.loads(gzip.decompress(gross.get_data())) == daten
+    assert 'Content-Encoding' not in klein.headers
@@ -0,0 +1,120 @@
+"""SMTP-Ausfall: Circuit Breaker und Postausgang"""
+import smtplib
+from datetime import datetime, timedelta
+
+import pytest
+from flask_mail import Message
+
+import app as app_modul
+from app import app, db, MailAusgang
+
+
+class SMTPAttrappe:
+    """Ersetzt die SMTP-Verbindung; `ausfall` simuliert einen nicht erreichbaren Server"""
+
+    def __init__(self):
+        self.ausfall = False
+        self.abgelehnt = set()  # Empfänger, die der Server ablehnt
+        self.verbindungen = 0
+        self.gesendet = []
+
+    def verbinden(self):
+        self.verbindungen += 1
+        if self.ausfall:
+            raise ConnectionRefusedError('Verbindung abgelehnt')
+        return self
+
+    def sendmail(self, absender, empfaenger, nachricht, *optionen):
+        if self.abgelehnt.intersection(empfaenger):
+            raise smtplib.SMTPRecipientsRefused({e: (550, b'unbekannt') for e in empfaenger})
+        self.gesendet.append(empfaenger)
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def smtp(datenbank, monkeypatch):
+    attrappe = SMTPAttrappe()
+    zustand = app.extensions['mail']
+    monkeypatch.setattr(zustand, 'suppress', False)
+    monkeypatch.setattr(zustand, 'default_sender', 'raum@example.com')
+    monkeypatch.setitem(app.config, 'MAIL_SERVER', 'smtp.example.com')
+    monkeypatch.setattr(app_modul.TimeoutMailConnection, 'configure_host', lambda verbindung: attrappe.verbinden())
+    monkeypatch.setattr(app_modul, 'smtp_breaker', app_modul.CircuitBreaker(2, 60))
+    return attrappe
+
+
+def nachricht(empfaenger='test@example.com'):
+    return Message(subject='Test', recipients=[empfaenger], html='<p>Test</p>')
+
+
+def test_breaker_oeffnet_und_merkt_vor(smtp):
+    smtp.ausfall = True
+    for _ in range(2):
+        with pytest.raises(OSError):
+            app_modul.mail.send(nachricht())
+    # Nach zwei Fehlern in Folge wird der Server nicht mehr angefragt
+    with pytest.raises(app_modul.SMTPNichtVerfuegbar):
+        app_modul.mail.send(nachricht())
+
+    assert smtp.verbindungen == 2
+    assert app_modul.smtp_breaker.zustand() == 'offen'
+    assert MailAusgang.query.count() == 3
+
+
+def test_halboffen_ein_probeversuch(datenbank):
+    breaker = app_modul.CircuitBreaker(1, 0)
+    breaker.fehler(OSError('weg'))
+    assert breaker.zustand() == 'halboffen'
+    assert breaker.erlaubt() is True
+    assert breaker.erlaubt() is False  # nur ein Probeversuch gleichzeitig
+    breaker.erfolg()
+    assert breaker.zustand() == 'geschlossen'
+
+
+def test_buchung_trotz_smtp_ausfall(client, smtp):
+    smtp.ausfall = True
+    beginn = datetime(2030, 10, 1, 10)
+    response = client.post('/api/buchung', json={
+        'raum_id': 1, 'start_datum': beginn.isoformat(), 'end_datum': (beginn + timedelta(hours=1)).isoformat(),
+        'benutzer_name': 'Test', 'benutzer_email': 'test@example.com'})
+
+    assert response.status_code == 201
+    assert response.json['email_sent'] is False
+    assert MailAusgang.query.count() == 2  # an Admin und Benutzer
+
+
+def test_postausgang_ueberspringt_unzustellbare(smtp, monkeypatch):
+    monkeypatch.setattr(app_modul, 'SMTP_OUTBOX_MAX_VERSUCHE', 2)
+    for empfaenger in ('weg@example.com', 'a@example.com', 'b@example.com'):
+        app_modul.postausgang_vormerken(nachricht(empfaenger), 'Testfehler')
+    smtp.abgelehnt = {'weg@example.com'}
+
+    app_modul.postausgang_zustellen()
+
+    assert smtp.gesendet == [['a@example.com'], ['b@example.com']]
+    db.session.expire_all()
+    weg = MailAusgang.query.filter_by(empfaenger='weg@example.com').one()
+    assert weg.gesendet_am is None and weg.aufgegeben_am is not None  # 2. Fehlversuch: aufgegeben
+    assert app_modul.postausgang_offen() == 0
+
+
+def test_postausgang_stoppt_bei_offenem_breaker(smtp):
+    for empfaenger in ('a@example.com', 'b@example.com', 'c@example.com'):
+        app_modul.postausgang_vormerken(nachricht(empfaenger), 'Testfehler')
+    smtp.ausfall = True
+
+    app_modul.postausgang_zustellen()
+
+    # Zwei echte Fehlversuche öffnen den Breaker, der dritte Eintrag wird nicht mehr versucht
+    assert smtp.verbindungen == 2
+    db.session.expire_all()
+    assert sorted(e.versuche for e in MailAusgang.query) == [1, 2, 2]
+    assert MailAusgang.query.filter(MailAusgang.beansprucht_am.isnot(None)).count() == 0
+
+    smtp.ausfall = False
+    app_modul.smtp_breaker.erfolg()
+    app_modul.postausgang_zustellen()
+    assert len(smtp.gesendet) == 3
+    assert app_modul.postausgang_offen() == 0
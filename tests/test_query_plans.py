@@ -0,0 +1,162 @@
+"""
+Ausführungspläne der häufigen Abfragen: Die Routen und Hintergrund-Jobs werden mit Testdaten ausgeführt,
+jede dabei abgesetzte Abfrage wird mit EXPLAIN (QUERY PLAN) geprüft. Ein vollständiger Tabellenscan über
+eine Tabelle mit mehr als SCHWELLE Zeilen ist ein Fehler.
+
+Standardmäßig auf SQLite; mit TEST_POSTGRES_URI (leere Test-Datenbank, Tabellen werden gelöscht!) zusätzlich
+auf PostgreSQL.
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.engine import Engine
+
+import app as app_modul
+from app import app, db, Buchung, BuchungEvent
+
+JAHRE = 1
+SCHWELLE = 1000
+
+PLAN_ROUTEN = [
+    ('GET', '/'),
+    ('GET', '/api/buchungen?jahr={jahr}&monat=5'),
+    ('GET', '/api/buchungen?jahr={jahr}&monat=5&raum_id=1&format=columns'),
+    ('GET', '/api/buchungen?since={seq}'),
+    ('GET', '/api/raeume/1/jahr/{jahr}'),
+    ('POST', '/api/buchung'),
+    ('POST', '/api/buchung/{buchung_id}/bestaetigen'),
+    ('GET', '/api/admin/stats'),
+    ('GET', '/api/admin/logs'),
+    ('GET', '/api/admin/logs?cursor={cursor}'),
+    ('GET', '/api/admin/konflikte'),
+    ('GET', '/api/admin/buchungen?raum_id=1'),
+    ('GET', '/api/admin/suche?q=musikverein'),
+    ('GET', '/api/admin/auslastung?raster=tag'),
+]
+
+
+def sqlite_plan_pruefen(conn, sql, parameter, grosse_tabellen):
+    """Gibt (Plan als Text, Liste vollständig gescannter großer Tabellen) zurück"""
+    zeilen = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql, parameter).fetchall()
+    vollscans = []
+    for zeile in zeilen:
+        # Je nach SQLite-Version "SCAN buchung" oder "SCAN TABLE buchung AS buchung_1"
+        treffer = re.match(r'SCAN (?:TABLE )?(\w+)(.*)$', zeile[-1])
+        if treffer and 'INDEX' not in treffer.group(2):
+            tabelle = re.sub(r'_\d+$', '', treffer.group(1))
+            if tabelle in grosse_tabellen:
+                vollscans.append(tabelle)
+    return ' | '.join(zeile[-1] for zeile in zeilen), vollscans
+
+
+def postgres_plan_pruefen(conn, sql, parameter, grosse_tabellen):
+    plan = conn.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + sql, parameter).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    knoten, beschreibung, vollscans = [plan[0]['Plan']], [], []
+    while knoten:
+        k = knoten.pop()
+        beschreibung.append(f"{k['Node Type']} {k.get('Relation Name', '')}".strip())
+        # Ein Seq Scan mit Filter liest die ganze Tabelle, um wenige Zeilen zu finden
+        if k['Node Type'] == 'Seq Scan' and k.get('Relation Name') in grosse_tabellen and 'Filter' in k:
+            vollscans.append(k['Relation Name'])
+        knoten.extend(k.get('Plans', []))
+    return ' | '.join(beschreibung), vollscans
+
+
+@pytest.fixture
+def testdaten(datenbank):
+    """JAHRE Jahre Buchungen (4 pro Tag) mit Event-Log und aktuellen Statistiken"""
+    erstes_jahr = datetime.now().year - JAHRE + 1
+    for i in range(JAHRE):
+        app_modul.seed_buchungen(erstes_jahr + i)
+    db.session.execute(db.insert(BuchungEvent).from_select(
+        ['buchung_id', 'zeitpunkt', 'typ', 'quelle'],
+        db.select(Buchung.id, Buchung.erstellt_am, db.literal('erstellt'), db.literal('system'))))
+    db.session.commit()
+    with db.engine.connect() as conn:
+        conn.exec_driver_sql('ANALYZE')  # Ohne Statistiken sind die Pläne nicht aussagekräftig
+        conn.commit()
+
+    return {tabelle for tabelle in app_modul._backup_tabellen()
+            if db.session.execute(db.text(f'SELECT COUNT(*) FROM "{tabelle}"')).scalar() > SCHWELLE}
+
+
+def abfragen_mitschneiden(admin_client, monkeypatch):
+    """Führt PLAN_ROUTEN und alle Hintergrund-Jobs aus, gibt {SQL: (Quelle, Parameter)} zurück"""
+    # Antwort-Cache aus, sonst fehlen die Abfragen bei Cache-Treffern
+    monkeypatch.setattr(app_modul, 'RESPONSE_CACHE_ENABLED', False)
+    abfragen = {}
+    quelle = {'name': None}
+
+    def mitschneiden(conn, cursor, statement, parameters, context, executemany):
+        art = statement.lstrip().split(None, 1)[0].upper()
+        if not executemany and art in ('SELECT', 'UPDATE', 'DELETE', 'WITH') and statement not in abfragen:
+            abfragen[statement] = (quelle['name'], parameters)
+
+    werte = {
+        'jahr': datetime.now().year,
+        'seq': max(app_modul.aktuelle_aenderung_seq() - 5, 0),
+        'buchung_id': db.session.query(db.func.max(Buchung.id)).filter(Buchung.status == 'ausstehend').scalar(),
+        'cursor': '',
+    }
+    db.event.listen(Engine, 'before_cursor_execute', mitschneiden)
+    try:
+        for methode, pfad in PLAN_ROUTEN:
+            pfad = pfad.format(**werte)
+            quelle['name'] = f'{methode} {pfad}'
+            json_daten = None
+            if pfad == '/api/buchung':
+                beginn = datetime(werte['jahr'] + 1, 3, 1, 10)
+                json_daten = {'raum_id': 1, 'start_datum': beginn.isoformat(),
+                              'end_datum': (beginn + timedelta(hours=2)).isoformat(),
+                              'benutzer_name': 'Plan', 'benutzer_email': 'plan@example.com'}
+            response = admin_client.open(pfad, method=methode, json=json_daten)
+            assert response.status_code < 400, f"{quelle['name']}: Status {response.status_code}"
+            if pfad == '/api/admin/logs':
+                werte['cursor'] = response.headers.get('X-Naechster-Cursor', '')
+        for job in app_modul._hintergrund_jobs:
+            quelle['name'] = f"Job {job['name']}"
+            with app.app_context():
+                job['funktion']()
+    finally:
+        db.event.remove(Engine, 'before_cursor_execute', mitschneiden)
+        db.session.remove()
+    return abfragen
+
+
+def test_haeufige_abfragen_nutzen_indizes(testdaten, admin_client, monkeypatch):
+    grosse_tabellen = testdaten
+    assert 'buchung' in grosse_tabellen
+
+    abfragen = abfragen_mitschneiden(admin_client, monkeypatch)
+    assert len(abfragen) > 10
+
+    pruefen = sqlite_plan_pruefen if app_modul.ist_sqlite() else postgres_plan_pruefen
+    fehler = []
+    with db.engine.connect() as conn:
+        for sql, (name, parameter) in abfragen.items():
+            plan, vollscans = pruefen(conn, sql, parameter, grosse_tabellen)
+            if vollscans:
+                fehler.append(f"{name}: Tabellenscan über {', '.join(sorted(set(vollscans)))}\n"
+                              f"    {' '.join(sql.split())[:200]}\n    Plan: {plan}")
+        conn.rollback()
+    assert not fehler, '\n'.join(fehler)
+
+
+@pytest.mark.skipif(not os.getenv('TEST_POSTGRES_URI'), reason='TEST_POSTGRES_URI nicht gesetzt')
+def test_haeufige_abfragen_nutzen_indizes_postgres():
+    if not app_modul.ist_sqlite():
+        pytest.skip('Diese Testsitzung läuft bereits gegen PostgreSQL')
+    # app.py bindet die Datenbank beim Import, deshalb in einem eigenen Prozess
+    ergebnis = subprocess.run(
+        [sys.executable, '-m', 'pytest', '-q', '-p', 'no:cacheprovider',
+         f'{__file__}::test_haeufige_abfragen_nutzen_indizes'],
+        env={**os.environ, 'TEST_DATABASE_URI': os.environ['TEST_POSTGRES_URI']},
+        capture_output=True, text=True)
+    assert ergebnis.returncode == 0, ergebnis.stdout + ergebnis.stderr
@@ -0,0 +1,61 @@
+"""Volltextsuche GET /api/admin/suche"""
+from datetime import datetime, timedelta
+
+from app import db, Buchung
+
+
+def buchung_anlegen(name, email, zweck='', tag=1):
+    beginn = datetime(2030, 11, tag, 10)
+    buchung = Buchung(raum_id=1, start_datum=beginn, end_datum=beginn + timedelta(hours=2),
+                      benutzer_name=name, benutzer_email=email, zweck=zweck, status='ausstehend')
+    db.session.add(buchung)
+    db.session.commit()
+    return buchung.id
+
+
+def suche(admin_client, q, **parameter):
+    response = admin_client.get('/api/admin/suche', query_string={'q': q, **parameter})
+    assert response.status_code == 200, response.json
+    return [b['id'] for b in response.json], response.headers.get('X-Naechster-Cursor')
+
+
+def test_alle_begriffe_mit_praefix(admin_client):
+    probe = buchung_anlegen('Anna Müller', 'anna@example.com', 'Probe Musikverein')
+    buchung_anlegen('Bernd Schulz', 'bernd@example.com', 'Jahreshauptversammlung Musikverein')
+    buchung_anlegen('Clara Weber', 'clara@example.com', 'Geburtstag')
+
+    assert len(suche(admin_client, 'Musikverein')[0]) == 2
+    assert len(suche(admin_client, 'musik')[0]) == 2  # Präfix
+    assert suche(admin_client, 'musikverein anna')[0] == [probe]
+    assert suche(admin_client, 'geburtstag musikverein')[0] == []
+
+
+def test_aenderungen_sind_sofort_auffindbar(admin_client):
+    buchung_id = buchung_anlegen('Anna Müller', 'anna@example.com', 'Probe')
+    buchung = db.session.get(Buchung, buchung_id)
+    buchung.zweck = 'Sommerfest'
+    db.session.commit()
+
+    assert suche(admin_client, 'sommerfest')[0] == [buchung_id]
+    assert suche(admin_client, 'probe')[0] == []
+
+
+def test_keyset_paging(admin_client):
+    ids = {buchung_anlegen(f'Person {i}', f'p{i}@example.com', 'Chorprobe', tag=i) for i in range(1, 6)}
+
+    erste, cursor = suche(admin_client, 'chorprobe', limit=2)
+    zweite, cursor2 = suche(admin_client, 'chorprobe', limit=2, cursor=cursor)
+    dritte, cursor3 = suche(admin_client, 'chorprobe', limit=2, cursor=cursor2)
+
+    assert len(erste) == len(zweite) == 2 and len(dritte) == 1
+    assert set(erste + zweite + dritte) == ids
+    assert cursor3 is None
+
+
+def test_ungueltige_anfragen(admin_client):
+    assert admin_client.get('/api/admin/suche?q=').status_code == 400
+    assert admin_client.get('/api/admin/suche?q=test&cursor=kaputt').status_code == 400
+
+
+def test_nur_fuer_admins(client):
+    assert client.get('/api/admin/suche?q=test').status_code == 401